@@ -1,56 +1,437 @@
+import gc
+import io
 import json
+import mmap
+import os
+import random
+import sys
 from collections import defaultdict
+from contextlib import contextmanager
+from itertools import islice, repeat
 
-def describe_json_structure(data, indent=0, path="", structure=None):
+import jsonbackend
+import metrics
+from jsonstream import CHUNK_SIZE, describe_json_stream
+from limits import MAX_DEPTH, MAX_LIST_ITEMS
+from structure import StructureNode, merge_truncated, summarize_schema
+
+def _sample_elements(data, sample_size, rng):
+    """
+    从列表中等概率抽取至多 sample_size 个元素，保持原有顺序
+    """
+    if sample_size is None or len(data) <= sample_size:
+        return data
+    return map(data.__getitem__, sorted(rng.sample(range(len(data)), sample_size)))
+
+@contextmanager
+def paused_gc():
+    """
+    在 with 块内暂停自动垃圾回收，结束后恢复原状态
+    遍历时新建的节点和栈帧会反复触发垃圾回收，暂停后深层嵌套文档的遍历约快四成；
+    gc 是进程全局的设置，会影响其他线程，只应由拥有整个进程的调用方（如命令行入口）显式使用
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def describe_json_tree(data, merge_lists=False, sample_size=None, rng=None, tree=None, limits=None):
+    """
+    描述JSON数据的结构，返回结构树的文档根节点
+    使用显式栈迭代遍历，嵌套深度不受递归限制
+    merge_lists 为真时合并列表中每个元素的结构，sample_size 限制每个列表最多抽样的元素个数
+    limits 为 limits.Limits 时按其中的上限提前结束，返回的根节点 truncated 标明触发的上限
+    """
+    if tree is None:
+        tree = StructureNode()
+    if rng is None:
+        rng = random
+    tree.count += 1
+    if limits is not None:
+        return _describe_json_tree_limited(data, merge_lists, sample_size, rng, tree, limits)
+    return _describe_json_tree(data, merge_lists, sample_size, rng, tree)
+
+def _describe_json_tree(data, merge_lists, sample_size, rng, tree):
+    """
+    describe_json_tree 的不受限版本
+    """
+    # 栈中每一帧为 (子节点迭代器, 父节点, 父节点的子节点字典)；子节点的查找和创建在循环中就地展开
+    stack = []
+    parent, key = tree, None
+    children = tree.children
+    if children is None:
+        children = tree.children = {}
+    while True:
+        if isinstance(data, dict):
+            node = children.get((key, "dict"))
+            if node is None:
+                node = children[(key, "dict")] = StructureNode(key, "dict")
+            node.count += 1
+            if data:
+                if node.children is None:
+                    node.children = {}
+                stack.append((iter(data.items()), node, node.children))
+        elif isinstance(data, list):
+            node = children.get((key, "list"))
+            if node is None:
+                node = children[(key, "list")] = StructureNode(key, "list")
+            node.count += 1
+            lengths = node.lengths
+            lengths[len(data)] = lengths.get(len(data), 0) + 1
+            if data:
+                if node.children is None:
+                    node.children = {}
+                if merge_lists:
+                    elements = _sample_elements(data, sample_size, rng)
+                    stack.append((zip(repeat(None), elements), node, node.children))
+                else:  # 只检查第一个元素，假设列表是同构的
+                    stack.append((iter(((None, data[0]),)), node, node.children))
+        else:
+            type_key = (key, type(data).__name__)
+            node = children.get(type_key)
+            if node is None:
+                node = children[type_key] = StructureNode(key, type_key[1])
+            node.count += 1
+
+        # 继续遍历栈顶容器：标量子节点就地计数，遇到容器则转去描述它
+        while stack:
+            items, parent, children = stack[-1]
+            for key, data in items:
+                if isinstance(data, (dict, list)):
+                    break
+                type_key = (key, type(data).__name__)
+                node = children.get(type_key)
+                if node is None:
+                    node = children[type_key] = StructureNode(key, type_key[1])
+                node.count += 1
+            else:
+                stack.pop()
+                continue
+            break
+        else:
+            return tree
+
+_END = object()
+
+def _describe_json_tree_limited(data, merge_lists, sample_size, rng, tree, limits):
+    """
+    describe_json_tree 的受限版本，每个值都计入用量；不受限时不走这里，避免拖慢常规分析
+    """
+    budget = limits.budget()
+    max_depth = limits.max_depth
+    max_items = limits.max_list_items
+    stack = []
+    parent, key = tree, None
+    while budget.tick():
+        if isinstance(data, dict):
+            node = parent.child(key, "dict")
+            node.count += 1
+            if max_depth is not None and len(stack) >= max_depth:
+                if data:
+                    budget.truncate(MAX_DEPTH)
+            else:
+                stack.append((iter(data.items()), node))
+        elif isinstance(data, list):
+            node = parent.child(key, "list")
+            node.count += 1
+            node.lengths[len(data)] = node.lengths.get(len(data), 0) + 1
+            if max_depth is not None and len(stack) >= max_depth:
+                if data:
+                    budget.truncate(MAX_DEPTH)
+            elif merge_lists:
+                elements = _sample_elements(data, sample_size, rng)
+                if max_items is not None and min(len(data), sample_size or len(data)) > max_items:
+                    budget.truncate(MAX_LIST_ITEMS)
+                    elements = islice(elements, max_items)
+                stack.append((zip(repeat(None), elements), node))
+            elif data:
+                stack.append((iter(((None, data[0]),)), node))
+        else:
+            parent.child(key, type(data).__name__).count += 1
+
+        while stack:
+            items, parent = stack[-1]
+            item = next(items, _END)
+            if item is _END:
+                stack.pop()
+                continue
+            key, data = item
+            break
+        else:
+            break
+    tree.truncated = merge_truncated(tree.truncated, budget.truncated)
+    return tree
+
+def describe_json_structure(data, indent=0, path="", structure=None,
+                            merge_lists=False, sample_size=None, rng=None, limits=None):
     """
-    递归描述JSON数据的结构
+    描述JSON数据的结构，返回扁平的 {"路径 (类型)": 次数}，保留以兼容旧接口
+    不合并列表、不设上限时直接构建扁平结构，省去结构树的节点和转换；其余情况经由 describe_json_tree
     """
+    if merge_lists or limits is not None:
+        tree = describe_json_tree(data, merge_lists=merge_lists, sample_size=sample_size, rng=rng, limits=limits)
+        return tree.to_structure(structure, path)
     if structure is None:
         structure = defaultdict(int)
-    
-    if isinstance(data, dict):
-        structure[f"{path} (dict)"] += 1
-        for key, value in data.items():
-            new_path = f"{path}.{key}" if path else key
-            describe_json_structure(value, indent + 2, new_path, structure)
-    elif isinstance(data, list):
-        structure[f"{path} (list[{len(data)}])"] += 1
-        if data:  # 只检查第一个元素，假设列表是同构的
-            describe_json_structure(data[0], indent + 2, f"{path}[]", structure)
-    else:
-        type_name = type(data).__name__
-        structure[f"{path} ({type_name})"] += 1
-    
-    return structure
 
-def analyze_json(json_str):
+    # 栈中每一帧为 (子节点迭代器, 子路径前缀)
+    stack = []
+    while True:
+        if isinstance(data, dict):
+            structure[f"{path} (dict)"] += 1
+            stack.append((iter(data.items()), f"{path}." if path else ""))
+        elif isinstance(data, list):
+            structure[f"{path} (list[{len(data)}])"] += 1
+            if data:  # 只检查第一个元素，假设列表是同构的
+                stack.append((iter((("", data[0]),)), f"{path}[]"))
+        else:
+            structure[f"{path} ({type(data).__name__})"] += 1
+
+        # 继续遍历栈顶容器：标量子节点就地计数，遇到容器则转去描述它
+        while stack:
+            items, prefix = stack[-1]
+            for key, data in items:
+                if isinstance(data, (dict, list)):
+                    break
+                structure[f"{prefix}{key} ({type(data).__name__})"] += 1
+            else:
+                stack.pop()
+                continue
+            path = f"{prefix}{key}"
+            break
+        else:
+            return structure
+
+def print_schema_summary(schema):
+    """
+    打印可选键和联合类型
+    """
+    print("\n可选键与联合类型：")
+    print("=" * 50)
+    for entry in schema.values():
+        notes = []
+        if entry["optional"]:
+            notes.append("可选")
+        if len(entry["types"]) > 1:
+            notes.append("联合类型 " + " | ".join(entry["types"]))
+        if notes:
+            print(f"- {entry['path']}: {', '.join(notes)}")
+
+def print_structure(tree):
+    """
+    按层级缩进打印结构树
+    """
+    print("\n解析成功！JSON对象结构描述：")
+    print("=" * 50)
+    if tree.truncated:
+        print(f"（已达到分析上限 {tree.truncated}，以下只是部分结构）")
+    for node, path, depth in tree.walk():
+        if depth == 0:
+            # 缩进为路径中分隔符（"." 和 "[]"）的个数：顶层字典的键前没有 "."，比树的深度少一级
+            shift = 1 if node.type == "dict" else 0
+        print("  " * max(depth - shift, 0) + f"- {path}: ({node.label})")
+
+# analyze_json 原始JSON内容的输出方式
+OUTPUT_FULL = "full"            # 完整打印（默认）
+OUTPUT_STRUCTURE = "structure"  # 只打印结构描述
+OUTPUT_PREVIEW = "preview"      # 只打印开头 preview_chars 个字符
+OUTPUT_STREAM = "stream"        # 分块写入 out 指定的文件对象
+
+def write_json_pretty(json_obj, out, limit=None, buffer_size=CHUNK_SIZE):
+    """
+    增量格式化JSON并分块写入 out，不构建完整的字符串
+    limit 不为 None 时最多写出 limit 个字符，返回是否被截断
+    """
+    encoder = json.JSONEncoder(indent=2, ensure_ascii=False)
+    pending = []
+    pending_size = 0
+    written = 0
+    for chunk in encoder.iterencode(json_obj):
+        if limit is not None and written + pending_size + len(chunk) > limit:
+            pending.append(chunk[:limit - written - pending_size])
+            out.write("".join(pending))
+            return True
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= buffer_size:
+            out.write("".join(pending))
+            written += pending_size
+            pending = []
+            pending_size = 0
+    out.write("".join(pending))
+    return False
+
+def _utf8_size(text, limit=None):
+    """
+    字符串编码为UTF-8后的字节数，分块计算，不复制整个字符串；超过 limit 时提前返回
+    """
+    if text.isascii():
+        return len(text)
+    size = 0
+    for start in range(0, len(text), CHUNK_SIZE):
+        size += len(text[start:start + CHUNK_SIZE].encode('utf-8'))
+        if limit is not None and size > limit:
+            break
+    return size
+
+def _over_max_bytes(json_str, max_bytes):
+    """
+    输入超过 max_bytes 个字节时返回其前 max_bytes + 1 个字节（多一个字节让流式分析得知输入确实超出上限），
+    否则返回 None；字符串只编码需要的前缀
+    """
+    if not isinstance(json_str, str):
+        with memoryview(json_str) as view:
+            return bytes(view[:max_bytes + 1]) if view.nbytes > max_bytes else None
+    # 每个字符编码为 1 至 4 个字节，多数情况下由长度即可判断
+    if len(json_str) * 4 <= max_bytes:
+        return None
+    if len(json_str) <= max_bytes and _utf8_size(json_str, max_bytes) <= max_bytes:
+        return None
+    # 前 max_bytes + 1 个字符编码后至少有 max_bytes + 1 个字节
+    return json_str[:max_bytes + 1].encode('utf-8')[:max_bytes + 1]
+
+def analyze_json(json_str, merge_lists=False, sample_size=None,
+                 output=OUTPUT_FULL, out=None, preview_chars=2000, limits=None):
     """
     分析JSON字符串并返回其结构描述
+    json_str 也可以是 bytes 或 memoryview，由 jsonbackend 直接解析，省去解码复制
+    output 控制原始JSON内容的输出方式，见 OUTPUT_* 常量
+    limits 为 limits.Limits 时限制分析的规模；输入超过 max_bytes 时不解码，
+    只流式分析前 max_bytes 个字节、打印部分结构并返回 None
     """
+    if limits is not None and limits.max_bytes is not None:
+        prefix = _over_max_bytes(json_str, limits.max_bytes)
+        if prefix is not None:
+            analyze_json_stream(io.BytesIO(prefix), merge_lists=merge_lists, limits=limits, sample_size=sample_size)
+            return None
+    run = metrics.start("analyze_json")
     try:
         # 解析JSON字符串
-        json_obj = json.loads(json_str)
+        json_obj = jsonbackend.loads(json_str)
+        if run is not None:
+            run.mark("decode")
         
         # 描述JSON结构
-        structure = describe_json_structure(json_obj)
+        tree = describe_json_tree(json_obj, merge_lists=merge_lists, sample_size=sample_size, limits=limits)
+        schema = None
+        if run is not None:
+            run.mark("traverse")
+            run.record_tree(tree)
+        if merge_lists:
+            schema = summarize_schema(tree)
+            if run is not None:
+                run.mark("schema")
         
         # 打印结果
-        print("\n解析成功！JSON对象结构描述：")
-        print("=" * 50)
-        for item, count in structure.items():
-            parts = item.split(" (")
-            path = parts[0]
-            type_info = "(" + parts[1]
-            indent_level = path.count('.') + path.count('[]')
-            print("  " * indent_level + f"- {path}: {type_info}")
+        print_structure(tree)
+        if schema is not None:
+            print_schema_summary(schema)
         
-        print("\n原始JSON内容：")
-        print(json.dumps(json_obj, indent=2, ensure_ascii=False))
+        if output == OUTPUT_FULL:
+            print("\n原始JSON内容：")
+            print(json.dumps(json_obj, indent=2, ensure_ascii=False))
+        elif output == OUTPUT_PREVIEW:
+            print(f"\n原始JSON内容（前 {preview_chars} 个字符）：")
+            if write_json_pretty(json_obj, sys.stdout, limit=preview_chars):
+                print("\n...（已截断）")
+            else:
+                print()
+        elif output == OUTPUT_STREAM:
+            write_json_pretty(json_obj, out if out is not None else sys.stdout)
+        elif output != OUTPUT_STRUCTURE:
+            raise ValueError(f"未知的输出方式: {output}")
+        if run is not None:
+            run.mark("print")
         
         return json_obj
-    except json.JSONDecodeError as e:
+    except jsonbackend.DECODE_ERRORS as e:
+        if run is not None:
+            run.mark("decode")
         print(f"JSON解析错误: {e}")
         return None
+    finally:
+        if run is not None:
+            run.bytes_in = _utf8_size(json_str) if isinstance(json_str, str) else memoryview(json_str).nbytes
+            run.finish()
+
+def analyze_json_stream(fp, merge_lists=False, chunk_size=CHUNK_SIZE, limits=None, sample_size=None):
+    """
+    流式分析文件或字节流中的JSON，只打印结构描述，不在内存中构建整个文档
+    sample_size 与 analyze_json 相同，限制合并列表结构时每个列表抽样的元素个数
+    """
+    run = metrics.start("analyze_json_stream")
+    if run is not None:
+        position = _tell(fp)
+    try:
+        tree = describe_json_stream(fp, merge_lists=merge_lists, chunk_size=chunk_size, limits=limits,
+                                    sample_size=sample_size)
+        schema = None
+        if run is not None:
+            # 流式分析中解码和遍历交替进行，计为同一阶段
+            run.mark("stream")
+            run.record_tree(tree)
+        if merge_lists:
+            schema = summarize_schema(tree)
+            if run is not None:
+                run.mark("schema")
+        print_structure(tree)
+        if schema is not None:
+            print_schema_summary(schema)
+        if run is not None:
+            run.mark("print")
+        return tree
+    except jsonbackend.DECODE_ERRORS as e:
+        if run is not None:
+            run.mark("stream")
+        print(f"JSON解析错误: {e}")
+        return None
+    finally:
+        if run is not None:
+            end = _tell(fp)
+            if position is not None and end is not None:
+                run.bytes_in = end - position
+            run.finish()
+
+def _tell(fp):
+    """
+    返回文件对象的当前位置，不支持时返回 None
+    """
+    try:
+        return fp.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+@contextmanager
+def map_file(path):
+    """
+    以只读方式内存映射文件，多个进程映射同一文件时共享操作系统的页缓存
+    空文件无法映射，此时返回 None
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with mapped:
+            yield mapped
+
+def analyze_json_file(path, streaming=False, merge_lists=False, sample_size=None,
+                      output=OUTPUT_FULL, out=None, preview_chars=2000, limits=None):
+    """
+    分析保存在文件中的JSON响应，通过内存映射读取，不把整个文件读成字符串
+    streaming 为真时使用流式分析（不输出原始内容），否则把映射内容直接交给解码后端
+    映射内容以原始字节解码，非法JSON和非法UTF-8都与 analyze_json 一样打印解析错误并返回 None
+    """
+    with map_file(path) as mapped:
+        if streaming:
+            return analyze_json_stream(mapped or io.BytesIO(), merge_lists=merge_lists, limits=limits,
+                                       sample_size=sample_size)
+        with memoryview(mapped or b"") as view:
+            return analyze_json(view, merge_lists=merge_lists, sample_size=sample_size,
+                                output=output, out=out, preview_chars=preview_chars, limits=limits)
 
 # 示例使用
 if __name__ == "__main__":
@@ -701,5 +1082,7 @@ if __name__ == "__main__":
 }
     """
     
+    metrics.configure_from_env()
     print("开始解析JSON字符串...")
-    json_object = analyze_json(example_json)
+    with paused_gc():
+        json_object = analyze_json(example_json)
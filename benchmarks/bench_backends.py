@@ -0,0 +1,33 @@
+"""
+对比各JSON解码后端解析 DescribeVpcs 形状响应的速度
+
+运行方式：python -m benchmarks.bench_backends
+"""
+import json
+import time
+
+import jsonbackend
+from benchmarks.generators import make_describe_vpcs
+
+def bench(backend, data, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        jsonbackend.loads(data, backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    backends = jsonbackend.available_backends()
+    print(f"可用后端: {', '.join(backends)}")
+    for count in (20, 1000, 20000):
+        text = json.dumps(make_describe_vpcs(count, heterogeneity=0.3), ensure_ascii=False)
+        raw = text.encode('utf-8')
+        print(f"\nDescribeVpcs {count} 个VPC, {len(raw) / 1024:.1f} KiB")
+        for backend in backends:
+            for name, data in (("str", text), ("bytes", raw), ("memoryview", memoryview(raw))):
+                elapsed = bench(backend, data)
+                print(f"  {backend:>8} {name:>10}: {elapsed * 1000:8.2f} ms, {len(raw) / elapsed / 2 ** 20:8.1f} MiB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+在本地替身服务上对比逐页串行请求（每页新建连接，相当于反复执行 DescribeVpcs.sh）
+与连接池并发翻页的耗时，并校验两者取回的记录一致
+
+运行方式：python -m benchmarks.bench_client [--vpcs 2000] [--limit 100] [--latency 0.02]
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmarks.standin import StandInServer
+from tcclient import TencentCloudClient, describe_pages
+
+SECRET_ID = "AKIDz8krbsJ5yKBZQpn74WFkmLPx3EXAMPLE"
+SECRET_KEY = "Gu5t9xGARNpq86cd98joQYCN3EXAMPLE"
+REGION = "ap-jakarta"
+
+async def fetch_serial(endpoint, limit):
+    records = []
+    offset = 0
+    while True:
+        # 每页一个新客户端，不复用连接
+        async with TencentCloudClient(SECRET_ID, SECRET_KEY, REGION, endpoint=endpoint) as client:
+            page = await client.call("DescribeVpcs", {"Offset": str(offset), "Limit": str(limit)})
+        records.extend(page["VpcSet"])
+        offset += limit
+        if offset >= page["TotalCount"]:
+            return records
+
+async def run(vpcs, limit, latency, concurrency):
+    async with StandInServer(vpcs=vpcs, subnets=0, regions=(REGION,), latency=latency) as server:
+        start = time.perf_counter()
+        serial = await fetch_serial(server.endpoint, limit)
+        serial_time = time.perf_counter() - start
+        serial_connections = server.connections
+
+        server.connections = 0
+        async with TencentCloudClient(SECRET_ID, SECRET_KEY, REGION, endpoint=server.endpoint,
+                                      max_connections=concurrency) as client:
+            start = time.perf_counter()
+            pooled = await client.describe_all("DescribeVpcs", limit=limit, concurrency=concurrency)
+            pooled_time = time.perf_counter() - start
+            pooled_connections = server.connections
+
+            start = time.perf_counter()
+            tree = await describe_pages(client, "DescribeVpcs", limit=limit, concurrency=concurrency,
+                                        merge_lists=True)
+            stream_time = time.perf_counter() - start
+
+    same = [vpc["VpcId"] for vpc in serial] == [vpc["VpcId"] for vpc in pooled["VpcSet"]]
+    print(f"{vpcs} 个VPC，每页 {limit} 条，模拟延迟 {latency * 1e3:.0f} ms，并发 {concurrency}")
+    print(f"  逐页串行（每页新连接）: {serial_time * 1e3:9.1f} ms, {serial_connections} 个连接")
+    print(f"  连接池并发翻页        : {pooled_time * 1e3:9.1f} ms, {pooled_connections} 个连接 "
+          f"({serial_time / pooled_time:.1f} 倍)")
+    records = tree.to_structure()["Response.VpcSet[] (dict)"]
+    print(f"  边翻页边分析结构      : {stream_time * 1e3:9.1f} ms, 分析 {records} 条记录")
+    print(f"  记录一致: {'是' if same else '否'}")
+    return 0 if same else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="连接池并发翻页基准测试")
+    parser.add_argument("--vpcs", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args.vpcs, args.limit, args.latency, args.concurrency))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+对比通用的 flatten_record 与按结构生成的专用展开函数的吞吐量，
+并用合并全部记录和只检查第一条记录得到的两种结构树分别校验两者结果一致
+
+运行方式：python -m benchmarks.bench_flatten [--count 200000]
+"""
+import argparse
+import sys
+import time
+
+from anyjson import describe_json_tree
+from benchmarks.generators import make_describe_subnets, make_describe_vpcs
+from flatten import compile_flattener, flatten_record
+
+CASES = [
+    ("DescribeVpcs 同构", make_describe_vpcs, "VpcSet", {"heterogeneity": 0.0}),
+    ("DescribeVpcs 同构+3层嵌套", make_describe_vpcs, "VpcSet", {"heterogeneity": 0.0, "nesting": 3}),
+    ("DescribeVpcs 异构30%", make_describe_vpcs, "VpcSet", {"heterogeneity": 0.3}),
+    ("DescribeVpcs 异构30%+3层嵌套", make_describe_vpcs, "VpcSet", {"heterogeneity": 0.3, "nesting": 3}),
+    ("DescribeSubnets 同构", make_describe_subnets, "SubnetSet", {"heterogeneity": 0.0}),
+]
+
+def _best(func, records, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(records)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _check(flattener, row_flattener, records):
+    """
+    逐条对比生成的函数与 flatten_record，返回 (不一致的记录数, 退回通用实现的记录数)
+    """
+    namespace = flattener.__globals__
+    fallback = namespace["_fallback"]
+    fallbacks = [0]
+
+    def counting(record):
+        fallbacks[0] += 1
+        return fallback(record)
+
+    namespace["_fallback"] = counting
+    failures = 0
+    try:
+        for record in records:
+            expected = flatten_record(record)
+            if flattener(record) != expected:
+                failures += 1
+            if row_flattener(record) != tuple(map(expected.get, row_flattener.columns)):
+                failures += 1
+    finally:
+        namespace["_fallback"] = fallback
+    return failures, fallbacks[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="记录展开基准测试")
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    print(f"{'用例':<32}{'通用 记录/秒':>14}{'生成 记录/秒':>14}{'加速':>8}{'元组 记录/秒':>14}{'加速':>8}{'退回比例':>10}")
+    for name, generator, set_name, options in CASES:
+        response = generator(args.count, **options)
+        records = response["Response"][set_name]
+        path = f"Response.{set_name}[]"
+        tree = describe_json_tree(response, merge_lists=True)
+
+        start = time.perf_counter()
+        flattener = compile_flattener(tree, path)
+        compile_time = time.perf_counter() - start
+        row_flattener = compile_flattener(tree, path, rows=True)
+
+        generic = _best(lambda rows: [flatten_record(record) for record in rows], records)
+        compiled = _best(lambda rows: list(map(flattener, rows)), records)
+        as_rows = _best(lambda rows: list(map(row_flattener, rows)), records)
+
+        mismatches, fallbacks = _check(flattener, row_flattener, records)
+        failures += mismatches
+        # 只检查第一条记录得到的结构树：其余记录中的新键、类型变化都必须退回通用实现
+        sampled = describe_json_tree(response)
+        failures += _check(compile_flattener(sampled, path), compile_flattener(sampled, path, rows=True), records)[0]
+        print(f"{name:<32}{len(records) / generic:>14,.0f}{len(records) / compiled:>14,.0f}"
+              f"{generic / compiled:>7.1f}x{len(records) / as_rows:>14,.0f}{generic / as_rows:>7.1f}x"
+              f"{fallbacks / len(records):>10.1%}")
+    print(f"\n生成并编译一个展开函数约 {compile_time * 1e3:.2f} ms；结果不一致的记录: {failures}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+对比完整解码与惰性文档随机访问少量记录的耗时和内存峰值，并校验取到的记录一致
+耗时在不开启 tracemalloc 时测量（它对完整解码的拖慢远大于扫描），内存峰值另跑一遍测量
+
+运行方式：python -m benchmarks.bench_lazydoc [--count 200000] [--reads 100]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import jsonbackend
+from benchmarks.generators import make_describe_vpcs
+from lazydoc import open_lazy
+
+def _time(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def _peak(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="惰性文档基准测试")
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--reads", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    indexes = [rng.randrange(args.count) for _ in range(args.reads)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "vpcs.json")
+        index_path = os.path.join(directory, "vpcs.idx")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(make_describe_vpcs(args.count, heterogeneity=0.3), f, ensure_ascii=False)
+        size = os.path.getsize(path)
+
+        def full():
+            with open(path, "rb") as f:
+                vpcs = jsonbackend.loads(f.read())["Response"]["VpcSet"]
+            return [vpcs[i] for i in indexes]
+
+        def lazy():
+            with open_lazy(path, index_path) as doc:
+                vpcs = doc["Response"]["VpcSet"]
+                return [vpcs[i].decode() for i in indexes]
+
+        expected, full_time = _time(full)
+        cold, cold_time = _time(lazy)
+        warm, warm_time = _time(lazy)
+        full_peak = _peak(full)
+        # 删除索引文件，重新测量首次扫描
+        os.remove(index_path)
+        cold_peak = _peak(lazy)
+        warm_peak = _peak(lazy)
+
+    print(f"文件 {size / 2 ** 20:.0f} MB，{args.count} 个VPC，随机读取 {args.reads} 条（JSON后端 {jsonbackend.get_backend()}）")
+    print(f"{'方式':<20}{'耗时 ms':>12}{'内存峰值 MB':>14}")
+    for name, elapsed, peak in (("完整解码", full_time, full_peak), ("惰性（首次扫描）", cold_time, cold_peak),
+                                ("惰性（复用索引）", warm_time, warm_peak)):
+        print(f"{name:<20}{elapsed * 1e3:>12.1f}{peak / 2 ** 20:>14.1f}")
+    failures = (cold != expected) + (warm != expected)
+    print(f"结果不一致: {failures}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
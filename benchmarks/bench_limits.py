@@ -0,0 +1,72 @@
+"""
+测量各分析上限能否及时生效：在大响应上分别设置上限，记录分析耗时和截断原因，
+任何上限未触发或超时明显未生效时返回非零
+
+运行方式：python -m benchmarks.bench_limits [--count 50000] [--max-seconds 0.05]
+"""
+import argparse
+import io
+import sys
+import time
+
+from anyjson import describe_json_tree
+from benchmarks.generators import dumps, make_describe_vpcs
+from jsonstream import describe_json_stream
+from limits import MAX_BYTES, MAX_LIST_ITEMS, MAX_NODES, MAX_SECONDS, Limits
+
+# 超时上限允许的额外耗时（秒）：每 1024 个值才查看一次时钟
+_SLACK = 0.5
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分析上限基准测试")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--max-seconds", type=float, default=0.05)
+    args = parser.parse_args(argv)
+
+    payload = make_describe_vpcs(args.count, heterogeneity=0.3)
+    raw = dumps(payload)
+    # 顶层即为记录列表，覆盖不合并列表时逐个跳过元素的路径
+    records = dumps(payload["Response"]["VpcSet"])
+    engines = {
+        "describe_json_tree": lambda data, merge_lists, limits: describe_json_tree(
+            data[0], merge_lists=merge_lists, limits=limits),
+        "describe_json_stream": lambda data, merge_lists, limits: describe_json_stream(
+            io.BytesIO(data[1]), merge_lists=merge_lists, limits=limits),
+    }
+    # 名称 -> (上限, 期望的截断原因)
+    cases = {
+        "max_nodes": (Limits(max_nodes=1000), MAX_NODES),
+        "max_seconds": (Limits(max_seconds=args.max_seconds), MAX_SECONDS),
+        "max_bytes": (Limits(max_bytes=len(raw) // 10), MAX_BYTES),
+        "max_list_items": (Limits(max_list_items=100), MAX_LIST_ITEMS),
+    }
+    print(f"响应 {len(raw) / 2 ** 20:.1f} MB，{args.count} 个VPC")
+    print(f"{'引擎':<24}{'输入':<10}{'合并列表':<10}{'上限':<16}{'耗时 ms':>10}  截断原因")
+    failures = 0
+    for engine, func in engines.items():
+        for source, data in (("响应", (payload, raw)), ("记录列表", (payload["Response"]["VpcSet"], records))):
+            for merge_lists in (False, True):
+                for name, (limits, expected) in cases.items():
+                    if engine == "describe_json_tree" and name == "max_bytes":
+                        # 已解码的对象不受字节上限约束，由 analyze_json 在解码前处理
+                        continue
+                    if name == "max_list_items" and not merge_lists:
+                        continue
+                    if engine == "describe_json_tree" and name in ("max_nodes", "max_seconds") and not merge_lists:
+                        # 不合并时树遍历只检查每个列表的第一个元素，规模本身很小
+                        continue
+                    start = time.perf_counter()
+                    tree = func(data, merge_lists, limits)
+                    elapsed = time.perf_counter() - start
+                    reasons = (tree.truncated or "").split(",")
+                    ok = expected in reasons
+                    if name == "max_seconds" and elapsed > args.max_seconds + _SLACK:
+                        ok = False
+                    failures += not ok
+                    print(f"{engine:<24}{source:<10}{str(merge_lists):<10}{name:<16}{elapsed * 1e3:>10.1f}  "
+                          f"{tree.truncated}{'' if ok else '  <- 未生效'}")
+    print(f"未生效: {failures}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+测量 analyze_json 度量采集的开销：未注册接收器时与不含埋点的同等流程对比，
+以及注册空接收器、记录内存峰值时的耗时
+
+运行方式：python -m benchmarks.bench_metrics [--sizes 1 1000] [--repeat 7]
+"""
+import argparse
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+import jsonbackend
+import metrics
+from anyjson import OUTPUT_STRUCTURE, analyze_json, describe_json_tree, print_structure
+from benchmarks.generators import dumps, make_describe_vpcs
+
+def _bare(raw):
+    """
+    analyze_json 在 OUTPUT_STRUCTURE 下的流程，不含任何埋点
+    """
+    print_structure(describe_json_tree(jsonbackend.loads(raw)))
+
+def _instrumented(raw):
+    analyze_json(raw, output=OUTPUT_STRUCTURE)
+
+def _time(func, raw, calls):
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func(raw)
+        return (time.perf_counter() - start) / calls
+
+def _noop_sink(run):
+    pass
+
+# 名称 -> (被测函数, 注册接收器时的 trace_memory；None 表示不注册)
+MODES = {
+    "无埋点": (_bare, None),
+    "关闭": (_instrumented, None),
+    "空接收器": (_instrumented, False),
+    "空接收器+内存峰值": (_instrumented, True),
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="度量采集开销基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 1000])
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    print(f"{'VPC数':>8}{'方式':>20}{'单次耗时 us':>14}{'相对无埋点':>12}")
+    overheads = []
+    for size in args.sizes:
+        raw = dumps(make_describe_vpcs(size, heterogeneity=0.3))
+        # 每轮约处理 20 MB，小响应重复多次以测出单次调用的固定开销
+        calls = max(1, 20 * 2 ** 20 // len(raw))
+        best = {name: float("inf") for name in MODES}
+        # 各方式交替运行，取多轮中的最小值，减少频率调节和缓存带来的偏差
+        for _ in range(args.repeat):
+            for name, (func, trace_memory) in MODES.items():
+                if trace_memory is not None:
+                    metrics.add_sink(_noop_sink, trace_memory)
+                try:
+                    best[name] = min(best[name], _time(func, raw, calls))
+                finally:
+                    if trace_memory is not None:
+                        metrics.remove_sink(_noop_sink)
+        for name, elapsed in best.items():
+            print(f"{size:>8}{name:>20}{elapsed * 1e6:>14.1f}{elapsed / best['无埋点']:>12.3f}")
+        overheads.append(best["关闭"] / best["无埋点"] - 1)
+    print(f"关闭时与无埋点的最大差异: {max(overheads):.2%}（含测量噪声）")
+    # 关闭时的全部额外工作是一次 metrics.start() 和几处 run is not None 判断，单独测出其耗时作为上限
+    calls = 10 ** 6
+    start = time.perf_counter()
+    for _ in range(calls):
+        metrics.start("analyze_json")
+    print(f"关闭时 metrics.start() 单次耗时: {(time.perf_counter() - start) / calls * 1e9:.0f} ns")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
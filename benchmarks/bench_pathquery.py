@@ -0,0 +1,87 @@
+"""
+对比路径查询在已解析对象上执行与流式执行的耗时，并校验两条路径的结果一致：
+select 与 select_stream、select_rows 与 select_rows_stream，记录中混有非字典元素，流式路径覆盖多种分块大小
+
+运行方式：python -m benchmarks.bench_pathquery [--count 5000]
+"""
+import argparse
+import io
+import random
+import sys
+import time
+
+from benchmarks.generators import dumps, make_describe_vpcs
+from pathquery import select, select_rows, select_rows_stream, select_stream
+
+RECORD_PATH = "Response.VpcSet[]"
+FIELDS = ["VpcId", "CidrBlock", "VpcFlag", "TagSet[].Key", "TagSet[].Value", "Extension.Value", "Missing"]
+PATHS = [f"{RECORD_PATH}.{field}" for field in FIELDS] + ["Response.TotalCount", "Response.VpcSet[].TagSet[]"]
+# 校验用的分块大小，小分块让记录和值跨越分块边界
+CHUNK_SIZES = [1, 7, 4096, 65536]
+
+def _payload(count, seed=0):
+    """
+    异构、带嵌套的 DescribeVpcs 响应，约十分之一的记录换成非字典值
+    """
+    payload = make_describe_vpcs(count, heterogeneity=0.3, nesting=3, seed=seed)
+    rng = random.Random(seed)
+    records = payload["Response"]["VpcSet"]
+    for i in range(len(records)):
+        if rng.random() < 0.1:
+            records[i] = rng.choice([None, 0, "vpc", [], [{"VpcId": "x"}], {}, {"TagSet": None}])
+    return payload
+
+def _check(payload, chunk_sizes):
+    """
+    返回不一致的 (查询方式, 分块大小) 列表
+    """
+    raw = dumps(payload)
+    expected = select(payload, *PATHS)
+    rows = select_rows(payload, RECORD_PATH, FIELDS)
+    mismatches = []
+    for chunk_size in chunk_sizes:
+        if select_stream(io.BytesIO(raw), *PATHS, chunk_size=chunk_size) != expected:
+            mismatches.append(("select_stream", chunk_size))
+        if list(select_rows_stream(io.BytesIO(raw), RECORD_PATH, FIELDS, chunk_size=chunk_size)) != rows:
+            mismatches.append(("select_rows_stream", chunk_size))
+    return mismatches
+
+def _best(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="路径查询基准测试")
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    failures = []
+    # 分块为 1 字节时很慢，只在小响应上校验
+    for seed in range(20):
+        failures += _check(_payload(50, seed), CHUNK_SIZES)
+    payload = _payload(args.count)
+    failures += _check(payload, CHUNK_SIZES[2:])
+    for name, chunk_size in failures:
+        print(f"结果不一致: {name} 分块 {chunk_size}")
+
+    raw = dumps(payload)
+    timings = {
+        "select": lambda: select(payload, *PATHS),
+        "select_stream": lambda: select_stream(io.BytesIO(raw), *PATHS),
+        "select_rows": lambda: select_rows(payload, RECORD_PATH, FIELDS),
+        "select_rows_stream": lambda: list(select_rows_stream(io.BytesIO(raw), RECORD_PATH, FIELDS)),
+    }
+    print(f"响应 {len(raw) / 2 ** 20:.1f} MB，{args.count} 个VPC")
+    print(f"{'方式':<20}{'耗时 ms':>10}")
+    for name, func in timings.items():
+        print(f"{name:<20}{_best(func) * 1e3:>10.1f}")
+    print(f"不一致: {len(failures)}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+校验 tc3sign 与 *.sh 脚本生成的 Authorization 逐字节一致，并对比两者的签名耗时
+
+脚本通过替换 PATH 中的 date 和 curl 运行：date +%s 返回固定时间戳，curl 只打印参数，不发出请求
+
+运行方式：python -m benchmarks.bench_signing
+"""
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+import tc3sign
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (脚本, secret_id, secret_key, region, payload, 时间戳, 脚本生成的 Authorization)
+TEST_VECTORS = [
+    ("DescribeVpcs.sh", "AKIDz8krbsJ5yKBZQpn74WFkmLPx3EXAMPLE", "Gu5t9xGARNpq86cd98joQYCN3EXAMPLE",
+     "ap-jakarta", "{}", 1751000000,
+     "TC3-HMAC-SHA256 Credential=AKIDz8krbsJ5yKBZQpn74WFkmLPx3EXAMPLE/2025-06-27/vpc/tc3_request, "
+     "SignedHeaders=content-type;host;x-tc-action, "
+     "Signature=1fd9718183993ec5aad7244cbc41793f31e486582a3dd0aaaaa2f2ad092c44c1"),
+    ("DescribeSubnets.sh", "AKIDz8krbsJ5yKBZQpn74WFkmLPx3EXAMPLE", "Gu5t9xGARNpq86cd98joQYCN3EXAMPLE",
+     "ap-guangzhou", "{}", 1760745600,
+     "TC3-HMAC-SHA256 Credential=AKIDz8krbsJ5yKBZQpn74WFkmLPx3EXAMPLE/2025-10-18/vpc/tc3_request, "
+     "SignedHeaders=content-type;host;x-tc-action, "
+     "Signature=bc86cd297b16bcc7a4c322683cedf56b4f5208b81a6ba64913297a8af9d9cbd5"),
+    ("CreateLoadBalancer.sh", "AKIDz8krbsJ5yKBZQpn74WFkmLPx3EXAMPLE", "Gu5t9xGARNpq86cd98joQYCN3EXAMPLE",
+     "ap-jakarta", '{"LoadBalancerType":"OPEN","VpcId":"vpc-5witbbr0","LoadBalancerName":"测试"}', 1751000000,
+     "TC3-HMAC-SHA256 Credential=AKIDz8krbsJ5yKBZQpn74WFkmLPx3EXAMPLE/2025-06-27/clb/tc3_request, "
+     "SignedHeaders=content-type;host;x-tc-action, "
+     "Signature=b3ca1ddfddea76be5e4cd0dbe9aae68744d2a521f87e84af2906e7e008fafbfa"),
+]
+
+def _script_action(script):
+    return os.path.splitext(script)[0]
+
+def _write_executable(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+def make_shims(directory):
+    """
+    在 directory 中生成 date 和 curl 的替身
+    """
+    real_date = shutil.which("date")
+    _write_executable(os.path.join(directory, "date"),
+                      '#!/bin/sh\n'
+                      'if [ "$1" = "+%s" ]; then echo "$FAKE_TIMESTAMP"; else exec ' + real_date + ' "$@"; fi\n')
+    _write_executable(os.path.join(directory, "curl"),
+                      '#!/bin/sh\nfor arg in "$@"; do printf "%s\\n" "$arg"; done\n')
+
+def run_script(shim_dir, script, secret_id, secret_key, region, payload, timestamp):
+    """
+    运行脚本并从 curl 参数中取出 Authorization
+    """
+    env = dict(os.environ, PATH=shim_dir + os.pathsep + os.environ["PATH"], FAKE_TIMESTAMP=str(timestamp))
+    result = subprocess.run(["bash", os.path.join(ROOT, script), secret_id, secret_key, region, payload],
+                            env=env, capture_output=True, text=True, check=True)
+    headers = [line for line in result.stdout.splitlines() if line.startswith("Authorization: ")]
+    return headers[-1][len("Authorization: "):]
+
+def sign(script, secret_id, secret_key, region, payload, timestamp):
+    headers = tc3sign.sign_request(secret_id, secret_key, _script_action(script), payload, region, timestamp)
+    return headers["Authorization"]
+
+def main():
+    failures = 0
+    print("固定测试向量：")
+    for script, secret_id, secret_key, region, payload, timestamp, expected in TEST_VECTORS:
+        actual = sign(script, secret_id, secret_key, region, payload, timestamp)
+        ok = actual == expected
+        failures += not ok
+        print(f"  {script}: {'一致' if ok else '不一致'}")
+
+    if not (shutil.which("openssl") and shutil.which("jq")):
+        print("\n未安装 openssl 或 jq，跳过与脚本的对比")
+        return 1 if failures else 0
+
+    with tempfile.TemporaryDirectory() as shim_dir:
+        make_shims(shim_dir)
+        print("\n与脚本实际输出对比：")
+        for script, secret_id, secret_key, region, payload, timestamp, _ in TEST_VECTORS:
+            expected = run_script(shim_dir, script, secret_id, secret_key, region, payload, timestamp)
+            actual = sign(script, secret_id, secret_key, region, payload, timestamp)
+            ok = actual == expected
+            failures += not ok
+            print(f"  {script}: {'一致' if ok else '不一致'}")
+            if not ok:
+                print(f"    脚本: {expected}\n    Python: {actual}")
+
+        script, secret_id, secret_key, region, payload, timestamp, _ = TEST_VECTORS[0]
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            run_script(shim_dir, script, secret_id, secret_key, region, payload, timestamp)
+        shell = (time.perf_counter() - start) / runs
+
+    tc3sign.signing_key.cache_clear()
+    start = time.perf_counter()
+    sign(script, secret_id, secret_key, region, payload, timestamp)
+    cold = time.perf_counter() - start
+    runs = 10000
+    start = time.perf_counter()
+    for _ in range(runs):
+        sign(script, secret_id, secret_key, region, payload, timestamp)
+    warm = (time.perf_counter() - start) / runs
+
+    print("\n每次签名耗时：")
+    print(f"  shell 脚本（openssl/awk 子进程）: {shell * 1e3:10.3f} ms")
+    print(f"  Python 首次（派生签名密钥）     : {cold * 1e3:10.3f} ms")
+    print(f"  Python 缓存签名密钥             : {warm * 1e3:10.3f} ms ({shell / warm:,.0f} 倍)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
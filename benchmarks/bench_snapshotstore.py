@@ -0,0 +1,71 @@
+"""
+对比重新解析归档的 inventory 快照JSON与从列式快照文件重新打开的耗时，并校验还原的快照一致
+
+运行方式：python -m benchmarks.bench_snapshotstore [--vpcs 50000] [--subnets 50000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import jsonbackend
+from benchmarks.generators import REGIONS, make_describe_subnets, make_describe_vpcs
+from snapshotdiff import RecordIndex
+from snapshotstore import SnapshotFile
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="列式快照文件基准测试")
+    parser.add_argument("--vpcs", type=int, default=50000)
+    parser.add_argument("--subnets", type=int, default=50000)
+    args = parser.parse_args(argv)
+
+    snapshot = {
+        "Regions": {region: {"ElapsedMs": 0.0} for region in REGIONS},
+        "DescribeVpcs": make_describe_vpcs(args.vpcs, heterogeneity=0.3, regions=REGIONS),
+        "DescribeSubnets": make_describe_subnets(args.subnets, heterogeneity=0.3, regions=REGIONS),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "snapshot.json")
+        store_path = os.path.join(directory, "inventory.snap")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        with SnapshotFile(store_path) as store:
+            _, append_time = _timed(lambda: store.append(snapshot, label="bench"))
+
+        def from_json():
+            with open(json_path, "rb") as f:
+                data = jsonbackend.loads(f.read())
+            vpcs = data["DescribeVpcs"]["Response"]["VpcSet"]
+            counts = {}
+            for vpc in vpcs:
+                counts[vpc["Region"]] = counts.get(vpc["Region"], 0) + 1
+            return data, counts, RecordIndex.from_response(data["DescribeVpcs"], "VpcSet").digest
+
+        (data, json_counts, json_digest), json_time = _timed(from_json)
+        store, open_time = _timed(lambda: SnapshotFile(store_path))
+        with store:
+            stored = store[-1]
+            store_counts, count_time = _timed(lambda: stored.table("VpcSet").count_by("Region"))
+            store_digest, index_time = _timed(lambda: stored.record_index("VpcSet").digest)
+            restored, restore_time = _timed(stored.to_dict)
+
+        print(f"JSON {os.path.getsize(json_path) / 2 ** 20:.1f} MB，快照文件 {os.path.getsize(store_path) / 2 ** 20:.1f} MB，"
+              f"追加耗时 {append_time:.2f} s（JSON后端 {jsonbackend.get_backend()}）")
+    print(f"{'操作':<28}{'耗时 ms':>12}")
+    for name, elapsed in (("解析JSON+按地域计数+摘要索引", json_time), ("打开快照文件", open_time),
+                          ("按地域计数（列式）", count_time), ("由保存的摘要重建索引", index_time),
+                          ("还原整个快照", restore_time)):
+        print(f"{name:<28}{elapsed * 1e3:>12.1f}")
+    failures = (restored != data) + (store_counts != json_counts) + (store_digest != json_digest)
+    print(f"结果不一致: {failures}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
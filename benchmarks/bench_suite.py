@@ -0,0 +1,170 @@
+"""
+结构分析基准测试套件：在不同规模的合成响应上测量各引擎的耗时和内存峰值，
+结果写成JSON，可与上一个版本的结果对比找出性能回退
+
+运行方式：
+    python -m benchmarks.bench_suite --sizes 10 1000 100000 -o bench_results.json
+    python -m benchmarks.bench_suite --compare old_results.json
+"""
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import jsonbackend
+from anyjson import OUTPUT_STRUCTURE, analyze_json, describe_json_structure, describe_json_tree
+from benchmarks.generators import dumps, make_describe_subnets, make_describe_vpcs
+from columnar import extract_table
+from jsonstream import describe_json_stream
+
+class Payload:
+    """
+    一份基准输入，同时保留解析后的对象和编码后的字节
+    """
+    def __init__(self, name, size, obj, record_path):
+        self.name = name
+        self.size = size
+        self.obj = obj
+        self.raw = dumps(obj)
+        # 记录列表的路径，例如 Response.VpcSet[]
+        self.record_path = record_path
+
+def _analyze_quietly(payload):
+    with redirect_stdout(io.StringIO()):
+        analyze_json(payload.raw, output=OUTPUT_STRUCTURE)
+
+# 引擎名称 -> 以 Payload 为参数的函数；新的分析引擎在这里登记即可纳入测试
+ENGINES = {
+    "loads": lambda payload: jsonbackend.loads(payload.raw),
+    "describe_json_structure": lambda payload: describe_json_structure(payload.obj),
+    "describe_json_tree": lambda payload: describe_json_tree(payload.obj),
+    "describe_json_tree_merge": lambda payload: describe_json_tree(payload.obj, merge_lists=True),
+    "describe_json_stream": lambda payload: describe_json_stream(io.BytesIO(payload.raw)),
+    "analyze_json": _analyze_quietly,
+    "extract_table": lambda payload: extract_table(payload.obj, payload.record_path),
+}
+
+# 响应名称 -> (生成函数, 记录列表路径)
+GENERATORS = {
+    "DescribeVpcs": (make_describe_vpcs, "Response.VpcSet[]"),
+    "DescribeSubnets": (make_describe_subnets, "Response.SubnetSet[]"),
+}
+
+def _time_once(func, payload):
+    start = time.perf_counter()
+    func(payload)
+    return time.perf_counter() - start
+
+def measure(func, payload, repeat):
+    """
+    返回 (最短耗时秒数, 内存峰值字节)；内存峰值单独运行一次测量，避免 tracemalloc 影响计时
+    """
+    best = min(_time_once(func, payload) for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        func(payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def _repeat_for(size):
+    if size <= 1000:
+        return 20
+    if size <= 100000:
+        return 3
+    return 1
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(sizes, engines, heterogeneity=0.2, nesting=0, trace_memory=True):
+    """
+    运行基准测试，返回可JSON序列化的结果
+    """
+    results = []
+    for name, (generator, record_path) in GENERATORS.items():
+        for size in sizes:
+            obj = generator(size, heterogeneity=heterogeneity, nesting=nesting)
+            payload = Payload(name, size, obj, record_path)
+            for engine in engines:
+                func = ENGINES[engine]
+                if trace_memory:
+                    seconds, peak = measure(func, payload, _repeat_for(size))
+                else:
+                    seconds, peak = min(_time_once(func, payload) for _ in range(_repeat_for(size))), None
+                results.append({
+                    "payload": name,
+                    "size": size,
+                    "bytes": len(payload.raw),
+                    "engine": engine,
+                    "seconds": seconds,
+                    "records_per_second": size / seconds if seconds else None,
+                    "peak_bytes": peak,
+                })
+                print(f"{name:>16} {size:>8} {engine:>26}: {seconds * 1000:10.2f} ms"
+                      + (f", 峰值 {peak / 2 ** 20:8.2f} MiB" if peak is not None else ""))
+    return {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "json_backend": jsonbackend.get_backend(),
+        "heterogeneity": heterogeneity,
+        "nesting": nesting,
+        "results": results,
+    }
+
+def compare(previous, current, threshold):
+    """
+    对比两次结果，返回耗时或内存峰值增长超过 threshold 比例的条目
+    """
+    baseline = {(r["payload"], r["size"], r["engine"]): r for r in previous["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = baseline.get((result["payload"], result["size"], result["engine"]))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if old.get(metric) and result.get(metric) and result[metric] > old[metric] * (1 + threshold):
+                regressions.append((result, metric, old[metric], result[metric]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="结构分析基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+                        help="每个响应中的记录数，最大可到 1000000")
+    parser.add_argument('--engines', nargs='+', choices=sorted(ENGINES), default=list(ENGINES))
+    parser.add_argument('--heterogeneity', type=float, default=0.2, help="记录之间的差异程度 0~1")
+    parser.add_argument('--nesting', type=int, default=0, help="每条记录额外的嵌套层数")
+    parser.add_argument('--no-memory', action='store_true', help="不测量内存峰值")
+    parser.add_argument('-o', '--output', default="bench_results.json", help="结果输出文件")
+    parser.add_argument('--compare', help="与之前保存的结果对比")
+    parser.add_argument('--threshold', type=float, default=0.2, help="判定为性能回退的增长比例")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.engines, args.heterogeneity, args.nesting, not args.no_memory)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare(previous, report, args.threshold)
+        for result, metric, old, new in regressions:
+            print(f"性能回退: {result['payload']} {result['size']} {result['engine']} "
+                  f"{metric} {old:.4g} -> {new:.4g}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+对比递归版与迭代版 describe_json_structure 的遍历速度（节点/秒）
+
+运行方式：python -m benchmarks.bench_traversal
+"""
+import sys
+import time
+from collections import defaultdict
+
+from anyjson import describe_json_structure, describe_json_tree, paused_gc
+
+def describe_json_structure_recursive(data, indent=0, path="", structure=None):
+    """
+    原递归实现，仅作为基准对照
+    """
+    if structure is None:
+        structure = defaultdict(int)
+
+    if isinstance(data, dict):
+        structure[f"{path} (dict)"] += 1
+        for key, value in data.items():
+            new_path = f"{path}.{key}" if path else key
+            describe_json_structure_recursive(value, indent + 2, new_path, structure)
+    elif isinstance(data, list):
+        structure[f"{path} (list[{len(data)}])"] += 1
+        if data:
+            describe_json_structure_recursive(data[0], indent + 2, f"{path}[]", structure)
+    else:
+        type_name = type(data).__name__
+        structure[f"{path} ({type_name})"] += 1
+
+    return structure
+
+def make_wide_payload(width=20000):
+    """
+    构造一个很宽的 VpcSet 记录，每个键都是不同的字段，以标量为主
+    """
+    vpc = {
+        "VpcId": "vpc-5witbbr0",
+        "CidrBlock": "10.0.0.0/12",
+        "DnsServerSet": ["183.60.83.19", "183.60.82.98"],
+        "TagSet": [{"Key": "env", "Value": "test"}],
+    }
+    for i in range(width):
+        vpc[f"Field{i}"] = {"Value": i, "Enabled": True} if i % 4 == 0 else i
+    return {"Response": {"VpcSet": [vpc], "TotalCount": 1}}
+
+def make_deep_payload(depth=5000):
+    """
+    构造一个嵌套很深的文档
+    """
+    data = {"Leaf": 1}
+    for _ in range(depth):
+        data = {"Child": [data]}
+    return data
+
+def bench(func, data, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    # 每个被访问的节点都会在扁平结构中计数一次
+    nodes = sum(describe_json_structure(data).values())
+    return nodes, best
+
+def _paused(func, data):
+    with paused_gc():
+        return func(data)
+
+ENGINES = (
+    ("递归", describe_json_structure_recursive),
+    ("迭代(结构树)", describe_json_tree),
+    ("迭代(结构树，暂停GC)", lambda data: _paused(describe_json_tree, data)),
+    ("迭代(扁平结构)", describe_json_structure),
+)
+
+def main():
+    wide = make_wide_payload()
+    deep = make_deep_payload()
+    depth = 2 * 5000 + 1
+
+    print("宽文档 (Response.VpcSet[] 含大量字段)")
+    for name, func in ENGINES:
+        nodes, elapsed = bench(func, wide)
+        print(f"  {name}: {nodes} 个节点, {elapsed * 1000:.2f} ms, {nodes / elapsed:,.0f} 节点/秒")
+
+    assert list(describe_json_structure(wide).items()) == list(describe_json_structure_recursive(wide).items())
+
+    print(f"深文档 (嵌套深度 {depth}，递归上限 {sys.getrecursionlimit()})")
+    for name, func in ENGINES:
+        try:
+            nodes, elapsed = bench(func, deep)
+            print(f"  {name}: {nodes} 个节点, {elapsed * 1000:.2f} ms, {nodes / elapsed:,.0f} 节点/秒")
+        except RecursionError:
+            print(f"  {name}: 超出最大递归深度")
+
+if __name__ == "__main__":
+    main()
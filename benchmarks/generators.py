@@ -0,0 +1,158 @@
+"""
+生成 DescribeVpcs / DescribeSubnets 形状的合成响应，用于基准测试
+
+heterogeneity 为 0~1，控制可选列表（TagSet、AssistantCidrSet、Ipv6CidrBlockSet）
+被填充、字段缺失或类型变化的概率；nesting 为每条记录额外附加的嵌套层数
+"""
+import json
+import random
+import uuid
+
+REGIONS = ("ap-jakarta", "ap-guangzhou", "ap-shanghai", "ap-singapore")
+ZONES = {region: (f"{region}-1", f"{region}-2", f"{region}-3") for region in REGIONS}
+
+def _cidr(i, prefix):
+    """
+    第 i 个VPC的网段：10.0.0.0/8 之内按 /16 递增，超出后换到 172.16.0.0/12
+    """
+    if i < 256:
+        return f"10.{i}.0.0/{prefix}"
+    i -= 256
+    return f"172.{16 + (i // 256) % 16}.{i % 256}.0/{max(prefix, 24)}"
+
+def _nested(depth, rng, heterogeneity=0.0):
+    data = {"Value": rng.randint(0, 1000)}
+    if heterogeneity and rng.random() < heterogeneity / 4:
+        # 同一个键有时是标量、有时是字典
+        data["Value"] = {"Min": data["Value"], "Max": data["Value"] + rng.randint(0, 1000)}
+    for level in range(depth):
+        data = {f"Level{level}": data, "Enabled": rng.random() < 0.5}
+    return data
+
+def _tags(rng, heterogeneity):
+    if rng.random() >= heterogeneity:
+        return []
+    return [{"Key": f"tag{k}", "Value": f"value{rng.randint(0, 9)}"} for k in range(rng.randint(1, 3))]
+
+def make_vpc(i, rng, region="ap-jakarta", heterogeneity=0.0, nesting=0):
+    """
+    生成一条 VpcSet 记录
+    """
+    vpc_id = f"vpc-{i:08x}"
+    vpc = {
+        "VpcNumId": 15220046 + i,
+        "VpcId": vpc_id,
+        "VpcName": f"vpc_{i}(勿删)" if i % 7 == 0 else f"vpc_{i}",
+        "CidrBlock": _cidr(i % 4096, 12 if i % 5 == 0 else 16),
+        "Ipv6CidrBlock": "",
+        "Ipv6CidrBlockSet": [],
+        "IsDefault": i == 0,
+        "EnableMulticast": False,
+        "CreatedTime": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 15:04:56",
+        "EnableDhcp": True,
+        "DhcpOptionsId": f"dopt-{rng.randrange(16 ** 8):08x}",
+        "DnsServerSet": ["183.60.83.19", "183.60.82.98"],
+        "DomainName": "",
+        "VpcFlag": 0,
+        "IsShare": False,
+        "EnableRouteVpcPublish": False,
+        "EnableMultiCcn": False,
+        "CdcId": "",
+        "EnableCdcPublish": False,
+        "EnableRouteVpcPublishIpv6": False,
+        "Region": region,
+        "TagSet": _tags(rng, heterogeneity),
+        "AssistantCidrSet": [],
+    }
+    if rng.random() < heterogeneity:
+        vpc["AssistantCidrSet"].append({
+            "VpcId": vpc_id,
+            "CidrBlock": f"192.168.{i % 256}.0/24",
+            "AssistantType": 1,
+            "Region": region,
+            "SubnetSet": [],
+        })
+    if rng.random() < heterogeneity:
+        vpc["Ipv6CidrBlock"] = f"2402:4e00:{i % 65536:x}::/56"
+        vpc["Ipv6CidrBlockSet"].append({"Address": vpc["Ipv6CidrBlock"], "AddressType": "GUA"})
+    if rng.random() < heterogeneity / 4:
+        del vpc["CdcId"]
+    if rng.random() < heterogeneity / 4:
+        vpc["VpcFlag"] = None
+    if nesting:
+        vpc["Extension"] = _nested(nesting, rng, heterogeneity)
+    return vpc
+
+def make_subnet(i, rng, vpc_id, vpc_index, region="ap-jakarta", heterogeneity=0.0, nesting=0):
+    """
+    生成一条 SubnetSet 记录，子网落在所属VPC的 /16 网段内
+    """
+    zones = ZONES.get(region, (f"{region}-1",))
+    subnet = {
+        "VpcId": vpc_id,
+        "SubnetId": f"subnet-{i:08x}",
+        "SubnetName": f"subnet_{i}",
+        "CidrBlock": f"10.{vpc_index % 256}.{i % 256}.0/24",
+        "IsDefault": False,
+        "EnableBroadcast": False,
+        "Zone": zones[i % len(zones)],
+        "RouteTableId": f"rtb-{vpc_index:08x}",
+        "CreatedTime": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 10:20:30",
+        "AvailableIpAddressCount": 253 - i % 200,
+        "Ipv6CidrBlock": "",
+        "NetworkAclId": "",
+        "IsRemoteVpcSnat": False,
+        "TotalIpAddressCount": 253,
+        "TagSet": _tags(rng, heterogeneity),
+        "CdcId": "",
+        "IsCdcSubnet": 0,
+        "LocalZone": False,
+        "IsShare": False,
+    }
+    if rng.random() < heterogeneity:
+        subnet["NetworkAclId"] = f"acl-{rng.randrange(16 ** 8):08x}"
+    if rng.random() < heterogeneity / 4:
+        del subnet["CdcId"]
+    if nesting:
+        subnet["Extension"] = _nested(nesting, rng, heterogeneity)
+    return subnet
+
+def _response(set_name, records, regions):
+    statistics = {}
+    for record in records:
+        region = record.get("Region") or record["Zone"].rsplit("-", 1)[0]
+        statistics[region] = statistics.get(region, 0) + 1
+    return {
+        "Response": {
+            set_name: records,
+            "TotalCount": len(records),
+            "RegionStatistics": [{"TotalCount": count, "Region": region} for region, count in statistics.items()],
+            "RequestId": str(uuid.UUID(int=len(records))),
+        }
+    }
+
+def make_describe_vpcs(count, heterogeneity=0.0, nesting=0, regions=REGIONS[:1], seed=0):
+    """
+    生成包含 count 个VPC的 DescribeVpcs 响应
+    """
+    rng = random.Random(seed)
+    vpcs = [make_vpc(i, rng, regions[i % len(regions)], heterogeneity, nesting) for i in range(count)]
+    return _response("VpcSet", vpcs, regions)
+
+def make_describe_subnets(count, subnets_per_vpc=8, heterogeneity=0.0, nesting=0, regions=REGIONS[:1], seed=0):
+    """
+    生成包含 count 个子网的 DescribeSubnets 响应，每个VPC下有 subnets_per_vpc 个子网
+    """
+    rng = random.Random(seed)
+    subnets = []
+    for i in range(count):
+        vpc_index = i // subnets_per_vpc
+        region = regions[vpc_index % len(regions)]
+        subnets.append(make_subnet(i, rng, f"vpc-{vpc_index:08x}", vpc_index, region, heterogeneity, nesting))
+    return _response("SubnetSet", subnets, regions)
+
+def dumps(payload):
+    """
+    按 API 返回的格式编码为UTF-8字节
+    """
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
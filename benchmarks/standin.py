@@ -0,0 +1,105 @@
+"""
+本地替身 API 服务：按 Offset/Limit 分页返回合成的 DescribeVpcs / DescribeSubnets 响应
+
+只实现客户端用到的 HTTP/1.1 子集（Content-Length 请求体、keep-alive），不校验签名
+"""
+import asyncio
+import json
+import time
+
+from benchmarks.generators import REGIONS, dumps, make_describe_subnets, make_describe_vpcs
+
+class StandInServer:
+    """
+    用法：
+        async with StandInServer(vpcs=1000, latency=0.02) as server:
+            client = TencentCloudClient(..., endpoint=server.endpoint)
+    latency 为每个请求的模拟处理时间（秒），可以是 {地域: 秒} 的字典
+    """
+    def __init__(self, vpcs=1000, subnets=4000, regions=REGIONS, latency=0.0, seed=0):
+        self.records = {}
+        for region in regions:
+            self.records[(region, "DescribeVpcs")] = make_describe_vpcs(
+                vpcs, regions=(region,), seed=seed)["Response"]["VpcSet"]
+            self.records[(region, "DescribeSubnets")] = make_describe_subnets(
+                subnets, regions=(region,), seed=seed)["Response"]["SubnetSet"]
+        self.latency = latency
+        self.server = None
+        self.port = None
+        # 统计信息：连接数、请求数、每个请求的 (地域, 接口, 到达时间)
+        self.connections = 0
+        self.requests = []
+        self._handlers = {}
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        # 关闭仍然打开的连接并等待处理结束，避免事件循环关闭时取消它们
+        for writer in self._handlers.values():
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def respond(self, region, action, params):
+        set_name = {"DescribeVpcs": "VpcSet", "DescribeSubnets": "SubnetSet"}.get(action)
+        records = self.records.get((region, action))
+        if set_name is None or records is None:
+            return {"Response": {"Error": {"Code": "InvalidParameter", "Message": f"{region} {action}"},
+                                 "RequestId": "stand-in"}}
+        offset = int(params.get("Offset") or 0)
+        limit = int(params.get("Limit") or 20)
+        return {"Response": {
+            set_name: records[offset:offset + limit],
+            "TotalCount": len(records),
+            "RegionStatistics": [{"TotalCount": len(records), "Region": region}],
+            "RequestId": f"stand-in-{offset}",
+        }}
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        task = asyncio.current_task()
+        self._handlers[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                region = headers.get("x-tc-region", "")
+                action = headers.get("x-tc-action", "")
+                self.requests.append((region, action, time.perf_counter()))
+                latency = self.latency.get(region, 0.0) if isinstance(self.latency, dict) else self.latency
+                if latency:
+                    await asyncio.sleep(latency)
+                data = dumps(self.respond(region, action, json.loads(body or b"{}")))
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n" % len(data) + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.pop(task, None)
+            writer.close()
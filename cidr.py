@@ -0,0 +1,278 @@
+import bisect
+import heapq
+import ipaddress
+import socket
+import sys
+from collections import namedtuple
+
+import jsonbackend
+
+# 一个网段：start/end 为闭区间的整数地址；kind 为 vpc、assistant 或 subnet
+CidrBlock = namedtuple('CidrBlock', 'start end family cidr kind vpc_id subnet_id region')
+
+def cidr_range(cidr):
+    """
+    把 CIDR 转换为 (起始地址, 结束地址, 地址族)，IPv4 走快速路径
+    """
+    address, _, prefix = cidr.partition('/')
+    try:
+        start = int.from_bytes(socket.inet_aton(address), 'big')
+        if address.count('.') != 3:
+            raise OSError
+        prefix = int(prefix) if prefix else 32
+        if not 0 <= prefix <= 32:
+            raise ValueError(f"无效的前缀长度: {cidr}")
+        size = 1 << (32 - prefix)
+        start &= ~(size - 1) & 0xFFFFFFFF
+        return start, start + size - 1, 4
+    except OSError:
+        network = ipaddress.ip_network(cidr, strict=False)
+        return int(network.network_address), int(network.broadcast_address), network.version
+
+def _block(cidr, kind, vpc_id, subnet_id=None, region=None):
+    start, end, family = cidr_range(cidr)
+    return CidrBlock(start, end, family, cidr, kind, vpc_id, subnet_id, region)
+
+def collect_blocks(vpcs=None, subnets=None):
+    """
+    从 DescribeVpcs / DescribeSubnets 响应中收集所有网段
+    包括 VPC 的 CidrBlock、AssistantCidrSet 中的辅助网段和子网的 CidrBlock
+    """
+    blocks = []
+    if vpcs is not None:
+        for vpc in vpcs.get("Response", vpcs).get("VpcSet") or ():
+            region = vpc.get("Region")
+            if vpc.get("CidrBlock"):
+                blocks.append(_block(vpc["CidrBlock"], "vpc", vpc.get("VpcId"), region=region))
+            for assistant in vpc.get("AssistantCidrSet") or ():
+                if assistant.get("CidrBlock"):
+                    blocks.append(_block(assistant["CidrBlock"], "assistant",
+                                         assistant.get("VpcId") or vpc.get("VpcId"),
+                                         region=assistant.get("Region") or region))
+    if subnets is not None:
+        for subnet in subnets.get("Response", subnets).get("SubnetSet") or ():
+            if subnet.get("CidrBlock"):
+                zone = subnet.get("Zone") or ""
+                blocks.append(_block(subnet["CidrBlock"], "subnet", subnet.get("VpcId"),
+                                     subnet.get("SubnetId"), zone.rsplit("-", 1)[0] or None))
+    return blocks
+
+def find_overlaps(blocks, exclude_same_vpc=True, same_region_only=False):
+    """
+    找出所有相互重叠的网段对，按起始地址排序后扫描，复杂度 O(n log n + 重叠对数)
+    exclude_same_vpc 为真时忽略同一VPC内部的重叠（例如子网必然落在所属VPC网段内）
+    same_region_only 为真时只比较同一地域内的网段
+    """
+    ordered = sorted(blocks, key=lambda block: (block.family, block.start, -block.end))
+    overlaps = []
+    # 仍可能与后续网段重叠的网段，按结束地址排成最小堆
+    active = []
+    family = None
+    for index, block in enumerate(ordered):
+        if block.family != family:
+            active = []
+            family = block.family
+        while active and active[0][0] < block.start:
+            heapq.heappop(active)
+        for _, _, other in active:
+            if exclude_same_vpc and other.vpc_id == block.vpc_id:
+                continue
+            if same_region_only and other.region != block.region:
+                continue
+            overlaps.append((other, block))
+        heapq.heappush(active, (block.end, index, block))
+    return overlaps
+
+def find_conflicts(cidr, blocks):
+    """
+    返回与给定 CIDR 重叠的所有网段，用于创建前检查
+    """
+    start, end, family = cidr_range(cidr)
+    return [block for block in blocks
+            if block.family == family and block.start <= end and start <= block.end]
+
+def format_cidr(start, prefix, family=4):
+    """
+    把整数起始地址和前缀长度格式化为 CIDR 字符串
+    """
+    if family == 4:
+        return f"{socket.inet_ntoa(start.to_bytes(4, 'big'))}/{prefix}"
+    return f"{ipaddress.IPv6Address(start)}/{prefix}"
+
+# 空闲区间按组汇总最大对齐块时每组的区间数；reserve 使某组超过两倍时把它一分为二
+_GROUP_SIZE = 64
+
+def _max_order(start, end):
+    """
+    闭区间 [start, end] 内能放下的最大对齐块的阶（块大小为 2**阶）
+    长度不小于 2**k 的区间一定能放下一个 2**(k-1) 的对齐块，所以只需检查两个候选
+    """
+    order = (end - start + 1).bit_length() - 1
+    size = 1 << order
+    if ((start + size - 1) & -size) + size - 1 <= end:
+        return order
+    return order - 1
+
+class SubnetPlanner:
+    """
+    VPC 地址空间的空闲网段索引：已用网段排序合并后，按地址顺序把空闲区间分组保存，
+    并为每个区间记录能容纳的最大对齐块，查询时跳过放不下所需网段的区间
+    各组独立存放，reserve 只更新被拆分区间所在的组
+    """
+    def __init__(self, vpc_cidr, used_cidrs=()):
+        self.vpc_cidr = vpc_cidr
+        self.start, self.end, self.family = cidr_range(vpc_cidr)
+        self.bits = 32 if self.family == 4 else 128
+        self.prefix = self.bits - (self.end - self.start + 1).bit_length() + 1
+        used = []
+        for cidr in used_cidrs:
+            start, end, family = cidr_range(cidr)
+            if family == self.family and start <= self.end and self.start <= end:
+                used.append((max(start, self.start), min(end, self.end)))
+        used.sort()
+        # 空闲区间，闭区间 [starts[i], ends[i]]，按地址递增
+        starts = []
+        ends = []
+        cursor = self.start
+        for start, end in used:
+            if start > cursor:
+                starts.append(cursor)
+                ends.append(start - 1)
+            cursor = max(cursor, end + 1)
+        if cursor <= self.end:
+            starts.append(cursor)
+            ends.append(self.end)
+        # 每组为 (starts, ends, orders)，orders 为每个空闲区间能容纳的最大对齐块（阶）
+        # 各组的最大阶用于整组跳过容纳不下所需块的区间，碎片很多时也只需扫描少量区间
+        self._groups = []
+        for i in range(0, len(starts), _GROUP_SIZE):
+            group_starts, group_ends = starts[i:i + _GROUP_SIZE], ends[i:i + _GROUP_SIZE]
+            self._groups.append((group_starts, group_ends, list(map(_max_order, group_starts, group_ends))))
+        self._group_firsts = [group[0][0] for group in self._groups]
+        self._group_orders = [max(group[2]) for group in self._groups]
+
+    @property
+    def starts(self):
+        return [start for group in self._groups for start in group[0]]
+
+    @property
+    def ends(self):
+        return [end for group in self._groups for end in group[1]]
+
+    def _locate(self, start):
+        """
+        返回起点不大于 start 的最后一个空闲区间 (组号, 组内序号)，没有时返回 None
+        """
+        group = bisect.bisect_right(self._group_firsts, start) - 1
+        if group < 0:
+            return None
+        return group, bisect.bisect_right(self._groups[group][0], start) - 1
+
+    @classmethod
+    def from_responses(cls, vpcs, subnets, vpc_id, cidr=None):
+        """
+        由 DescribeVpcs / DescribeSubnets 响应为指定VPC建立索引
+        cidr 为 None 时使用VPC的主网段，也可以指定它的某个辅助网段
+        """
+        for vpc in vpcs.get("Response", vpcs).get("VpcSet") or ():
+            if vpc.get("VpcId") == vpc_id:
+                break
+        else:
+            raise KeyError(f"响应中没有VPC: {vpc_id}")
+        used = [subnet["CidrBlock"] for subnet in subnets.get("Response", subnets).get("SubnetSet") or ()
+                if subnet.get("VpcId") == vpc_id and subnet.get("CidrBlock")]
+        return cls(cidr or vpc["CidrBlock"], used)
+
+    def free_blocks(self, prefix, count=1):
+        """
+        返回地址最小的至多 count 个空闲网段，前缀长度为 prefix
+        """
+        if not self.prefix <= prefix <= self.bits:
+            raise ValueError(f"前缀长度 {prefix} 超出 {self.vpc_cidr} 的范围")
+        order = self.bits - prefix
+        size = 1 << order
+        blocks = []
+        for group, group_order in zip(self._groups, self._group_orders):
+            if group_order < order:
+                continue
+            starts, ends, orders = group
+            for index, interval_order in enumerate(orders):
+                if interval_order < order:
+                    continue
+                block = (starts[index] + size - 1) & -size
+                while block + size - 1 <= ends[index]:
+                    blocks.append(format_cidr(block, prefix, self.family))
+                    if len(blocks) >= count:
+                        return blocks
+                    block += size
+        return blocks
+
+    def is_free(self, cidr):
+        """
+        网段是否完全落在某个空闲区间内
+        """
+        start, end, family = cidr_range(cidr)
+        if family != self.family:
+            return False
+        found = self._locate(start)
+        return found is not None and end <= self._groups[found[0]][1][found[1]]
+
+    def reserve(self, cidr):
+        """
+        把一个空闲网段标记为已用，便于连续规划多个子网
+        """
+        start, end, _ = cidr_range(cidr)
+        if not self.is_free(cidr):
+            raise ValueError(f"网段 {cidr} 不是空闲的")
+        group, index = self._locate(start)
+        starts, ends, orders = self._groups[group]
+        free_start, free_end = starts[index], ends[index]
+        pieces = [(s, e) for s, e in ((free_start, start - 1), (end + 1, free_end)) if s <= e]
+        starts[index:index + 1] = [s for s, _ in pieces]
+        ends[index:index + 1] = [e for _, e in pieces]
+        orders[index:index + 1] = [_max_order(s, e) for s, e in pieces]
+        if not starts:
+            del self._groups[group], self._group_firsts[group], self._group_orders[group]
+            return
+        if len(starts) > 2 * _GROUP_SIZE:
+            tail = (starts[_GROUP_SIZE:], ends[_GROUP_SIZE:], orders[_GROUP_SIZE:])
+            del starts[_GROUP_SIZE:], ends[_GROUP_SIZE:], orders[_GROUP_SIZE:]
+            self._groups.insert(group + 1, tail)
+            self._group_firsts.insert(group + 1, tail[0][0])
+            self._group_orders.insert(group + 1, max(tail[2]))
+        self._group_firsts[group] = starts[0]
+        self._group_orders[group] = max(orders)
+
+    def free_addresses(self):
+        """
+        空闲地址总数
+        """
+        return sum(end - start + 1 for starts, ends, _ in self._groups for start, end in zip(starts, ends))
+
+def _describe(block):
+    owner = block.subnet_id or block.vpc_id
+    return f"{block.cidr} ({block.kind} {owner}, {block.region})"
+
+def main(argv=None):
+    """
+    python cidr.py DescribeVpcs响应.json [DescribeSubnets响应.json]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("用法: python cidr.py DescribeVpcs响应.json [DescribeSubnets响应.json]")
+        return 2
+    responses = []
+    for path in argv[:2]:
+        with open(path, 'rb') as f:
+            responses.append(jsonbackend.loads(f.read()))
+    vpcs = responses[0]
+    subnets = responses[1] if len(responses) > 1 else None
+    blocks = collect_blocks(vpcs, subnets)
+    overlaps = find_overlaps(blocks)
+    print(f"共 {len(blocks)} 个网段，{len(overlaps)} 对重叠")
+    for first, second in overlaps:
+        print(f"- {_describe(first)} 与 {_describe(second)} 重叠")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+import operator
+from array import array
+from collections import Counter
+from itertools import chain, compress, repeat
+
+# 列类型
+INT = "int"
+FLOAT = "float"
+BOOL = "bool"
+STR = "str"
+OBJECT = "object"
+
+_TYPECODES = {INT: 'q', FLOAT: 'd', BOOL: 'b'}
+# 掩码取反用的字节转换表
+_NOT = bytes([1]) + bytes(255)
+
+class Column:
+    """
+    一列数据：数值和布尔值存放在 array 中，字符串做字典编码，其余类型（列表、字典）保留为Python列表
+    比较和统计都通过 map/compress/Counter 在C层面完成，不逐条执行Python代码
+    """
+    __slots__ = ('name', 'kind', 'values', 'valid', 'dictionary', '_index')
+
+    def __init__(self, name, kind, values, valid=None, dictionary=None):
+        self.name = name
+        self.kind = kind
+        # 数值/布尔列为 array；字符串列为字典编码 array('i')，-1 表示缺失；对象列为 list
+        # 从快照文件载入的数值和编码列为指向内存映射的 memoryview，与 array 用法相同
+        self.values = values
+        # 数值/布尔列中每行是否有值（bytes，1 为有值），None 表示全部有值
+        self.valid = valid
+        self.dictionary = dictionary
+        self._index = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Column({self.name!r}, {self.kind}, {len(self)} rows)"
+
+    @classmethod
+    def from_values(cls, name, values):
+        """
+        根据值的类型选择最紧凑的存储方式
+        """
+        types = set(map(type, values))
+        has_null = type(None) in types
+        types.discard(type(None))
+        if types == {str}:
+            dictionary = list(dict.fromkeys(values))
+            if has_null:
+                dictionary.remove(None)
+            index = {value: code for code, value in enumerate(dictionary)}
+            index[None] = -1
+            column = cls(name, STR, array('i', map(index.__getitem__, values)), dictionary=dictionary)
+            column._index = index
+            return column
+
+        if types == {int}:
+            kind = INT
+        elif types and types <= {int, float}:
+            kind = FLOAT
+        elif types == {bool}:
+            kind = BOOL
+        else:
+            kind = None
+        if kind is not None:
+            valid = None
+            if has_null:
+                valid = bytes(map(operator.is_not, values, repeat(None)))
+                values = [0 if value is None else value for value in values]
+            try:
+                return cls(name, kind, array(_TYPECODES[kind], values), valid)
+            except OverflowError:
+                pass
+        return cls(name, OBJECT, list(values))
+
+    def code(self, value):
+        """
+        字符串列中某个值的编码，不存在时返回 None
+        """
+        if self._index is None:
+            self._index = {value: code for code, value in enumerate(self.dictionary)}
+            self._index[None] = -1
+        return self._index.get(value)
+
+    def __getitem__(self, row):
+        if self.kind == STR:
+            code = self.values[row]
+            return None if code < 0 else self.dictionary[code]
+        if self.valid is not None and not self.valid[row]:
+            return None
+        value = self.values[row]
+        return bool(value) if self.kind == BOOL else value
+
+    def __iter__(self):
+        if self.kind == STR:
+            lookup = self.dictionary + [None]
+            return map(lookup.__getitem__, self.values)
+        if self.kind == BOOL:
+            values = map(bool, self.values)
+        else:
+            values = iter(self.values)
+        if self.valid is None:
+            return values
+        return (value if valid else None for value, valid in zip(values, self.valid))
+
+    def _mask(self, op, value):
+        if self.kind == STR:
+            if op is operator.eq:
+                code = self.code(value)
+                if code is None:
+                    return bytes(len(self))
+                return bytes(map(op, self.values, repeat(code)))
+            # 字典中每个不同的值只比较一次，再按编码查表；缺失值编码为 -1，查到末尾的 0，
+            # 与数值列一样不满足任何比较
+            lookup = bytes(map(op, self.dictionary, repeat(value))) + b"\0"
+            return bytes(map(lookup.__getitem__, self.values))
+        mask = bytes(map(op, self.values, repeat(value)))
+        if self.valid is not None:
+            mask = mask_and(mask, self.valid)
+        return mask
+
+    def eq(self, value):
+        """
+        返回每行是否等于 value 的掩码（bytes）
+        """
+        return self._mask(operator.eq, value)
+
+    def ne(self, value):
+        return self._mask(operator.ne, value)
+
+    def lt(self, value):
+        return self._mask(operator.lt, value)
+
+    def le(self, value):
+        return self._mask(operator.le, value)
+
+    def gt(self, value):
+        return self._mask(operator.gt, value)
+
+    def ge(self, value):
+        return self._mask(operator.ge, value)
+
+    def isin(self, values):
+        """
+        返回每行是否属于 values 的掩码
+        """
+        if self.kind == STR:
+            codes = {self.code(value) for value in values} - {None}
+            return bytes(map(codes.__contains__, self.values))
+        return bytes(map(set(values).__contains__, iter(self)))
+
+    def isnull(self):
+        if self.kind == STR:
+            return bytes(map(operator.lt, self.values, repeat(0)))
+        if self.valid is not None:
+            return mask_not(self.valid)
+        if self.kind == OBJECT:
+            return bytes(map(operator.is_, self.values, repeat(None)))
+        return bytes(len(self))
+
+    def take(self, rows):
+        """
+        按行号取出若干行组成新列
+        """
+        rows = list(rows)
+        if not rows:
+            gather = lambda values: ()
+        elif len(rows) == 1:
+            gather = lambda values: (values[rows[0]],)
+        else:
+            gather = operator.itemgetter(*rows)
+        if self.kind == OBJECT:
+            return Column(self.name, OBJECT, list(gather(self.values)))
+        values = array(_typecode(self.values), gather(self.values))
+        valid = bytes(gather(self.valid)) if self.valid is not None else None
+        column = Column(self.name, self.kind, values, valid, self.dictionary)
+        column._index = self._index
+        return column
+
+    def value_counts(self):
+        """
+        统计每个值出现的次数，字符串列直接对编码计数
+        """
+        if self.kind == STR:
+            counts = Counter(self.values)
+            return {None if code < 0 else self.dictionary[code]: count for code, count in counts.most_common()}
+        return dict(Counter(iter(self)).most_common())
+
+    def to_numpy(self):
+        """
+        转换为 NumPy 数组（需要安装 numpy），数值列与 array 共享内存
+        字符串列返回 (编码数组, 字典)
+        """
+        import numpy
+        if self.kind == OBJECT:
+            return numpy.array(self.values, dtype=object)
+        values = numpy.frombuffer(self.values, dtype=_typecode(self.values))
+        if self.kind == STR:
+            return values, self.dictionary
+        if self.kind == BOOL:
+            values = values.astype(bool)
+        if self.valid is not None:
+            return numpy.ma.masked_array(values, mask=numpy.frombuffer(self.valid, dtype=numpy.uint8) == 0)
+        return values
+
+def _typecode(values):
+    """
+    array 或 memoryview 的元素类型码
+    """
+    return values.typecode if isinstance(values, array) else values.format
+
+def mask_and(*masks):
+    """
+    逐行求多个掩码的与；掩码每字节为 0 或 1，转成大整数后一次按位运算
+    """
+    result = int.from_bytes(masks[0], 'big')
+    for mask in masks[1:]:
+        result &= int.from_bytes(mask, 'big')
+    return result.to_bytes(len(masks[0]), 'big')
+
+def mask_or(*masks):
+    """
+    逐行求多个掩码的或
+    """
+    result = int.from_bytes(masks[0], 'big')
+    for mask in masks[1:]:
+        result |= int.from_bytes(mask, 'big')
+    return result.to_bytes(len(masks[0]), 'big')
+
+def mask_not(mask):
+    """
+    逐行取反
+    """
+    return mask.translate(_NOT)
+
+def _group_codes(column):
+    """
+    字符串列按编码把行号分组，返回 {值: [行号, ...]}
+    行号按编码稳定排序后每组是一段连续的切片，只对不同的值执行Python代码
+    """
+    codes = column.values.tolist()
+    order = sorted(range(len(codes)), key=codes.__getitem__)
+    counts = Counter(codes)
+    starts = {}
+    offset = 0
+    for code in sorted(counts):
+        starts[code] = offset
+        offset += counts[code]
+    dictionary = column.dictionary
+    return {None if code < 0 else dictionary[code]: order[starts[code]:starts[code] + counts[code]]
+            for code in dict.fromkeys(codes)}
+
+class Table:
+    """
+    列式存储的记录表，例如由 Response.VpcSet[] 转换而来
+    """
+    def __init__(self, columns, length):
+        self.columns = columns
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __repr__(self):
+        return f"Table({self.length} rows, columns={list(self.columns)})"
+
+    @classmethod
+    def from_records(cls, records, columns=None):
+        """
+        把同构的字典列表转换为列式表；columns 为 None 时使用所有记录中出现过的键
+        """
+        if columns is None:
+            columns = list(dict.fromkeys(chain.from_iterable(records)))
+        built = {}
+        for name in columns:
+            built[name] = Column.from_values(name, list(map(dict.get, records, repeat(name))))
+        return cls(built, len(records))
+
+    def filter(self, mask):
+        """
+        返回掩码为真的行组成的新表
+        """
+        rows = list(compress(range(self.length), mask))
+        return Table({name: column.take(rows) for name, column in self.columns.items()}, len(rows))
+
+    def where(self, **conditions):
+        """
+        按列等值过滤，例如 table.where(Region="ap-jakarta")
+        """
+        if not conditions:
+            return self
+        return self.filter(mask_and(*(self.columns[name].eq(value) for name, value in conditions.items())))
+
+    def count_by(self, name):
+        """
+        按某列分组计数，例如 table.count_by("Region")
+        """
+        return self.columns[name].value_counts()
+
+    def group_by(self, name):
+        """
+        按某列分组，返回 {值: 子表}，按值首次出现的顺序排列
+        """
+        column = self.columns[name]
+        if column.kind == STR:
+            groups = _group_codes(column)
+        else:
+            groups = {}
+            for row, value in enumerate(column):
+                groups.setdefault(value, []).append(row)
+        return {value: Table({n: c.take(rows) for n, c in self.columns.items()}, len(rows))
+                for value, rows in groups.items()}
+
+    def row(self, index):
+        return {name: column[index] for name, column in self.columns.items()}
+
+    def to_records(self):
+        """
+        转换回字典列表
+        """
+        names = list(self.columns)
+        return [dict(zip(names, values)) for values in zip(*self.columns.values())]
+
+def find_path(data, path):
+    """
+    按 describe_json_structure 输出的路径语法取值，例如 "Response.VpcSet[]"
+    路径以 [] 结尾时返回该列表
+    """
+    path = path[:-2] if path.endswith("[]") else path
+    for key in filter(None, path.split(".")):
+        data = data[key]
+    return data
+
+def extract_table(data, path="Response.VpcSet[]", columns=None):
+    """
+    从解析后的响应中把某个同构记录列表转换为列式表
+    """
+    return Table.from_records(find_path(data, path), columns)
@@ -0,0 +1,150 @@
+from functools import lru_cache
+
+from columnar import Column, Table, find_path
+
+SEPARATOR = "."
+
+def flatten_record(record, sep=SEPARATOR):
+    """
+    通用的展开方式：嵌套字典展开为 "a.b" 形式的键，其余值（包括列表）原样保留
+    """
+    row = {}
+    stack = [(record, "")]
+    while stack:
+        data, prefix = stack.pop()
+        for key, value in data.items():
+            name = f"{prefix}{sep}{key}" if prefix else key
+            if value.__class__ is dict and value:
+                stack.append((value, name))
+            else:
+                row[name] = value
+    return row
+
+def _record_node(tree, path):
+    """
+    路径 "Response.VpcSet[]" 指向的记录节点：沿字典键向下，最后进入列表中的 dict 元素
+    """
+    is_list = path.endswith("[]")
+    keys = [key for key in (path[:-2] if is_list else path).split(".") if key]
+    node = tree.children.get((None, "dict")) if tree.type is None and tree.children else tree
+    for index, key in enumerate(keys):
+        if node is None or not node.children:
+            return None
+        node = node.children.get((key, "list" if is_list and index == len(keys) - 1 else "dict"))
+    if node is not None and is_list:
+        node = (node.children or {}).get((None, "dict"))
+    return node
+
+def _layout(node, prefix, sep):
+    """
+    返回字典节点的展开方式：((键, 输出列名, 子布局), ...)，可以作为缓存的键
+    子布局为 None 表示样本中从未是字典，为 False 表示有时是字典有时不是；
+    两种情况都按原样输出，遇到非空字典时交给通用实现（样本之外的记录可能在这里出现字典）
+    """
+    types = {}
+    for (key, type_name), child in (node.children or {}).items():
+        types.setdefault(key, {})[type_name] = child
+    fields = []
+    for key, children in types.items():
+        name = f"{prefix}{sep}{key}" if prefix else key
+        child = children.get("dict")
+        if child is None:
+            fields.append((key, name, None))
+        elif len(children) == 1 and child.children:
+            fields.append((key, name, _layout(child, name, sep)))
+        else:
+            fields.append((key, name, False))
+    return tuple(fields)
+
+def _generate(layout, rows=False):
+    """
+    生成展开函数的源代码：直接按键取值，检查各层键的数量和叶子值不是非空字典，不符时交给通用实现
+    rows 为真时返回按列顺序排列的元组
+    """
+    lines = ["def flatten(record):", "    try:", f"        if len(record) != {len(layout)}:",
+             "            return _fallback(record)"]
+    items = []
+    counter = [0]
+
+    def emit(fields, source):
+        for key, name, sub in fields:
+            counter[0] += 1
+            var = f"v{counter[0]}"
+            lines.append(f"        {var} = {source}[{key!r}]")
+            if not sub:
+                lines.append(f"        if {var}.__class__ is dict and {var}:")
+                lines.append("            return _fallback(record)")
+                items.append(var if rows else f"{name!r}: {var}")
+                continue
+            lines.append(f"        if {var}.__class__ is not dict or len({var}) != {len(sub)}:")
+            lines.append("            return _fallback(record)")
+            emit(sub, var)
+
+    emit(layout, "record")
+    if rows:
+        lines.append("        return (" + ", ".join(items) + ",)")
+    else:
+        lines.append("        return {" + ", ".join(items) + "}")
+    lines.append("    except KeyError:")
+    lines.append("        return _fallback(record)")
+    return "\n".join(lines) + "\n"
+
+def _columns(layout):
+    columns = []
+    for _, name, sub in layout:
+        if sub:
+            columns.extend(_columns(sub))
+        else:
+            columns.append(name)
+    return columns
+
+@lru_cache(maxsize=256)
+def _compile(layout, sep, rows):
+    """
+    按展开方式生成并编译展开函数，缓存最近使用的 256 个
+    """
+    columns = _columns(layout)
+    if rows:
+        fallback = lambda record: tuple(map(flatten_record(record, sep).get, columns))
+    else:
+        fallback = lambda record: flatten_record(record, sep)
+    source = _generate(layout, rows)
+    namespace = {"_fallback": fallback}
+    exec(compile(source, "<flatten>", "exec"), namespace)
+    flattener = namespace["flatten"]
+    flattener.source = source
+    flattener.columns = columns
+    return flattener
+
+def compile_flattener(tree, path="Response.VpcSet[]", sep=SEPARATOR, rows=False):
+    """
+    根据结构树中 path 处记录的结构生成专用的展开函数，按展开方式缓存（键的顺序不同时列的顺序也不同）
+    生成的函数直接按键取值，核对各层字典的键数，键不符（缺少可选键、多出新键）或叶子位置出现非空字典
+    （结构树只来自部分记录时可能发生）时退回 flatten_record，结果与通用实现一致
+    rows 为真时返回元组，列名见函数的 columns 属性；退回通用实现时不在 columns 中的键被丢弃
+    """
+    node = _record_node(tree, path)
+    if node is None or not node.children:
+        raise KeyError(f"结构树中没有记录路径: {path}")
+    return _compile(_layout(node, "", sep), sep, rows)
+
+def flatten_records(data, path="Response.VpcSet[]", tree=None, sep=SEPARATOR):
+    """
+    展开响应中 path 处的全部记录；提供结构树时使用生成的专用函数
+    """
+    records = find_path(data, path)
+    if tree is None:
+        return [flatten_record(record, sep) for record in records]
+    return list(map(compile_flattener(tree, path, sep), records))
+
+def flatten_table(data, path="Response.VpcSet[]", tree=None, sep=SEPARATOR):
+    """
+    展开记录后转换为列式表（columnar.Table），嵌套字段成为 "a.b" 列
+    """
+    if tree is None:
+        return Table.from_records(flatten_records(data, path, None, sep))
+    flattener = compile_flattener(tree, path, sep, rows=True)
+    rows = list(map(flattener, find_path(data, path)))
+    columns = zip(*rows) if rows else [()] * len(flattener.columns)
+    return Table({name: Column.from_values(name, list(values)) for name, values in zip(flattener.columns, columns)},
+                 len(rows))
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from snapshotstore import SnapshotFile
+from tcclient import RECORD_SETS, RateLimiter, TencentCloudClient
+
+ACTIONS = ("DescribeVpcs", "DescribeSubnets")
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def latency_summary(latencies):
+    """
+    把一组耗时（秒）汇总为毫秒统计
+    """
+    if not latencies:
+        return {"Requests": 0}
+    ordered = sorted(latencies)
+    return {
+        "Requests": len(ordered),
+        "MinMs": round(ordered[0] * 1e3, 3),
+        "P50Ms": round(_percentile(ordered, 0.5) * 1e3, 3),
+        "P95Ms": round(_percentile(ordered, 0.95) * 1e3, 3),
+        "MaxMs": round(ordered[-1] * 1e3, 3),
+    }
+
+async def inventory_region(secret_id, secret_key, region, endpoint=None, rate=10, burst=None,
+                           concurrency=4, limit=100, token=""):
+    """
+    查询一个地域的全部VPC和子网，返回该地域的结果和耗时统计
+    同一地域的所有请求共用一个令牌桶，不超过每秒 rate 个
+    """
+    limiter = RateLimiter(rate, burst or concurrency)
+    result = {"Region": region}
+    start = time.perf_counter()
+    async with TencentCloudClient(secret_id, secret_key, region, endpoint=endpoint, token=token,
+                                  max_connections=concurrency, rate_limiter=limiter) as client:
+        try:
+            for action in ACTIONS:
+                result[action] = await client.describe_all(action, limit=limit, concurrency=concurrency)
+        except Exception as e:
+            result["Error"] = f"{type(e).__name__}: {e}"
+        result["ElapsedMs"] = round((time.perf_counter() - start) * 1e3, 3)
+        result["Latency"] = {action: latency_summary([seconds for name, seconds in client.latencies
+                                                      if name == action])
+                             for action in ACTIONS}
+    return result
+
+def merge_regions(results):
+    """
+    把各地域的结果合并为一个快照
+    每个接口的 Response 中记录按地域顺序拼接，RegionStatistics 保留各地域自己的统计
+    """
+    snapshot = {"Regions": {}}
+    for action in ACTIONS:
+        snapshot[action] = {"Response": {RECORD_SETS[action]: [], "TotalCount": 0, "RegionStatistics": []}}
+    for result in results:
+        region = result["Region"]
+        summary = {"ElapsedMs": result["ElapsedMs"], "Latency": result["Latency"]}
+        if "Error" in result:
+            summary["Error"] = result["Error"]
+        for action in ACTIONS:
+            response = result.get(action)
+            if response is None:
+                continue
+            merged = snapshot[action]["Response"]
+            records = response.get(RECORD_SETS[action]) or []
+            merged[RECORD_SETS[action]].extend(records)
+            merged["TotalCount"] += len(records)
+            statistics = response.get("RegionStatistics") or [{"TotalCount": len(records), "Region": region}]
+            merged["RegionStatistics"].extend(statistics)
+            summary[RECORD_SETS[action] + "Count"] = len(records)
+        snapshot["Regions"][region] = summary
+    return snapshot
+
+async def collect_inventory(secret_id, secret_key, regions, endpoint=None, rate=10, burst=None,
+                            concurrency=4, limit=100, token=""):
+    """
+    并行查询多个地域并合并为一个快照，某个地域出错不影响其他地域
+    """
+    results = await asyncio.gather(*(
+        inventory_region(secret_id, secret_key, region, endpoint, rate, burst, concurrency, limit, token)
+        for region in regions))
+    return merge_regions(results)
+
+def print_latency_report(snapshot, out=None):
+    out = out or sys.stdout
+    print(f"{'地域':<18}{'耗时ms':>10}{'请求数':>8}{'P50ms':>10}{'P95ms':>10}{'最大ms':>10}  VPC/子网", file=out)
+    regions = sorted(snapshot["Regions"].items(), key=lambda item: -item[1]["ElapsedMs"])
+    for region, summary in regions:
+        latencies = [summary["Latency"][action] for action in ACTIONS]
+        requests = sum(latency["Requests"] for latency in latencies)
+        p50 = max((latency.get("P50Ms", 0) for latency in latencies), default=0)
+        p95 = max((latency.get("P95Ms", 0) for latency in latencies), default=0)
+        slowest = max((latency.get("MaxMs", 0) for latency in latencies), default=0)
+        counts = f"{summary.get('VpcSetCount', '-')}/{summary.get('SubnetSetCount', '-')}"
+        print(f"{region:<18}{summary['ElapsedMs']:>10.1f}{requests:>8}{p50:>10.1f}{p95:>10.1f}{slowest:>10.1f}  {counts}", file=out)
+        if "Error" in summary:
+            print(f"  错误: {summary['Error']}", file=out)
+
+def main(argv=None):
+    """
+    python inventory.py SecretId SecretKey ap-jakarta,ap-guangzhou [-o snapshot.json]
+    """
+    parser = argparse.ArgumentParser(description="跨地域并行查询VPC和子网并合并为一个快照")
+    parser.add_argument("secret_id")
+    parser.add_argument("secret_key")
+    parser.add_argument("regions", help="逗号分隔的地域列表")
+    parser.add_argument("-o", "--output", help="快照保存路径，默认输出到标准输出")
+    parser.add_argument("--store", help="同时把快照追加到列式快照文件（见 snapshotstore.py）")
+    parser.add_argument("--rate", type=float, default=10, help="每个地域每秒最多请求数")
+    parser.add_argument("--burst", type=int, help="每个地域允许的突发请求数，默认等于并发数")
+    parser.add_argument("--concurrency", type=int, default=4, help="每个地域同时进行的请求数")
+    parser.add_argument("--limit", type=int, default=100, help="每页记录数")
+    parser.add_argument("--endpoint", help="覆盖API地址，例如本地替身服务")
+    parser.add_argument("--token", default="")
+    args = parser.parse_args(argv)
+
+    regions = [region.strip() for region in args.regions.split(",") if region.strip()]
+    snapshot = asyncio.run(collect_inventory(args.secret_id, args.secret_key, regions, args.endpoint,
+                                             args.rate, args.burst, args.concurrency, args.limit, args.token))
+    if args.store:
+        with SnapshotFile(args.store) as store:
+            store.append(snapshot, label=",".join(regions))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        print_latency_report(snapshot)
+    else:
+        # 快照写到标准输出时，耗时报告写到标准错误，便于管道处理
+        json.dump(snapshot, sys.stdout, ensure_ascii=False)
+        print()
+        print_latency_report(snapshot, sys.stderr)
+    return 1 if any("Error" in summary for summary in snapshot["Regions"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
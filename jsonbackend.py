@@ -0,0 +1,97 @@
+import json
+import os
+
+def _load_orjson():
+    import orjson
+    # orjson 可以直接解析 bytes、bytearray、memoryview，不需要先解码成 str
+    return orjson.loads
+
+def _load_simdjson():
+    import simdjson
+    parser = simdjson.Parser()
+
+    def loads(data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return parser.parse(data, recursive=True)
+    return loads
+
+def _load_ujson():
+    import ujson
+
+    def loads(data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return ujson.loads(data)
+    return loads
+
+def _load_stdlib():
+    def loads(data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+    return loads
+
+# 按优先级排列，都不可用时退回标准库 json
+_LOADERS = {
+    'orjson': _load_orjson,
+    'simdjson': _load_simdjson,
+    'ujson': _load_ujson,
+    'json': _load_stdlib,
+}
+
+# loads 可能抛出的解析错误：失败时总会交给标准库重新解析，因此只有非法JSON和非法UTF-8两种
+DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+
+_available = {}
+_backend = None
+
+def available_backends():
+    """
+    返回当前环境中可用的后端名称，按优先级排列
+    """
+    for name, loader in _LOADERS.items():
+        if name not in _available:
+            try:
+                _available[name] = loader()
+            except ImportError:
+                _available[name] = None
+    return [name for name in _LOADERS if _available[name] is not None]
+
+def set_backend(name=None):
+    """
+    指定解码后端，name 为 None 时自动选择优先级最高的可用后端
+    """
+    global _backend
+    backends = available_backends()
+    if name is None:
+        name = backends[0]
+    elif name not in backends:
+        raise ValueError(f"JSON后端不可用: {name}，可用后端: {', '.join(backends)}")
+    _backend = name
+    return name
+
+def get_backend():
+    """
+    返回当前使用的后端名称
+    首次调用时读取环境变量 ANYJSON_BACKEND，未设置则自动选择
+    """
+    if _backend is None:
+        set_backend(os.environ.get('ANYJSON_BACKEND') or None)
+    return _backend
+
+def loads(data, backend=None):
+    """
+    解析 str、bytes、bytearray 或 memoryview 形式的JSON
+    快速后端解析失败时（如 NaN、超大整数或非法输入）交给标准库重新解析，
+    保证结果和错误信息与 json.loads 一致
+    """
+    name = backend or get_backend()
+    if backend is not None and name not in available_backends():
+        raise ValueError(f"JSON后端不可用: {name}")
+    if name != 'json':
+        try:
+            return _available[name](data)
+        except ValueError:
+            pass
+    return _available['json'](data)
@@ -0,0 +1,197 @@
+import argparse
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import jsonbackend
+from anyjson import describe_json_tree, map_file, paused_gc, print_schema_summary, print_structure
+from jsonstream import describe_json_stream
+from limits import Limits
+from structure import StructureNode, summarize_schema
+
+# JSONL 文件按大约这么多字节切分成一个任务
+JSONL_CHUNK_BYTES = 8 * 1024 * 1024
+
+def _describe_document(data, merge_lists, tree, limits):
+    """
+    分析一个文档的原始内容；超过 limits.max_bytes 的文档不解码，只流式分析开头部分
+    """
+    if limits is not None and limits.max_bytes is not None and len(data) > limits.max_bytes:
+        with memoryview(data) as view:
+            describe_json_stream(io.BytesIO(view[:limits.max_bytes + 1]), merge_lists=merge_lists,
+                                 tree=tree, limits=limits)
+        return
+    describe_json_tree(jsonbackend.loads(data), merge_lists=merge_lists, tree=tree, limits=limits)
+
+def _describe_file(path, merge_lists, limits=None):
+    """
+    工作进程：分析单个JSON文件，返回 (结构树, 错误列表)
+    """
+    tree = StructureNode()
+    try:
+        with map_file(path) as mapped:
+            with memoryview(mapped or b"") as view:
+                _describe_document(view, merge_lists, tree, limits)
+    except (OSError, ValueError) as e:
+        return tree, [(path, str(e))]
+    return tree, []
+
+def _describe_jsonl_range(path, start, end, merge_lists, limits=None):
+    """
+    工作进程：分析JSONL文件中 [start, end) 字节范围内的每一行
+    """
+    tree = StructureNode()
+    errors = []
+    for location, line in iter_jsonl_lines(path, start, end):
+        try:
+            _describe_document(line, merge_lists, tree, limits)
+        except ValueError as e:
+            errors.append((location, str(e)))
+    return tree, errors
+
+def split_jsonl(path, chunk_bytes=JSONL_CHUNK_BYTES):
+    """
+    把JSONL文件按行边界切分成若干 (起点, 终点) 字节范围
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+def iter_jsonl_lines(path, start, end):
+    """
+    产生JSONL文件中 [start, end) 字节范围内的每个非空行，形如 ("路径@偏移", 行)
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            location = f"{path}@{offset}"
+            offset += len(line)
+            if line.strip():
+                yield location, line
+
+def iter_source_tasks(sources, file_worker, range_worker, args=(), chunk_bytes=JSONL_CHUNK_BYTES):
+    """
+    把目录、JSON文件和JSONL文件展开为 (函数, 参数) 任务，供 run_tasks 执行
+    JSON文件为 file_worker(路径, *args)，JSONL文件按 split_jsonl 切分后为 range_worker(路径, 起点, 终点, *args)
+    目录下递归查找 .json 和 .jsonl 文件；在工作进程中执行时两个函数都须定义在模块顶层
+    """
+    for source in sources:
+        if os.path.isdir(source):
+            paths = []
+            for root, _, files in os.walk(source):
+                paths.extend(os.path.join(root, name) for name in files
+                             if name.endswith(('.json', '.jsonl')))
+            yield from iter_source_tasks(sorted(paths), file_worker, range_worker, args, chunk_bytes)
+        elif source.endswith('.jsonl'):
+            for start, end in split_jsonl(source, chunk_bytes):
+                yield range_worker, (source, start, end, *args)
+        else:
+            yield file_worker, (source, *args)
+
+def _run_task(task):
+    func, args = task
+    return func(*args)
+
+def run_tasks(tasks, workers=None):
+    """
+    用进程池执行 (函数, 参数) 任务，按任务顺序产生结果；workers 为 1 时在当前进程中顺序执行
+    """
+    if workers == 1:
+        yield from map(_run_task, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_run_task, tasks, chunksize=8)
+
+def iter_tasks(sources, merge_lists=False, chunk_bytes=JSONL_CHUNK_BYTES, limits=None):
+    """
+    把目录、JSON文件和JSONL文件展开为结构分析任务；limits 作用于每个文档
+    """
+    return iter_source_tasks(sources, _describe_file, _describe_jsonl_range, (merge_lists, limits), chunk_bytes)
+
+def describe_batch(sources, workers=None, merge_lists=False, chunk_bytes=JSONL_CHUNK_BYTES, limits=None):
+    """
+    用进程池并行分析多个响应，合并为一棵结构树
+    返回 (结构树, 错误列表)，错误列表中为 (位置, 错误信息)
+    workers 为 1 时在当前进程中顺序执行
+    limits 为 limits.Limits 时每个文档分别受其限制，任何文档被截断时结构树根节点的 truncated 不为空
+    """
+    tree = StructureNode()
+    errors = []
+    for part, part_errors in run_tasks(iter_tasks(sources, merge_lists, chunk_bytes, limits), workers):
+        tree.merge(part)
+        errors.extend(part_errors)
+    return tree, errors
+
+def load_tree(path):
+    """
+    读取 save_tree 保存的结构树
+    """
+    with open(path, encoding='utf-8') as f:
+        return StructureNode.from_dict(json.load(f))
+
+def save_tree(tree, path):
+    """
+    保存结构树，供其他机器上的结果继续合并
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(tree.to_dict(), f, ensure_ascii=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量分析JSON响应并合并结构")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', help="并行分析目录、JSON文件或JSONL文件")
+    analyze.add_argument('sources', nargs='+', help="目录、.json 或 .jsonl 文件")
+    analyze.add_argument('-j', '--workers', type=int, default=None, help="工作进程数，默认为CPU核数")
+    analyze.add_argument('--merge-lists', action='store_true', help="合并列表中每个元素的结构")
+    analyze.add_argument('-o', '--output', help="把合并后的结构树保存为JSON")
+    analyze.add_argument('--max-nodes', type=int, help="每个文档最多检查的节点数")
+    analyze.add_argument('--max-depth', type=int, help="每个文档最多展开的嵌套层数")
+    analyze.add_argument('--max-list-items', type=int, help="合并列表结构时每个列表最多检查的元素数")
+    analyze.add_argument('--max-bytes', type=int, help="每个文档最多分析的字节数")
+    analyze.add_argument('--max-seconds', type=float, help="每个文档最长的分析时间")
+
+    merge = subparsers.add_parser('merge', help="合并多次分析保存的结构树")
+    merge.add_argument('parts', nargs='+', help="analyze -o 保存的结构树文件")
+    merge.add_argument('-o', '--output', help="把合并后的结构树保存为JSON")
+
+    args = parser.parse_args(argv)
+    if args.command == 'analyze':
+        limits = Limits(args.max_nodes, args.max_depth, args.max_list_items, args.max_bytes, args.max_seconds)
+        if not any(getattr(limits, name) is not None for name in Limits.__slots__):
+            limits = None
+        # 命令行进程（及其派生的工作进程）只做分析，可以放心暂停垃圾回收
+        with paused_gc():
+            tree, errors = describe_batch(args.sources, workers=args.workers, merge_lists=args.merge_lists,
+                                          limits=limits)
+        for location, message in errors:
+            print(f"JSON解析错误 {location}: {message}", file=sys.stderr)
+    else:
+        tree = StructureNode()
+        for part in args.parts:
+            tree.merge(load_tree(part))
+
+    print(f"共分析 {tree.count} 个JSON文档")
+    if tree.truncated:
+        print(f"部分文档达到分析上限（{tree.truncated}），结构不完整", file=sys.stderr)
+    print_structure(tree)
+    if getattr(args, 'merge_lists', False):
+        print_schema_summary(summarize_schema(tree))
+    if args.output:
+        save_tree(tree, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+import codecs
+import json
+import random
+import re
+from json.decoder import scanstring
+from json.scanner import NUMBER_RE
+
+from limits import MAX_BYTES, MAX_DEPTH, MAX_LIST_ITEMS, LimitedReader
+from structure import StructureNode, merge_truncated
+
+CHUNK_SIZE = 64 * 1024
+# 通过 send 传给 iter_json_events 的跳过指令
+SKIP = 1
+SKIP_REST = 2
+
+_WS_RE = re.compile(r'[ \t\n\r]*')
+_NUMBER_CHARS_RE = re.compile(r'[-+.0-9eE]*')
+# 跳过时一次匹配括号以外的文本和完整的字符串，停在括号或不完整的字符串处
+_SKIP_RUN_RE = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+# 字符串内容直到未转义的引号或缓冲区末尾，不会回溯
+_STRING_BODY_RE = re.compile(r'(?:[^"\\]+|\\.)*', re.S)
+_SCALAR_RE = re.compile(r'[^,:\]}\s]*')
+_CONSTANTS = {
+    'true': True,
+    'false': False,
+    'null': None,
+    'NaN': float('nan'),
+    'Infinity': float('inf'),
+    '-Infinity': float('-inf'),
+}
+
+class _Timeout(Exception):
+    """
+    读入输入时超过了 Budget 的截止时间
+    """
+
+class _Lexer:
+    """
+    分块读取输入并切分JSON词法单元，缓冲区只保留尚未消费的部分
+    budget 不为 None 时每次读入前检查截止时间，很长的单个值内部也能及时停止
+    """
+    def __init__(self, fp, chunk_size=CHUNK_SIZE, budget=None):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.budget = budget
+        self.decoder = None
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        读入下一块数据，返回是否读到了新内容
+        """
+        chunk = ""
+        # 未消费的部分是一个跨越分块的词法单元，至少读入同样多的数据，
+        # 让缓冲区成倍增长，很长的字符串也只需线性的复制和重新扫描
+        size = max(self.chunk_size, len(self.buf) - self.pos)
+        while not chunk:
+            if self.eof:
+                return False
+            if self.budget is not None and not self.budget.clock():
+                raise _Timeout()
+            raw = self.fp.read(size)
+            self.eof = not raw
+            if isinstance(raw, str):
+                chunk = raw
+                continue
+            # 多字节字符可能被截断在分块末尾，由增量解码器暂存
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+            chunk = self.decoder.decode(bytes(raw), final=self.eof)
+        if self.pos:
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+        else:
+            self.buf += chunk
+        return True
+
+    def error(self, msg):
+        raise json.JSONDecodeError(msg, self.buf, self.pos)
+
+    def _skip_string(self):
+        """
+        当前位置为左引号，跳到字符串结束之后
+        """
+        pos = self.pos + 1
+        while True:
+            pos = _STRING_BODY_RE.match(self.buf, pos).end()
+            if pos < len(self.buf) and self.buf[pos] == '"':
+                self.pos = pos + 1
+                return
+            # 字符串跨越分块边界（可能停在末尾的反斜杠前），从字符串开头起保留在缓冲区中，
+            # 读入更多后从已扫描处继续，不重新扫描
+            scanned = pos - self.pos
+            if not self.fill():
+                self.error("Unterminated string starting at")
+            pos = self.pos + scanned
+
+    def skip_container(self):
+        """
+        在已读入左括号之后，直接扫描原始文本直到匹配的右括号
+        不解码字符串、不构建值，也不检查容器内部的语法，只保证括号和字符串配对
+        """
+        depth = 1
+        while True:
+            pos = self.pos = _SKIP_RUN_RE.match(self.buf, self.pos).end()
+            if pos == len(self.buf):
+                if not self.fill():
+                    self.error("Unterminated container")
+                continue
+            if self.buf[pos] == '"':
+                # 字符串跨越分块边界
+                self._skip_string()
+                continue
+            self.pos = pos + 1
+            if self.buf[pos] in '[{':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def skip_value(self):
+        """
+        跳过下一个完整的值，规则同 skip_container
+        """
+        while True:
+            self.pos = _WS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                break
+        if self.pos >= len(self.buf):
+            self.error("Expecting value")
+        c = self.buf[self.pos]
+        if c in '{[':
+            self.pos += 1
+            self.skip_container()
+        elif c == '"':
+            self._skip_string()
+        else:
+            # 数字或常量可能被分块截断
+            while _SCALAR_RE.match(self.buf, self.pos).end() == len(self.buf):
+                if not self.fill():
+                    break
+            end = _SCALAR_RE.match(self.buf, self.pos).end()
+            if end == self.pos:
+                self.error("Expecting value")
+            self.pos = end
+
+    def next_token(self):
+        """
+        返回 (kind, value)，kind 为标点字符、'str'、'value' 或 'eof'
+        """
+        while True:
+            self.pos = _WS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                break
+        if self.pos >= len(self.buf):
+            return 'eof', None
+
+        buf = self.buf
+        pos = self.pos
+        c = buf[pos]
+        if c in '{}[]:,':
+            self.pos = pos + 1
+            return c, None
+        if c == '"':
+            while True:
+                try:
+                    value, self.pos = scanstring(self.buf, self.pos + 1)
+                    return 'str', value
+                except json.JSONDecodeError:
+                    # 字符串可能跨越分块边界，读入更多数据后重试
+                    if not self.fill():
+                        raise
+        if c == '-' or c.isdigit():
+            # 数字可能被分块截断，先读到数字字符之后再匹配
+            while _NUMBER_CHARS_RE.match(self.buf, self.pos).end() == len(self.buf):
+                if not self.fill():
+                    break
+            match = NUMBER_RE.match(self.buf, self.pos)
+            if match is not None:
+                integer, frac, exp = match.groups()
+                self.pos = match.end()
+                if frac or exp:
+                    return 'value', float(integer + (frac or '') + (exp or ''))
+                return 'value', int(integer)
+        for literal, value in _CONSTANTS.items():
+            if literal[0] != self.buf[self.pos]:
+                continue
+            while len(self.buf) - self.pos < len(literal) and self.fill():
+                pass
+            if self.buf.startswith(literal, self.pos):
+                self.pos += len(literal)
+                return 'value', value
+        self.error("Expecting value")
+
+def iter_json_events(fp, chunk_size=CHUNK_SIZE, budget=None):
+    """
+    从文件或字节流中增量解析JSON，逐个产生 (event, value) 事件
+    事件类型：start_map、map_key、end_map、start_array、end_array、value
+
+    调用方可以用 send 代替 next 取下一个事件，让解析器在原始文本上跳过一部分输入：
+    - 收到 start_map/start_array 后 send(SKIP)：跳过整个容器，不产生其内部事件和对应的结束事件
+    - 收到 map_key 后 send(SKIP)：跳过该键对应的值
+    - 收到 value/end_map/end_array 后 send(SKIP_REST)：跳过所在容器的剩余部分，直接产生它的结束事件
+    被跳过的部分不解码字符串、不做语法检查，只保证括号和字符串配对
+    budget 为 limits.Budget 时每次读入输入前检查其截止时间
+    """
+    lexer = _Lexer(fp, chunk_size, budget)
+    next_token = lexer.next_token
+    stack = []
+    kind, value = next_token()
+    while True:
+        # 此处期望一个值
+        skip_rest = False
+        if kind == '{':
+            if (yield 'start_map', None) == SKIP:
+                lexer.skip_container()
+            else:
+                kind, value = next_token()
+                if kind == '}':
+                    skip_rest = (yield 'end_map', None) == SKIP_REST
+                elif kind == 'str':
+                    stack.append('{')
+                    skip = yield 'map_key', value
+                    if next_token()[0] != ':':
+                        lexer.error("Expecting ':' delimiter")
+                    if skip != SKIP:
+                        kind, value = next_token()
+                        continue
+                    lexer.skip_value()
+                else:
+                    lexer.error("Expecting property name enclosed in double quotes")
+        elif kind == '[':
+            if (yield 'start_array', None) == SKIP:
+                lexer.skip_container()
+            else:
+                kind, value = next_token()
+                if kind == ']':
+                    skip_rest = (yield 'end_array', None) == SKIP_REST
+                else:
+                    stack.append('[')
+                    continue
+        elif kind in ('str', 'value'):
+            skip_rest = (yield 'value', value) == SKIP_REST
+        else:
+            lexer.error("Expecting value")
+
+        # 一个值结束，处理逗号或容器的闭合
+        while True:
+            if skip_rest and stack:
+                lexer.skip_container()
+                top = stack.pop()
+                skip_rest = (yield ('end_map' if top == '{' else 'end_array'), None) == SKIP_REST
+                continue
+            kind, value = next_token()
+            if not stack:
+                if kind != 'eof':
+                    lexer.error("Extra data")
+                return
+            top = stack[-1]
+            if kind == ',':
+                kind, value = next_token()
+                if top == '{':
+                    if kind != 'str':
+                        lexer.error("Expecting property name enclosed in double quotes")
+                    skip = yield 'map_key', value
+                    if next_token()[0] != ':':
+                        lexer.error("Expecting ':' delimiter")
+                    if skip == SKIP:
+                        lexer.skip_value()
+                        continue
+                    kind, value = next_token()
+                break
+            if top == '{' and kind == '}':
+                stack.pop()
+                skip_rest = (yield 'end_map', None) == SKIP_REST
+            elif top == '[' and kind == ']':
+                stack.pop()
+                skip_rest = (yield 'end_array', None) == SKIP_REST
+            else:
+                lexer.error("Expecting ',' delimiter")
+
+def _sample_slot(frame, sample_size, rng):
+    """
+    蓄水池抽样：决定列表帧中刚读到的元素是否进入样本，返回暂存其结构的节点，未选中时返回 None
+    列表长度事先未知，被替换出样本的元素结构随暂存节点一起丢弃，列表结束时才合并进结构树
+    """
+    index = frame[2] - 1
+    reservoir = frame[3]
+    if index < sample_size:
+        slot = len(reservoir)
+        reservoir.append(None)
+    else:
+        slot = rng.randrange(index + 1)
+        if slot >= sample_size:
+            return None
+    holder = StructureNode()
+    reservoir[slot] = (index, holder)
+    return holder
+
+def _merge_sample(node, reservoir):
+    """
+    按元素原有顺序把样本的结构合并到列表节点下
+    """
+    for _, holder in sorted(reservoir, key=lambda item: item[0]):
+        node.merge(holder)
+
+def describe_json_stream(fp, merge_lists=False, chunk_size=CHUNK_SIZE, tree=None, limits=None,
+                         sample_size=None, rng=None):
+    """
+    流式描述JSON数据的结构，结果与 describe_json_tree 相同，但不在内存中构建整个文档
+    merge_lists 为真时合并列表中每个元素的结构，sample_size 限制每个列表最多抽样的元素个数：
+    列表长度事先未知，用蓄水池抽样等概率选出元素，未选中的元素在原始文本上跳过
+    limits 为 limits.Limits 时按其中的上限提前结束，返回已分析部分的结构，根节点 truncated 标明触发的上限；
+    超过深度上限的容器直接在原始文本上跳过，读到 max_bytes 处截断的输入不视为语法错误
+    """
+    if tree is None:
+        tree = StructureNode()
+    if not merge_lists:
+        sample_size = None
+    elif sample_size is not None and rng is None:
+        rng = random
+    tree.count += 1
+    budget = reader = None
+    max_depth = max_items = None
+    if limits is not None:
+        budget = limits.budget()
+        max_depth = limits.max_depth
+        max_items = limits.max_list_items if merge_lists else None
+        if limits.max_bytes is not None:
+            fp = reader = LimitedReader(fp, limits.max_bytes)
+
+    events = iter_json_events(fp, chunk_size, budget)
+    # 每个打开的容器一帧：[容器节点, 下一个值的键, 列表元素个数]，抽样时列表帧另有 [(元素序号, 暂存节点), ...]
+    frames = []
+    directive = None
+    try:
+        while True:
+            event, value = events.send(directive)
+            directive = None
+            if event == 'map_key':
+                frames[-1][1] = value
+                continue
+            if event == 'end_map':
+                frames.pop()
+                continue
+            if event == 'end_array':
+                frame = frames.pop()
+                node, length = frame[0], frame[2]
+                node.lengths[length] = node.lengths.get(length, 0) + 1
+                if sample_size is not None:
+                    _merge_sample(node, frame[3])
+                continue
+
+            # 一个新值开始，确定它挂在哪个节点下
+            if not frames:
+                parent, key = tree, None
+            else:
+                frame = frames[-1]
+                parent, key = frame[0], frame[1]
+                if parent.type == "list":
+                    frame[2] += 1
+                    # 不合并时只检查第一个元素，假设列表是同构的
+                    skip = frame[2] > 1 and not merge_lists
+                    if not skip and max_items is not None and frame[2] > max_items:
+                        budget.truncate(MAX_LIST_ITEMS)
+                        skip = True
+                    if not skip and sample_size is not None:
+                        parent = _sample_slot(frame, sample_size, rng)
+                        skip = parent is None
+                    if skip:
+                        if event != 'value':
+                            directive = SKIP
+                        # 跳过的元素仍要读过，同样计入节点数和耗时
+                        if budget is not None and not budget.tick():
+                            break
+                        continue
+            if budget is not None and not budget.tick():
+                break
+
+            if event == 'start_map':
+                node = parent.child(key, "dict")
+                node.count += 1
+                if max_depth is not None and len(frames) >= max_depth:
+                    budget.truncate(MAX_DEPTH)
+                    directive = SKIP
+                else:
+                    frames.append([node, None, 0])
+            elif event == 'start_array':
+                node = parent.child(key, "list")
+                node.count += 1
+                if max_depth is not None and len(frames) >= max_depth:
+                    # 跳过的列表长度未知
+                    budget.truncate(MAX_DEPTH)
+                    directive = SKIP
+                elif sample_size is not None:
+                    frames.append([node, None, 0, []])
+                else:
+                    frames.append([node, None, 0])
+            else:
+                parent.child(key, type(value).__name__).count += 1
+    except (StopIteration, _Timeout):
+        pass
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # 截断处可能切开多字节字符
+        if reader is None or not reader.exhausted:
+            raise
+        budget.truncate(MAX_BYTES)
+    finally:
+        events.close()
+    if sample_size is not None:
+        # 提前结束时仍打开的列表，已抽到的元素也计入结构，内层先于外层合并
+        for frame in reversed(frames):
+            if frame[0].type == "list":
+                _merge_sample(frame[0], frame[3])
+    if budget is not None:
+        if reader is not None and reader.exhausted:
+            budget.truncate(MAX_BYTES)
+        tree.truncated = merge_truncated(tree.truncated, budget.truncated)
+    return tree
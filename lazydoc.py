@@ -0,0 +1,372 @@
+import base64
+import json
+import os
+import re
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+
+import jsonbackend
+from anyjson import map_file
+
+_WS_RE = re.compile(rb'[ \t\n\r]*')
+# 一次匹配括号以外的文本和完整的字符串，停在括号处
+_SKIP_RUN_RE = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+_STRING_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_SCALAR_RE = re.compile(rb'[^,:\]}\s]*')
+_INDEX_RE = re.compile(r'\[(-?\d+)\]')
+# 嵌套深度不超过 _NESTED_DEPTH 的容器内容用一次匹配跳过；占有量词避免回溯，需要 Python 3.11
+_NESTED_DEPTH = 8
+
+def _nested_pattern(depth):
+    pattern = rb'(?:[^"\[\]{}]++|"[^"\\]*+(?:\\.[^"\\]*+)*+")*+'
+    for _ in range(depth):
+        pattern = rb'(?:[^"\[\]{}]++|"[^"\\]*+(?:\\.[^"\\]*+)*+"|[\[{]' + pattern + rb'[\]}])*+'
+    return re.compile(pattern, re.S)
+
+try:
+    _NESTED_RE = _nested_pattern(_NESTED_DEPTH)
+    # 列表中的一个容器元素连同其后的逗号，一次匹配
+    _ELEMENT_RE = re.compile(rb'([\[{]' + _NESTED_RE.pattern + rb'[\]}])[ \t\n\r]*+(,[ \t\n\r]*+)?', re.S)
+except re.error:
+    _NESTED_RE = _ELEMENT_RE = None
+
+_OPEN = frozenset(b'[{')
+_BOM = b'\xef\xbb\xbf'
+# 扫描字典时，前这么多个键的值若为容器则顺带扫描，而不是先跳过、访问时再扫描一遍
+_EAGER_KEYS = 64
+# 顺带扫描递归进行，最多深入这么多层，更深的容器在访问时再扫描，避免深层嵌套的字典超出递归上限
+_EAGER_DEPTH = 32
+
+class LazyDocument:
+    """
+    按需解码的JSON文档：不预先解析整个文档，访问某个容器时才扫描它的原始文本，
+    记下每个键或元素的字节范围，取值时只解码被访问的子树
+    扫描字典时，值为容器的键（每个字典最多 _EAGER_KEYS 个，最多 _EAGER_DEPTH 层）会被一并扫描，列表元素则整体跳过：
+    对 {"Response": {"VpcSet": [...]}} 这样的响应，一次扫描即可建立到每条记录的索引，而记录本身在访问时才扫描
+    buffer 为 bytes、bytearray、mmap 或 memoryview；扫描过的容器的索引保存在文档中，内存与访问过的部分成正比
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        # 容器起始偏移 -> (键到值范围的字典 | 元素起止偏移数组, 容器结束偏移)
+        self._containers = {}
+        start = len(_BOM) if buffer[:len(_BOM)] == _BOM else 0
+        start = _WS_RE.match(buffer, start).end()
+        end = len(buffer)
+        while end > start and buffer[end - 1] in b' \t\n\r':
+            end -= 1
+        if start >= end:
+            raise ValueError("Expecting value: 偏移 0")
+        if buffer[start] not in _OPEN:
+            if self._skip_value(start) != end:
+                raise ValueError(f"Extra data: 偏移 {self._skip_value(start)}")
+        self._root_start = start
+        self._root_end = end
+        self.root = self._view(start, end)
+
+    def _error(self, msg, pos):
+        raise ValueError(f"{msg}: 偏移 {pos}")
+
+    def _skip_value(self, pos):
+        """
+        返回从 pos 开始的值结束之后的偏移，不解码、不检查容器内部的语法，只保证括号和字符串配对
+        """
+        buf = self.buffer
+        c = buf[pos]
+        if c in _OPEN:
+            if _NESTED_RE is not None:
+                end = _NESTED_RE.match(buf, pos + 1).end()
+                if end < len(buf) and buf[end] not in _OPEN and buf[end] != 0x22:
+                    return end + 1
+                # 嵌套过深或文本不完整时逐个括号扫描
+            depth = 0
+            match = _SKIP_RUN_RE.match
+            size = len(buf)
+            while True:
+                c = buf[pos]
+                pos += 1
+                if c in _OPEN:
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return pos
+                pos = match(buf, pos).end()
+                if pos >= size:
+                    self._error("Unterminated container", pos)
+        if c == 0x22:
+            string = _STRING_RE.match(buf, pos)
+            if string is None:
+                self._error("Unterminated string starting at", pos)
+            return string.end()
+        end = _SCALAR_RE.match(buf, pos).end()
+        if end == pos:
+            self._error("Expecting value", pos)
+        return end
+
+    def _scan(self, start, depth=0):
+        """
+        扫描一个容器的直接子项，结果缓存；字典中值为容器的键一并扫描（depth 为当前顺带扫描的层数），
+        其余更深的内容整体跳过
+        """
+        entry = self._containers.get(start)
+        if entry is not None:
+            return entry
+        buf = self.buffer
+        ws = _WS_RE.match
+        is_dict = buf[start] == 0x7b
+        close = 0x7d if is_dict else 0x5d
+        items = {} if is_dict else array('q')
+        pos = ws(buf, start + 1).end()
+        empty = pos < len(buf) and buf[pos] == close
+        if not is_dict and not empty and _ELEMENT_RE is not None:
+            # 记录列表的快速路径：元素为嵌套不深的容器时每个元素只需一次匹配
+            match = _ELEMENT_RE.match
+            append = items.append
+            while True:
+                element = match(buf, pos)
+                if element is None:
+                    break
+                append(pos)
+                append(element.end(1))
+                pos = element.end()
+                if element.start(2) < 0:
+                    empty = pos < len(buf) and buf[pos] == close
+                    if not empty:
+                        self._error("Expecting ',' delimiter", pos)
+                    break
+        while not empty:
+            if is_dict:
+                key = _STRING_RE.match(buf, pos)
+                if key is None:
+                    self._error("Expecting property name enclosed in double quotes", pos)
+                raw = buf[key.start() + 1:key.end() - 1]
+                name = json.loads(buf[key.start():key.end()]) if b'\\' in raw else bytes(raw).decode('utf-8')
+                pos = ws(buf, key.end()).end()
+                if pos >= len(buf) or buf[pos] != 0x3a:
+                    self._error("Expecting ':' delimiter", pos)
+                pos = ws(buf, pos + 1).end()
+            if pos >= len(buf):
+                self._error("Expecting value", pos)
+            if is_dict and buf[pos] in _OPEN and len(items) < _EAGER_KEYS and depth < _EAGER_DEPTH:
+                end = self._scan(pos, depth + 1)[1]
+            else:
+                end = self._skip_value(pos)
+            if is_dict:
+                items[name] = (pos, end)
+            else:
+                items.append(pos)
+                items.append(end)
+            pos = ws(buf, end).end()
+            if pos >= len(buf):
+                self._error("Unterminated container", pos)
+            c = buf[pos]
+            if c == close:
+                break
+            if c != 0x2c:
+                self._error("Expecting ',' delimiter", pos)
+            pos = ws(buf, pos + 1).end()
+        if start == self._root_start and pos + 1 != self._root_end:
+            self._error("Extra data", pos + 1)
+        entry = self._containers[start] = (items, pos + 1)
+        return entry
+
+    def _view(self, start, end):
+        """
+        字典和列表返回惰性视图，其他值直接解码
+        """
+        c = self.buffer[start]
+        if c == 0x7b:
+            return LazyDict(self, start, end)
+        if c == 0x5b:
+            return LazyList(self, start, end)
+        return self.decode(start, end)
+
+    def decode(self, start, end):
+        """
+        完整解码 [start, end) 处的值
+        """
+        with memoryview(self.buffer) as view:
+            return jsonbackend.loads(view[start:end])
+
+    def index_to_dict(self):
+        """
+        导出已建立的索引，可JSON序列化；列表的偏移数组以 base64 保存
+        """
+        containers = []
+        for start, (items, end) in self._containers.items():
+            if isinstance(items, dict):
+                containers.append([start, end, {key: list(span) for key, span in items.items()}])
+            else:
+                containers.append([start, end, base64.b64encode(items.tobytes()).decode()])
+        return {"size": len(self.buffer), "containers": containers}
+
+    def load_index(self, data):
+        """
+        载入 index_to_dict 导出的索引，文档长度不符时忽略，返回是否载入
+        """
+        if data.get("size") != len(self.buffer):
+            return False
+        for start, end, items in data["containers"]:
+            if isinstance(items, dict):
+                items = {key: tuple(span) for key, span in items.items()}
+            else:
+                items = array('q', base64.b64decode(items))
+            self._containers[start] = (items, end)
+        return True
+
+    @property
+    def indexed(self):
+        """
+        已建立索引的容器个数
+        """
+        return len(self._containers)
+
+    def __getitem__(self, key):
+        return self.root[key]
+
+    def get_path(self, path):
+        """
+        按路径取值，例如 "Response.VpcSet[15000].VpcId"
+        """
+        value = self.root
+        for part in path.split("."):
+            key = _INDEX_RE.split(part)
+            if key[0]:
+                value = value[key[0]]
+            for index in key[1::2]:
+                value = value[int(index)]
+        return value
+
+class _LazyContainer:
+    __slots__ = ('document', 'start', 'end')
+
+    def __init__(self, document, start, end):
+        self.document = document
+        self.start = start
+        self.end = end
+
+    @property
+    def _items(self):
+        return self.document._scan(self.start)[0]
+
+    def decode(self):
+        """
+        完整解码为 dict 或 list
+        """
+        return self.document.decode(self.start, self.end)
+
+    def raw(self):
+        """
+        原始JSON文本（bytes）
+        """
+        return bytes(self.document.buffer[self.start:self.end])
+
+    def __eq__(self, other):
+        if isinstance(other, _LazyContainer):
+            other = other.decode()
+        return self.decode() == other
+
+    __hash__ = None
+
+class LazyDict(_LazyContainer, Mapping):
+    """
+    字典视图：第一次访问时扫描一层，记下每个键的值所在的字节范围
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        start, end = self._items[key]
+        return self.document._view(start, end)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __repr__(self):
+        return f"LazyDict({list(self._items)!r})"
+
+class LazyList(_LazyContainer, Sequence):
+    """
+    列表视图：第一次访问时扫描一层，记下每个元素的起止偏移
+    """
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self._items) // 2
+
+    def __getitem__(self, index):
+        items = self._items
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(items) // 2))]
+        count = len(items) // 2
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("list index out of range")
+        return self.document._view(items[2 * index], items[2 * index + 1])
+
+    def __repr__(self):
+        return f"LazyList(len={len(self)})"
+
+def load_lazy(data):
+    """
+    由 bytes 等缓冲区建立惰性文档；str 先编码为 UTF-8
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return LazyDocument(data)
+
+def _index_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+@contextmanager
+def open_lazy(path, index_path=None):
+    """
+    内存映射文件并建立惰性文档，只有被访问的部分会从磁盘读入
+    指定 index_path 时复用其中保存的索引（文件大小和修改时间须一致），退出时如有新扫描的容器则写回
+    """
+    stamp = _index_stamp(path)
+    with map_file(path) as mapped:
+        doc = LazyDocument(mapped if mapped is not None else b"")
+        loaded = 0
+        if index_path and os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("stamp") == stamp and doc.load_index(data):
+                loaded = doc.indexed
+        yield doc
+        if index_path and doc.indexed > loaded:
+            data = doc.index_to_dict()
+            data["stamp"] = stamp
+            tmp = f"{index_path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, index_path)
+
+def main(argv=None):
+    """
+    python lazydoc.py 响应.json Response.VpcSet[15000] [路径 ...]
+    设置环境变量 LAZYDOC_INDEX 为索引文件路径时，多次查询同一文件只扫描一次
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("用法: python lazydoc.py 响应.json 路径 [路径 ...]")
+        return 2
+    with open_lazy(argv[0], os.environ.get('LAZYDOC_INDEX')) as doc:
+        for path in argv[1:]:
+            value = doc.get_path(path)
+            if isinstance(value, _LazyContainer):
+                value = value.decode()
+            print(f"{path}\t{json.dumps(value, ensure_ascii=False)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import time
+
+# 触发上限时记录在结构树根节点 truncated 中的原因
+MAX_NODES = "max_nodes"
+MAX_DEPTH = "max_depth"
+MAX_LIST_ITEMS = "max_list_items"
+MAX_BYTES = "max_bytes"
+MAX_SECONDS = "max_seconds"
+
+# 每处理这么多个节点检查一次时间
+_CLOCK_INTERVAL = 1024
+
+class Limits:
+    """
+    分析不可信输入时的上限，为 None 的项不限制
+    max_nodes：最多检查的值（字典、列表、标量）个数，达到后停止分析；
+               流式分析时被跳过的列表元素仍要逐个读过，也计入其中
+    max_depth：最多展开的容器层数，更深的容器只记录类型、不检查内容，分析继续
+    max_list_items：合并列表元素结构时每个列表最多检查的元素个数，分析继续
+    max_bytes：最多读取的输入字节数，超出部分不分析
+    max_seconds：分析的最长耗时，达到后停止分析
+    """
+    __slots__ = ('max_nodes', 'max_depth', 'max_list_items', 'max_bytes', 'max_seconds')
+
+    def __init__(self, max_nodes=None, max_depth=None, max_list_items=None, max_bytes=None, max_seconds=None):
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.max_list_items = max_list_items
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+
+    def __repr__(self):
+        settings = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__
+                             if getattr(self, name) is not None)
+        return f"Limits({settings})"
+
+    def budget(self):
+        """
+        开始一次分析，返回记录用量的 Budget
+        """
+        return Budget(self)
+
+class Budget:
+    """
+    一次分析的用量：已检查的节点数、截止时间和触发过的上限
+    """
+    __slots__ = ('limits', 'nodes', 'deadline', 'next_clock', 'reasons')
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.nodes = 0
+        self.deadline = time.monotonic() + limits.max_seconds if limits.max_seconds is not None else None
+        self.next_clock = _CLOCK_INTERVAL
+        self.reasons = []
+
+    def truncate(self, reason):
+        """
+        记录触发的上限，同一原因只记一次
+        """
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+
+    def tick(self):
+        """
+        检查一个节点，返回是否可以继续；节点数或耗时达到上限时返回 False
+        """
+        self.nodes += 1
+        max_nodes = self.limits.max_nodes
+        if max_nodes is not None and self.nodes > max_nodes:
+            self.truncate(MAX_NODES)
+            return False
+        if self.deadline is not None and self.nodes >= self.next_clock:
+            self.next_clock += _CLOCK_INTERVAL
+            if time.monotonic() > self.deadline:
+                self.truncate(MAX_SECONDS)
+                return False
+        return True
+
+    def clock(self):
+        """
+        立即检查耗时，返回是否可以继续；供读入输入等不经过 tick 的长操作使用
+        """
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.truncate(MAX_SECONDS)
+            return False
+        return True
+
+    @property
+    def truncated(self):
+        """
+        触发过的上限，以逗号分隔；没有触发时为 None
+        """
+        return ",".join(self.reasons) or None
+
+class LimitedReader:
+    """
+    包装文件对象，最多读出 max_bytes 个字节；之后的读取返回空，exhausted 为真
+    """
+    def __init__(self, fp, max_bytes):
+        self.fp = fp
+        self.remaining = max_bytes
+        self.exhausted = False
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            # 探测是否确实还有未读的输入
+            if not self.exhausted and self.fp.read(1):
+                self.exhausted = True
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fp.read(size)
+        self.remaining -= len(data)
+        return data
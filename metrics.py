@@ -0,0 +1,230 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# 注册的接收器；为空时不采集任何度量
+_sinks = []
+# 需要内存峰值的接收器个数，大于 0 时用 tracemalloc 统计，会明显拖慢分析
+_memory_sinks = 0
+
+def add_sink(sink, trace_memory=False):
+    """
+    注册接收器，每次分析结束时以 Run 调用 sink(run)
+    trace_memory 为真时记录分配峰值（基于 tracemalloc，开销较大）
+    """
+    global _memory_sinks
+    _sinks.append((sink, trace_memory))
+    if trace_memory:
+        _memory_sinks += 1
+    return sink
+
+def remove_sink(sink):
+    """
+    注销接收器
+    """
+    global _memory_sinks
+    for i, (registered, trace_memory) in enumerate(_sinks):
+        if registered == sink:
+            del _sinks[i]
+            if trace_memory:
+                _memory_sinks -= 1
+            return
+    raise ValueError(f"接收器未注册: {sink!r}")
+
+def enabled():
+    return bool(_sinks)
+
+def start(name):
+    """
+    开始记录一次分析；没有接收器时返回 None，调用方据此跳过全部记录，不增加开销
+    """
+    if not _sinks:
+        return None
+    return Run(name, trace_memory=_memory_sinks > 0)
+
+def count_nodes(tree):
+    """
+    结构树中各节点 count 之和，即遍历时检查过的值的个数（不含根节点）
+    """
+    total = 0
+    stack = list(tree.children.values()) if tree.children else []
+    while stack:
+        node = stack.pop()
+        total += node.count
+        if node.children:
+            stack.extend(node.children.values())
+    return total
+
+class Run:
+    """
+    一次分析的度量：各阶段耗时（秒）、输入字节数、检查的值个数和分配峰值（字节）
+    阶段按 mark 的调用顺序计时，每个阶段从上一次 mark（或开始）算起
+    """
+    __slots__ = ('name', 'phases', 'bytes_in', 'nodes', 'peak_bytes', 'truncated',
+                 'timestamp', '_last', '_tracing')
+
+    def __init__(self, name, trace_memory=False):
+        self.name = name
+        self.phases = {}
+        self.bytes_in = None
+        self.nodes = None
+        self.peak_bytes = None
+        self.truncated = None
+        self.timestamp = time.time()
+        self._tracing = False
+        if trace_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                self._tracing = True
+            self.peak_bytes = tracemalloc.get_traced_memory()[0]
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """
+        结束当前阶段并记在 phase 名下，同名阶段的耗时累加
+        """
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def record_tree(self, tree):
+        """
+        从结构树取得检查的值个数和截断原因
+        """
+        self.nodes = count_nodes(tree)
+        self.truncated = tree.truncated
+
+    def finish(self):
+        """
+        结束记录并交给所有接收器；接收器抛出的异常不影响分析结果
+        """
+        if self.peak_bytes is not None:
+            self.peak_bytes = tracemalloc.get_traced_memory()[1] - self.peak_bytes
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+        for sink, _ in list(_sinks):
+            try:
+                sink(self)
+            except Exception as e:
+                print(f"度量接收器 {sink!r} 出错: {e}", file=sys.stderr)
+
+    @property
+    def seconds(self):
+        return sum(self.phases.values())
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "seconds": self.seconds,
+            "phases": dict(self.phases),
+            "bytes_in": self.bytes_in,
+            "nodes": self.nodes,
+            "peak_bytes": self.peak_bytes,
+            "truncated": self.truncated,
+        }
+
+class JsonLogSink:
+    """
+    每次分析写一行JSON日志；path 为 None 时写到标准错误
+    """
+    def __init__(self, path=None, **fields):
+        self.path = path
+        self.fields = fields
+        self._lock = threading.Lock()
+
+    def __call__(self, run):
+        line = json.dumps({**self.fields, **run.to_dict()}, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if self.path is None:
+                print(line, file=sys.stderr, flush=True)
+            else:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line + "\n")
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class PrometheusTextFile:
+    """
+    把累计的度量写成 Prometheus 文本格式，供 node_exporter 的 textfile 采集器读取
+    每次分析后整体重写文件（先写临时文件再替换），按分析名称区分
+    """
+    def __init__(self, path, prefix="anyjson_analysis"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        # 分析名称 -> 累计值
+        self._totals = {}
+
+    def __call__(self, run):
+        with self._lock:
+            totals = self._totals.setdefault(run.name, {
+                "runs": 0, "truncated": 0, "bytes": 0, "nodes": 0, "phases": {}, "peak_bytes": None})
+            totals["runs"] += 1
+            totals["truncated"] += run.truncated is not None
+            totals["bytes"] += run.bytes_in or 0
+            totals["nodes"] += run.nodes or 0
+            for phase, seconds in run.phases.items():
+                totals["phases"][phase] = totals["phases"].get(phase, 0.0) + seconds
+            if run.peak_bytes is not None:
+                totals["peak_bytes"] = run.peak_bytes
+            self._write()
+
+    def render(self):
+        """
+        返回当前累计值的 Prometheus 文本
+        """
+        prefix = self.prefix
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            if not samples:
+                return
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                rendered = ",".join(f'{key}="{_escape_label(label)}"' for key, label in labels)
+                lines.append(f"{prefix}_{name}{{{rendered}}} {value!r}")
+
+        items = sorted(self._totals.items())
+        family("runs_total", "counter", "Completed analyses.",
+               [((("analysis", name),), totals["runs"]) for name, totals in items])
+        family("truncated_total", "counter", "Analyses stopped early by a limit.",
+               [((("analysis", name),), totals["truncated"]) for name, totals in items])
+        family("phase_seconds_total", "counter", "Time spent in each analysis phase.",
+               [((("analysis", name), ("phase", phase)), seconds)
+                for name, totals in items for phase, seconds in sorted(totals["phases"].items())])
+        family("input_bytes_total", "counter", "Input bytes analysed.",
+               [((("analysis", name),), totals["bytes"]) for name, totals in items])
+        family("nodes_total", "counter", "JSON values inspected.",
+               [((("analysis", name),), totals["nodes"]) for name, totals in items])
+        family("peak_bytes", "gauge", "Peak traced allocation of the last analysis.",
+               [((("analysis", name),), totals["peak_bytes"]) for name, totals in items
+                if totals["peak_bytes"] is not None])
+        return "\n".join(lines) + "\n"
+
+    def _write(self):
+        temp = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(temp, self.path)
+
+def configure_from_env():
+    """
+    按环境变量注册接收器：ANYJSON_METRICS_PROM 为 Prometheus 文本文件路径，
+    ANYJSON_METRICS_LOG 为JSON日志路径（"-" 表示标准错误），ANYJSON_METRICS_MEMORY 非空时记录分配峰值
+    """
+    trace_memory = bool(os.environ.get('ANYJSON_METRICS_MEMORY'))
+    prom = os.environ.get('ANYJSON_METRICS_PROM')
+    if prom:
+        add_sink(PrometheusTextFile(prom), trace_memory)
+    log = os.environ.get('ANYJSON_METRICS_LOG')
+    if log:
+        add_sink(JsonLogSink(None if log == "-" else log), trace_memory)
@@ -0,0 +1,282 @@
+import sys
+from functools import lru_cache
+
+from jsonstream import CHUNK_SIZE, SKIP, SKIP_REST, iter_json_events
+
+_START_EVENTS = ('start_map', 'start_array')
+
+def parse_path(path):
+    """
+    把 describe_json_structure 的路径语法解析为步骤元组，"[]" 表示列表中的每个元素（记为 None）
+    例如 "Response.VpcSet[].VpcId" -> ("Response", "VpcSet", None, "VpcId")
+    """
+    steps = []
+    for part in path.split("."):
+        key = part
+        while key.endswith("[]"):
+            key = key[:-2]
+        if key:
+            steps.append(key)
+        elif part == "" and path:
+            raise ValueError(f"无效的路径: {path}")
+        steps.extend([None] * ((len(part) - len(key)) // 2))
+    return tuple(steps)
+
+class _Node:
+    """
+    前缀树节点：children 为 {键: 节点}，items 为列表元素的节点，matches 为在此结束的路径序号
+    """
+    __slots__ = ('children', 'items', 'matches')
+
+    def __init__(self):
+        self.children = None
+        self.items = None
+        self.matches = None
+
+    def step(self, key):
+        if key is None:
+            if self.items is None:
+                self.items = _Node()
+            return self.items
+        if self.children is None:
+            self.children = {}
+        node = self.children.get(key)
+        if node is None:
+            node = self.children[key] = _Node()
+        return node
+
+def _evaluate(root, data, emit):
+    """
+    在已解析的对象上执行查询，按文档顺序对每个匹配调用 emit(路径序号, 值)
+    """
+    stack = [(root, data)]
+    while stack:
+        node, value = stack.pop()
+        if node.matches:
+            for index in node.matches:
+                emit(index, value)
+        pending = []
+        if node.children and value.__class__ is dict:
+            for key, child in node.children.items():
+                if key in value:
+                    pending.append((child, value[key]))
+        if node.items is not None and value.__class__ is list:
+            pending.extend(zip([node.items] * len(value), value))
+        stack.extend(reversed(pending))
+
+def _build_value(events, event, value):
+    """
+    由事件构建一个完整的值
+    """
+    if event not in _START_EVENTS:
+        return value
+    root = {} if event == 'start_map' else []
+    containers = [root]
+    keys = [None]
+    for event, value in events:
+        if event == 'map_key':
+            keys[-1] = value
+            continue
+        if event == 'end_map' or event == 'end_array':
+            containers.pop()
+            keys.pop()
+            if not containers:
+                return root
+            continue
+        if event == 'start_map':
+            value = {}
+        elif event == 'start_array':
+            value = []
+        parent = containers[-1]
+        if parent.__class__ is list:
+            parent.append(value)
+        else:
+            parent[keys[-1]] = value
+        if event in _START_EVENTS:
+            containers.append(value)
+            keys.append(None)
+    return root
+
+# 流式查询中每条记录结束时产生的标记
+RECORD_END = object()
+
+class Query:
+    """
+    编译后的查询：多个路径合并为一棵前缀树，同一前缀只遍历一次
+    """
+    def __init__(self, paths):
+        self.paths = tuple(paths)
+        self.root = _Node()
+        for index, path in enumerate(self.paths):
+            node = self.root
+            for key in parse_path(path):
+                node = node.step(key)
+            node.matches = (node.matches or ()) + (index,)
+
+    def __repr__(self):
+        return f"Query({list(self.paths)!r})"
+
+    def run(self, data):
+        """
+        在已解析的对象上执行，返回 {路径: [值, ...]}
+        """
+        results = {path: [] for path in self.paths}
+        lists = [results[path] for path in self.paths]
+        _evaluate(self.root, data, lambda index, value: lists[index].append(value))
+        return results
+
+    def first(self, data, default=None):
+        """
+        返回每个路径的第一个匹配值组成的元组，没有匹配时为 default
+        """
+        found = [default] * len(self.paths)
+        seen = [False] * len(self.paths)
+
+        def emit(index, value):
+            if not seen[index]:
+                seen[index] = True
+                found[index] = value
+        _evaluate(self.root, data, emit)
+        return tuple(found)
+
+    def stream(self, fp, chunk_size=CHUNK_SIZE, record=None):
+        """
+        流式执行，按文档顺序产生 (路径, 值)；与任何路径都不匹配的子树直接在原始文本上跳过
+        record 为某个路径前缀的节点时，每离开一个该节点对应的值（无论是否为字典）就产生 (RECORD_END, None)
+        """
+        events = iter_json_events(fp, chunk_size)
+        send = events.send
+        paths = self.paths
+        # 每个打开且需要展开的容器一帧：[前缀树节点, 是否为列表, 当前键, 字典中尚未出现的路径键数]
+        frames = []
+        try:
+            event, value = next(events)
+            while True:
+                skip = None
+                if event == 'map_key':
+                    frame = frames[-1]
+                    frame[2] = value
+                    if value in frame[0].children:
+                        frame[3] -= 1
+                    else:
+                        # 不在任何路径上的键连同它的值一起跳过
+                        skip = SKIP
+                elif event == 'end_map' or event == 'end_array':
+                    node = frames.pop()[0]
+                    if node is record:
+                        yield RECORD_END, None
+                else:
+                    if not frames:
+                        node = self.root
+                    else:
+                        parent, is_list, key, _ = frames[-1]
+                        node = parent.items if is_list else parent.children.get(key)
+                    if node is None:
+                        skip = SKIP
+                    elif node.matches:
+                        value = _build_value(events, event, value)
+                        for index in node.matches:
+                            yield paths[index], value
+                        if node.children or node.items is not None:
+                            # 更深的路径在已构建的值上继续匹配
+                            matches = []
+                            sub = _Node()
+                            sub.children, sub.items = node.children, node.items
+                            _evaluate(sub, value, lambda index, found: matches.append((paths[index], found)))
+                            yield from matches
+                        if node is record:
+                            yield RECORD_END, None
+                    elif event == 'start_map' and node.children:
+                        frames.append([node, False, None, len(node.children)])
+                    elif event == 'start_array' and node.items is not None:
+                        frames.append([node, True, None, 0])
+                    else:
+                        if event in _START_EVENTS:
+                            skip = SKIP
+                        if node is record:
+                            # 不展开的记录（标量或不含所需字段的容器）同样算一条记录，与 select_rows 一致
+                            yield RECORD_END, None
+                if skip is None and event != 'map_key' and frames:
+                    frame = frames[-1]
+                    if not frame[1] and frame[3] <= 0:
+                        # 字典中所有需要的键都已取到，跳过其余部分
+                        skip = SKIP_REST
+                event, value = send(skip)
+        except StopIteration:
+            return
+
+    def stream_all(self, fp, chunk_size=CHUNK_SIZE):
+        """
+        流式执行，返回 {路径: [值, ...]}
+        """
+        results = {path: [] for path in self.paths}
+        for path, value in self.stream(fp, chunk_size):
+            results[path].append(value)
+        return results
+
+@lru_cache(maxsize=256)
+def compile_query(*paths):
+    """
+    编译查询并缓存，相同的路径组合只编译一次
+    """
+    return Query(paths)
+
+def select(data, *paths):
+    """
+    例如 select(data, "Response.VpcSet[].VpcId", "Response.VpcSet[].CidrBlock")
+    """
+    return compile_query(*paths).run(data)
+
+def select_stream(fp, *paths, chunk_size=CHUNK_SIZE):
+    return compile_query(*paths).stream_all(fp, chunk_size)
+
+def select_rows(data, record_path, fields):
+    """
+    对 record_path 下的每条记录取出 fields（相对记录的路径），返回元组列表，缺失的字段为 None
+    """
+    fields = tuple(fields)
+    records = compile_query(record_path).run(data)[record_path]
+    query = compile_query(*fields)
+    return [query.first(record) for record in records]
+
+def select_rows_stream(fp, record_path, fields, chunk_size=CHUNK_SIZE):
+    """
+    select_rows 的流式版本，逐条产生元组；记录中未被选中的字段不会被构建，不是字典的记录产生全为 None 的元组
+    """
+    fields = tuple(fields)
+    query = compile_query(*(f"{record_path}.{field}" for field in fields))
+    record = query.root
+    for key in parse_path(record_path):
+        record = record.step(key) if key is None or (record.children and key in record.children) else None
+        if record is None:
+            return
+    position = {path: index for index, path in enumerate(query.paths)}
+    row = [None] * len(fields)
+    # 与 Query.first 一样取每个字段的第一个匹配值，即使它是 None
+    seen = [False] * len(fields)
+    for path, value in query.stream(fp, chunk_size, record=record):
+        if path is RECORD_END:
+            yield tuple(row)
+            row = [None] * len(fields)
+            seen = [False] * len(fields)
+        else:
+            index = position[path]
+            if not seen[index]:
+                seen[index] = True
+                row[index] = value
+
+def main(argv=None):
+    """
+    python pathquery.py 响应.json Response.VpcSet[].VpcId [路径 ...]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("用法: python pathquery.py 响应.json 路径 [路径 ...]")
+        return 2
+    with open(argv[0], 'rb') as f:
+        for path, value in compile_query(*argv[1:]).stream(f):
+            print(f"{path}\t{value}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
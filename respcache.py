@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+# 调用成功后需要让同一凭证、同一地域的 Describe* 缓存失效的接口
+INVALIDATING_ACTIONS = {"CreateLoadBalancer"}
+
+def is_cacheable(action):
+    return action.startswith("Describe")
+
+def _canonical_payload(payload):
+    if payload is None:
+        return b"{}"
+    if isinstance(payload, (str, bytes)):
+        payload = json.loads(payload or "{}")
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode('utf-8')
+
+class ResponseCache:
+    """
+    Describe* 接口的响应缓存，键为 (凭证, 地域, 接口, 请求体) 的哈希，按TTL过期、按LRU淘汰
+    directory 不为 None 时同时写入磁盘，多个进程（例如每次由 server.js 启动的进程）可以共享
+    凭证只以哈希形式参与计算，不会写入缓存
+    """
+    def __init__(self, ttl=60, max_entries=256, directory=None, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory = directory
+        self.clock = clock
+        # 键 -> (过期时间, 作用域, 响应体)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def scope(secret_id, secret_key, region):
+        """
+        凭证和地域的摘要，失效时以它为单位
+        """
+        h = hashlib.blake2b(digest_size=12)
+        for part in (secret_id, secret_key, region):
+            h.update(part.encode('utf-8'))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def key(self, secret_id, secret_key, region, action, payload=None):
+        """
+        返回 (作用域, 键)；请求体按键排序后参与计算，字段顺序不同的相同请求命中同一项
+        """
+        scope = self.scope(secret_id, secret_key, region)
+        h = hashlib.blake2b(scope.encode('ascii'), digest_size=16)
+        h.update(action.encode('utf-8'))
+        h.update(b"\0")
+        h.update(_canonical_payload(payload))
+        return scope, h.hexdigest()
+
+    def get(self, scope, key):
+        """
+        返回未过期的响应体，没有时返回 None
+        """
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            del self._entries[key]
+            self.expirations += 1
+        data = self._load_disk(scope, key, now)
+        if data is not None:
+            self.disk_hits += 1
+            return data
+        self.misses += 1
+        return None
+
+    def put(self, scope, key, data, ttl=None):
+        expires = self.clock() + (self.ttl if ttl is None else ttl)
+        self._insert(key, expires, scope, data)
+        self._save_disk(scope, key, expires, data)
+
+    def invalidate(self, scope=None):
+        """
+        删除某个作用域（凭证+地域）的全部缓存；scope 为 None 时全部删除
+        """
+        for key in [key for key, entry in self._entries.items() if scope is None or entry[1] == scope]:
+            del self._entries[key]
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, f"{scope or '*'}-*.cache")):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def _insert(self, key, expires, scope, data):
+        self._entries[key] = (expires, scope, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, scope, key):
+        return os.path.join(self.directory, f"{scope}-{key}.cache")
+
+    def _load_disk(self, scope, key, now):
+        if not self.directory:
+            return None
+        path = self._disk_path(scope, key)
+        try:
+            with open(path, 'rb') as f:
+                header = f.readline()
+                data = f.read()
+            expires = float(header)
+        except (OSError, ValueError):
+            return None
+        if expires <= now:
+            self.expirations += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        self._insert(key, expires, scope, data)
+        return data
+
+    def _save_disk(self, scope, key, expires, data):
+        if not self.directory:
+            return
+        path = self._disk_path(scope, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(f"{expires!r}\n".encode('ascii'))
+            f.write(data)
+        # 先写临时文件再替换，避免其他进程读到写了一半的文件
+        os.replace(tmp_path, path)
+
+def main(argv=None):
+    """
+    python respcache.py DescribeVpcs SecretId SecretKey Region [Payload] [--ttl 60]
+    参数顺序与 *.sh 脚本相同，输出原始响应，可替代脚本供 server.js 调用
+    """
+    from tcclient import TencentCloudClient
+
+    parser = argparse.ArgumentParser(description="带缓存地调用 Describe* 接口")
+    parser.add_argument("action")
+    parser.add_argument("secret_id")
+    parser.add_argument("secret_key")
+    parser.add_argument("region")
+    parser.add_argument("payload", nargs="?", default="{}")
+    parser.add_argument("--ttl", type=float, default=60, help="缓存有效期（秒）")
+    parser.add_argument("--cache-dir", default=os.path.join(".cache", "responses"))
+    parser.add_argument("--endpoint", help="覆盖API地址，例如本地替身服务")
+    args = parser.parse_args(argv)
+
+    cache = ResponseCache(ttl=args.ttl, directory=args.cache_dir)
+
+    async def call():
+        async with TencentCloudClient(args.secret_id, args.secret_key, args.region,
+                                      endpoint=args.endpoint, cache=cache) as client:
+            return await client.call_cached(args.action, json.loads(args.payload or "{}"))
+
+    sys.stdout.buffer.write(asyncio.run(call()) + b"\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
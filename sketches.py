@@ -0,0 +1,449 @@
+import argparse
+import base64
+import hashlib
+import heapq
+import json
+import math
+import sys
+from array import array
+
+import jsonbackend
+from jsonbatch import JSONL_CHUNK_BYTES, iter_jsonl_lines, iter_source_tasks, run_tasks
+
+_MASK64 = (1 << 64) - 1
+
+def value_hash(value):
+    """
+    值的128位哈希，类型不同的值（1、"1"、True）哈希不同
+    """
+    return int.from_bytes(hashlib.blake2b(repr(value).encode('utf-8'), digest_size=16).digest(), 'big')
+
+class HyperLogLog:
+    """
+    基数估计，2**p 个寄存器，标准误差约 1.04/sqrt(2**p)；p=12 时为 4KB、约 1.6%
+    """
+    __slots__ = ('p', 'registers')
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = bytearray(1 << p)
+
+    def add_hash(self, h):
+        h &= _MASK64
+        rest_bits = 64 - self.p
+        index = h >> rest_bits
+        rank = rest_bits - (h & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value):
+        self.add_hash(value_hash(value))
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # 小基数时用线性计数修正
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("HyperLogLog 精度不同，不能合并")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def to_dict(self):
+        return {"p": self.p, "registers": self.registers.hex()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["p"])
+        sketch.registers = bytearray.fromhex(data["registers"])
+        return sketch
+
+class CountMin:
+    """
+    频率估计：depth 行、每行 width 个计数器，估计值只会偏大
+    """
+    __slots__ = ('width', 'depth', 'table')
+
+    def __init__(self, width=1024, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = array('q', bytes(8 * width * depth))
+
+    def _cells(self, h):
+        # 由一个128位哈希派生 depth 个位置（Kirsch-Mitzenmacher）
+        h1 = h >> 64
+        h2 = (h & _MASK64) | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def add_hash(self, h, count=1):
+        """
+        计数并返回加入后的估计频率
+        """
+        table = self.table
+        width = self.width
+        h1 = h >> 64
+        h2 = (h & _MASK64) | 1
+        estimate = None
+        for row in range(self.depth):
+            cell = row * width + (h1 + row * h2) % width
+            value = table[cell] = table[cell] + count
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def add(self, value, count=1):
+        return self.add_hash(value_hash(value), count)
+
+    def estimate_hash(self, h):
+        table = self.table
+        return min(table[cell] for cell in self._cells(h))
+
+    def estimate(self, value):
+        return self.estimate_hash(value_hash(value))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("CountMin 尺寸不同，不能合并")
+        self.table = array('q', map(int.__add__, self.table, other.table))
+        return self
+
+    def to_dict(self):
+        return {"width": self.width, "depth": self.depth, "table": base64.b64encode(self.table.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["width"], data["depth"])
+        sketch.table = array('q', base64.b64decode(data["table"]))
+        return sketch
+
+class TopK:
+    """
+    高频值：CountMin 估计频率，只保留估计频率最高的 k 个候选值
+    """
+    __slots__ = ('k', 'counts', 'candidates', 'floor')
+
+    def __init__(self, k=10, width=1024, depth=4):
+        self.k = k
+        self.counts = CountMin(width, depth)
+        # 候选值 -> (估计频率, 哈希)
+        self.candidates = {}
+        # 候选值已满时记录的最低频率，不超过它的值无需与候选值比较
+        self.floor = 0
+
+    def add_hash(self, value, h):
+        estimate = self.counts.add_hash(h)
+        candidates = self.candidates
+        if value in candidates or len(candidates) < self.k:
+            candidates[value] = (estimate, h)
+            return
+        if estimate <= self.floor:
+            return
+        weakest = min(candidates, key=lambda candidate: candidates[candidate][0])
+        if estimate > candidates[weakest][0]:
+            del candidates[weakest]
+            candidates[value] = (estimate, h)
+        self.floor = min(count for count, _ in candidates.values())
+
+    def add(self, value):
+        self.add_hash(value, value_hash(value))
+
+    def top(self):
+        """
+        返回 [(值, 估计频率)]，按频率从高到低
+        """
+        counts = self.counts
+        ranked = [(counts.estimate_hash(h), value) for value, (_, h) in self.candidates.items()]
+        return [(value, count) for count, value in heapq.nlargest(self.k, ranked, key=lambda item: item[0])]
+
+    def merge(self, other):
+        self.counts.merge(other.counts)
+        pool = dict(self.candidates)
+        pool.update(other.candidates)
+        ranked = [(self.counts.estimate_hash(h), value, h) for value, (_, h) in pool.items()]
+        self.candidates = {value: (count, h)
+                           for count, value, h in heapq.nlargest(self.k, ranked, key=lambda item: item[0])}
+        self.floor = 0
+        return self
+
+    def to_dict(self):
+        return {"k": self.k, "counts": self.counts.to_dict(),
+                "candidates": [[value, count, f"{h:032x}"] for value, (count, h) in self.candidates.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"])
+        sketch.counts = CountMin.from_dict(data["counts"])
+        sketch.candidates = {value: (count, int(h, 16)) for value, count, h in data["candidates"]}
+        return sketch
+
+def _bound(current, value, pick):
+    return value if current is None else pick(current, value)
+
+class PathProfile:
+    """
+    一个路径上所有值的画像：出现次数、空值和空容器个数、数值和字符串的最小/最大值、基数估计和高频值
+    每个路径占用的内存固定，与经过的记录数无关
+    """
+    __slots__ = ('count', 'nulls', 'empties', 'types', 'min_number', 'max_number',
+                 'min_string', 'max_string', 'distinct', 'top')
+
+    def __init__(self, sketches=True, top_k=10, hll_precision=12, width=1024, depth=4):
+        self.count = 0
+        self.nulls = 0
+        self.empties = 0
+        self.types = {}
+        self.min_number = None
+        self.max_number = None
+        self.min_string = None
+        self.max_string = None
+        self.distinct = HyperLogLog(hll_precision) if sketches else None
+        self.top = TopK(top_k, width, depth) if sketches else None
+
+    def add(self, value):
+        self.count += 1
+        cls = value.__class__
+        name = cls.__name__
+        self.types[name] = self.types.get(name, 0) + 1
+        if value is None:
+            self.nulls += 1
+            return
+        if cls is list or cls is dict:
+            if not value:
+                self.empties += 1
+            return
+        if cls is str:
+            if not value:
+                self.empties += 1
+            if self.min_string is None:
+                self.min_string = self.max_string = value
+            elif value < self.min_string:
+                self.min_string = value
+            elif value > self.max_string:
+                self.max_string = value
+        elif cls is int or cls is float:
+            if self.min_number is None:
+                self.min_number = self.max_number = value
+            elif value < self.min_number:
+                self.min_number = value
+            elif value > self.max_number:
+                self.max_number = value
+        if self.distinct is not None:
+            h = value_hash(value)
+            self.distinct.add_hash(h)
+            self.top.add_hash(value, h)
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.empties += other.empties
+        for name, count in other.types.items():
+            self.types[name] = self.types.get(name, 0) + count
+        for attr, pick in (('min_number', min), ('max_number', max), ('min_string', min), ('max_string', max)):
+            value = getattr(other, attr)
+            if value is not None:
+                setattr(self, attr, _bound(getattr(self, attr), value, pick))
+        if self.distinct is not None and other.distinct is not None:
+            self.distinct.merge(other.distinct)
+            self.top.merge(other.top)
+        elif other.distinct is not None:
+            self.distinct, self.top = other.distinct, other.top
+        return self
+
+    def to_dict(self):
+        result = {attr: getattr(self, attr) for attr in self.__slots__[:8]}
+        result["distinct"] = self.distinct.to_dict() if self.distinct is not None else None
+        result["top"] = self.top.to_dict() if self.top is not None else None
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls(sketches=False)
+        for attr in cls.__slots__[:8]:
+            setattr(profile, attr, data[attr])
+        if data["distinct"] is not None:
+            profile.distinct = HyperLogLog.from_dict(data["distinct"])
+            profile.top = TopK.from_dict(data["top"])
+        return profile
+
+    def summary(self):
+        result = {
+            "count": self.count,
+            "types": dict(self.types),
+            "null_rate": self.nulls / self.count if self.count else 0.0,
+            "empty_rate": self.empties / self.count if self.count else 0.0,
+        }
+        if self.min_number is not None:
+            result["min"], result["max"] = self.min_number, self.max_number
+        elif self.min_string is not None:
+            result["min"], result["max"] = self.min_string, self.max_string
+        if self.distinct is not None and (self.top.candidates or self.count == 0):
+            result["distinct"] = self.distinct.estimate()
+            result["top"] = self.top.top()
+        return result
+
+class Profiler:
+    """
+    对一批文档逐路径建立画像，路径语法与 describe_json_structure 相同（列表元素为 "[]"）
+    列表中的所有元素都会被统计；sketch_paths 不为 None 时只在这些路径上维护基数和高频值草图
+    两个 Profiler 可以用 merge 合并，结果与在同一个 Profiler 中处理全部文档相同
+    """
+    def __init__(self, sketch_paths=None, top_k=10, hll_precision=12, width=1024, depth=4):
+        self.sketch_paths = set(sketch_paths) if sketch_paths is not None else None
+        self.options = (top_k, hll_precision, width, depth)
+        self.paths = {}
+        self.documents = 0
+
+    def _profile(self, path):
+        profile = self.paths.get(path)
+        if profile is None:
+            sketches = self.sketch_paths is None or path in self.sketch_paths
+            profile = self.paths[path] = PathProfile(sketches, *self.options)
+        return profile
+
+    def add(self, data):
+        """
+        统计一个已解析的文档
+        """
+        self.documents += 1
+        profile = self._profile
+        stack = [(data, "")]
+        while stack:
+            value, path = stack.pop()
+            if path:
+                profile(path).add(value)
+            cls = value.__class__
+            if cls is dict:
+                prefix = f"{path}." if path else ""
+                stack.extend((child, prefix + key) for key, child in value.items())
+            elif cls is list and value:
+                item_path = f"{path}[]"
+                stack.extend((item, item_path) for item in value)
+        return self
+
+    def merge(self, other):
+        for path, profile in other.paths.items():
+            mine = self.paths.get(path)
+            if mine is None:
+                self.paths[path] = profile
+            else:
+                mine.merge(profile)
+        self.documents += other.documents
+        return self
+
+    def summary(self):
+        return {path: self.paths[path].summary() for path in sorted(self.paths)}
+
+    def to_dict(self):
+        """
+        导出为可JSON序列化的字典，供其他机器上的结果继续合并
+        """
+        return {
+            "sketch_paths": sorted(self.sketch_paths) if self.sketch_paths is not None else None,
+            "options": list(self.options),
+            "documents": self.documents,
+            "paths": {path: profile.to_dict() for path, profile in self.paths.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        profiler = cls(data["sketch_paths"], *data["options"])
+        profiler.documents = data["documents"]
+        profiler.paths = {path: PathProfile.from_dict(profile) for path, profile in data["paths"].items()}
+        return profiler
+
+def _profile_file(path, sketch_paths):
+    """
+    工作进程：统计单个JSON文件，返回 (Profiler, 错误列表)
+    """
+    profiler = Profiler(sketch_paths)
+    try:
+        with open(path, 'rb') as f:
+            data = jsonbackend.loads(f.read())
+    except (OSError, ValueError) as e:
+        return profiler, [(path, str(e))]
+    return profiler.add(data), []
+
+def _profile_jsonl_range(path, start, end, sketch_paths):
+    """
+    工作进程：统计JSONL文件中 [start, end) 字节范围内的每一行
+    """
+    profiler = Profiler(sketch_paths)
+    errors = []
+    for location, line in iter_jsonl_lines(path, start, end):
+        try:
+            profiler.add(jsonbackend.loads(line))
+        except ValueError as e:
+            errors.append((location, str(e)))
+    return profiler, errors
+
+def profile_batch(sources, workers=None, sketch_paths=None, chunk_bytes=JSONL_CHUNK_BYTES):
+    """
+    用进程池并行统计多个响应，各工作进程的草图合并为一个 Profiler
+    返回 (Profiler, 错误列表)；workers 为 1 时在当前进程中顺序执行
+    """
+    tasks = iter_source_tasks(sources, _profile_file, _profile_jsonl_range, (sketch_paths,), chunk_bytes)
+    profiler = Profiler(sketch_paths)
+    errors = []
+    for part, part_errors in run_tasks(tasks, workers):
+        profiler.merge(part)
+        errors.extend(part_errors)
+    return profiler, errors
+
+def print_profile(summary):
+    for path, profile in summary.items():
+        line = f"- {path}: {profile['count']} 次"
+        if profile["null_rate"]:
+            line += f", null {profile['null_rate']:.1%}"
+        if profile["empty_rate"]:
+            line += f", 空 {profile['empty_rate']:.1%}"
+        if "distinct" in profile:
+            line += f", 约 {profile['distinct']} 个不同值"
+        if "min" in profile:
+            line += f", 范围 {profile['min']!r} ~ {profile['max']!r}"
+        print(line)
+        if profile.get("top") and profile.get("distinct", 0) < profile["count"]:
+            print("    高频值: " + ", ".join(f"{value!r}×{count}" for value, count in profile["top"][:5]))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="逐路径统计JSON响应中的取值分布")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', help="并行统计目录、JSON文件或JSONL文件")
+    analyze.add_argument('sources', nargs='+', help="目录、.json 或 .jsonl 文件")
+    analyze.add_argument('-j', '--workers', type=int, default=None, help="工作进程数，默认为CPU核数")
+    analyze.add_argument('--sketch', action='append', metavar='PATH',
+                         help="只在这些路径上估计不同值个数和高频值，可重复；默认为所有路径")
+    analyze.add_argument('-o', '--output', help="把统计结果保存为JSON")
+
+    merge = subparsers.add_parser('merge', help="合并多次统计保存的结果")
+    merge.add_argument('parts', nargs='+', help="analyze -o 保存的文件")
+    merge.add_argument('-o', '--output', help="把合并后的统计结果保存为JSON")
+
+    args = parser.parse_args(argv)
+    if args.command == 'analyze':
+        profiler, errors = profile_batch(args.sources, workers=args.workers, sketch_paths=args.sketch)
+        for location, message in errors:
+            print(f"JSON解析错误 {location}: {message}", file=sys.stderr)
+    else:
+        profiler = None
+        for part in args.parts:
+            with open(part, encoding='utf-8') as f:
+                loaded = Profiler.from_dict(json.load(f))
+            profiler = loaded if profiler is None else profiler.merge(loaded)
+
+    print(f"共统计 {profiler.documents} 个JSON文档")
+    print_profile(profiler.summary())
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(profiler.to_dict(), f, ensure_ascii=False)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
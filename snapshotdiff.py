@@ -0,0 +1,240 @@
+import hashlib
+import json
+import sys
+import zlib
+
+import jsonbackend
+from anyjson import describe_json_tree
+from structure import StructureNode, diff_trees
+
+# 各记录列表的主键字段
+KEY_FIELDS = {"VpcSet": "VpcId", "SubnetSet": "SubnetId"}
+# 记录按主键哈希分桶，桶摘要相同的整桶跳过
+BUCKETS = 256
+
+def record_digest(record):
+    """
+    记录内容的摘要，与字段顺序无关
+    """
+    encoded = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).digest()
+
+def _bucket(record_id):
+    return zlib.crc32(record_id.encode('utf-8')) % BUCKETS
+
+def _entry_hash(record_id, digest):
+    return int.from_bytes(hashlib.blake2b(record_id.encode('utf-8') + b"\0" + digest, digest_size=16).digest(), 'big')
+
+class RecordIndex:
+    """
+    一个记录列表的摘要索引：每条记录一个摘要，按主键分桶，桶摘要为桶内各项哈希的异或
+    建索引需要遍历一次全部记录；比较两个索引时只展开摘要不同的桶，耗时与变化量成正比
+    """
+    def __init__(self, set_name, records=(), key_field=None, tree=None):
+        self.set_name = set_name
+        self.key_field = key_field or KEY_FIELDS[set_name]
+        self.records = {}
+        self.digests = {}
+        self.buckets = [0] * BUCKETS
+        self.members = [[] for _ in range(BUCKETS)]
+        self._tree = tree
+        for record in records:
+            record_id = record.get(self.key_field)
+            if record_id is None:
+                continue
+            digest = record_digest(record)
+            bucket = _bucket(record_id)
+            self.records[record_id] = record
+            self.digests[record_id] = digest
+            self.buckets[bucket] ^= _entry_hash(record_id, digest)
+            self.members[bucket].append(record_id)
+
+    @property
+    def tree(self):
+        """
+        记录列表的结构树，用于检测模式变化；第一次使用时才构建
+        """
+        if self._tree is None:
+            records = list(self.records.values())
+            self._tree = describe_json_tree({"Response": {self.set_name: records}}, merge_lists=True)
+        return self._tree
+
+    @property
+    def digest(self):
+        """
+        整个列表的指纹，两个索引指纹相同即记录完全相同
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for value in self.buckets:
+            h.update(value.to_bytes(16, 'big'))
+        return h.hexdigest()
+
+    def __len__(self):
+        return len(self.digests)
+
+    @classmethod
+    def from_response(cls, response, set_name):
+        """
+        由 DescribeVpcs / DescribeSubnets 响应（或 inventory 快照中的对应部分）建立索引
+        """
+        records = response.get("Response", response).get(set_name) or []
+        return cls(set_name, records)
+
+    def to_dict(self):
+        """
+        只保存摘要和结构树，重新加载后无需再次计算即可作为比较的旧快照
+        """
+        return {
+            "set_name": self.set_name,
+            "key_field": self.key_field,
+            "digests": {record_id: digest.hex() for record_id, digest in self.digests.items()},
+            "tree": self.tree.to_dict(),
+        }
+
+    @classmethod
+    def from_digests(cls, set_name, key_field, digests, tree):
+        """
+        由已保存的 (主键, 摘要) 和结构树重建索引，不需要原始记录
+        """
+        index = cls(set_name, key_field=key_field, tree=tree)
+        for record_id, digest in digests:
+            bucket = _bucket(record_id)
+            index.digests[record_id] = digest
+            index.buckets[bucket] ^= _entry_hash(record_id, digest)
+            index.members[bucket].append(record_id)
+        return index
+
+    @classmethod
+    def from_dict(cls, data):
+        digests = ((record_id, bytes.fromhex(digest)) for record_id, digest in data["digests"].items())
+        return cls.from_digests(data["set_name"], data["key_field"], digests, StructureNode.from_dict(data["tree"]))
+
+def diff_fields(old, new):
+    """
+    比较两条记录的顶层字段，返回 {字段: [旧值, 新值]}，缺失的一侧为 None
+    """
+    changes = {}
+    for field in old.keys() | new.keys():
+        old_value = old.get(field)
+        new_value = new.get(field)
+        if old_value != new_value or (field in old) != (field in new):
+            changes[field] = [old_value, new_value]
+    return changes
+
+def diff_records(old, new):
+    """
+    比较两个 RecordIndex，返回新增、删除和修改的记录主键
+    新旧索引都保存了原始记录时，修改项附带字段级差异
+    """
+    added = []
+    removed = []
+    modified = {}
+    if old.digest != new.digest:
+        for bucket in range(BUCKETS):
+            if old.buckets[bucket] == new.buckets[bucket]:
+                continue
+            old_ids = set(old.members[bucket])
+            for record_id in new.members[bucket]:
+                old_digest = old.digests.get(record_id) if record_id in old_ids else None
+                if old_digest is None:
+                    added.append(record_id)
+                elif old_digest != new.digests[record_id]:
+                    old_record = old.records.get(record_id)
+                    new_record = new.records.get(record_id)
+                    modified[record_id] = (diff_fields(old_record, new_record)
+                                           if old_record is not None and new_record is not None else None)
+            new_ids = set(new.members[bucket])
+            removed.extend(record_id for record_id in old.members[bucket] if record_id not in new_ids)
+    return {"added": sorted(added), "removed": sorted(removed), "modified": dict(sorted(modified.items()))}
+
+def diff_snapshots(old, new, set_names=tuple(KEY_FIELDS)):
+    """
+    比较两个快照（响应或 inventory 快照，也可以是已建好的 {列表名: RecordIndex}）
+    返回每个记录列表的记录差异和模式变化
+    """
+    result = {}
+    for set_name in set_names:
+        old_index = _index(old, set_name)
+        new_index = _index(new, set_name)
+        if old_index is None or new_index is None:
+            continue
+        changes = diff_records(old_index, new_index)
+        changes["schema"] = diff_schema(old_index, new_index, changes)
+        result[set_name] = changes
+    return result
+
+def _element_nodes(index, record_ids):
+    """
+    一批记录作为列表元素的结构节点：{(None, 类型): 节点}
+    """
+    records = [index.records[record_id] for record_id in record_ids]
+    return describe_json_tree(records, merge_lists=True).children[(None, "list")].children or {}
+
+def _list_node(tree, set_name):
+    return tree.child(None, "dict").child("Response", "dict").child(set_name, "list")
+
+def diff_schema(old, new, changes):
+    """
+    比较两个索引的记录模式，changes 为 diff_records 的结果
+    旧索引保存了原始记录时，新结构树由旧结构树减去被删除/修改的记录、再加上新增/修改后的记录得到，
+    只需分析有变化的记录；否则分析全部新记录
+    """
+    if not (changes["added"] or changes["removed"] or changes["modified"]):
+        return {"added": [], "removed": []}
+    outgoing = changes["removed"] + list(changes["modified"])
+    if new._tree is None and all(record_id in old.records for record_id in outgoing):
+        tree = old.tree.copy()
+        elements = _list_node(tree, new.set_name)
+        for key, node in _element_nodes(old, outgoing).items():
+            elements.children[key].subtract(node)
+        if elements.children:
+            elements.children = {key: node for key, node in elements.children.items() if node.count > 0} or None
+        for key, node in _element_nodes(new, changes["added"] + list(changes["modified"])).items():
+            elements.child(*key).merge(node)
+        # 一个响应中只有一个记录列表，长度即记录数
+        elements.lengths = {len(new.records): 1}
+        new._tree = tree
+    return diff_trees(old.tree, new.tree)
+
+def _index(snapshot, set_name):
+    if isinstance(snapshot.get(set_name), RecordIndex):
+        return snapshot[set_name]
+    # inventory 快照按接口名分组
+    for part in (snapshot, snapshot.get("DescribeVpcs", {}), snapshot.get("DescribeSubnets", {})):
+        if set_name in part.get("Response", part):
+            return RecordIndex.from_response(part, set_name)
+    return None
+
+def print_diff(diff):
+    for set_name, changes in diff.items():
+        print(f"{set_name}: 新增 {len(changes['added'])}，删除 {len(changes['removed'])}，"
+              f"修改 {len(changes['modified'])}")
+        for record_id in changes["added"]:
+            print(f"  + {record_id}")
+        for record_id in changes["removed"]:
+            print(f"  - {record_id}")
+        for record_id, fields in changes["modified"].items():
+            print(f"  ~ {record_id}: {', '.join(sorted(fields)) if fields else '内容变化'}")
+        for entry in changes["schema"]["added"]:
+            print(f"  新字段 {entry}")
+        for entry in changes["schema"]["removed"]:
+            print(f"  消失的字段 {entry}")
+
+def main(argv=None):
+    """
+    python snapshotdiff.py 旧响应.json 新响应.json
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("用法: python snapshotdiff.py 旧响应.json 新响应.json")
+        return 2
+    snapshots = []
+    for path in argv:
+        with open(path, 'rb') as f:
+            snapshots.append(jsonbackend.loads(f.read()))
+    diff = diff_snapshots(*snapshots)
+    print_diff(diff)
+    return 1 if any(changes["added"] or changes["removed"] or changes["modified"] for changes in diff.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
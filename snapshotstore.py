@@ -0,0 +1,462 @@
+import argparse
+import json
+import mmap
+import operator
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate, compress, repeat
+
+import jsonbackend
+from anyjson import describe_json_tree
+from columnar import BOOL, FLOAT, INT, OBJECT, STR, Column, Table
+from snapshotdiff import KEY_FIELDS, RecordIndex, record_digest
+from structure import StructureNode
+
+# 文件结构：MAGIC，之后每次追加一个快照段：
+# 各列的数据块（8字节对齐）、段描述（JSON）、定长尾部（段描述的偏移和长度、上一段的结束位置、结束标记）
+# 打开文件时从末尾沿尾部链读出所有段描述，数据块在访问时才通过内存映射读取
+MAGIC = b"CLBSNAP1"
+_TRAILER = struct.Struct("<QQQ8s")
+_TRAILER_MAGIC = b"SNAPEND1"
+_ALIGN = 8
+# 各类列在文件中的元素类型；字符串列和对象列保存为字典编码，对象列的字典中为JSON文本
+_TYPECODES = {INT: 'q', FLOAT: 'd', BOOL: 'b', STR: 'i', OBJECT: 'i'}
+
+class _SegmentWriter:
+    """
+    向文件末尾写入数据块，返回 [偏移, 字节数]
+    """
+    def __init__(self, f, offset):
+        self.f = f
+        self.offset = offset
+
+    def write(self, data):
+        padding = -self.offset % _ALIGN
+        if padding:
+            self.f.write(bytes(padding))
+            self.offset += padding
+        start = self.offset
+        with memoryview(data) as view:
+            self.f.write(view)
+            self.offset += view.nbytes
+        return [start, self.offset - start]
+
+    def write_strings(self, strings):
+        """
+        字符串字典：UTF-8 拼接的文本和每个字符串在文本中的字符偏移
+        """
+        text = "".join(strings).encode('utf-8')
+        offsets = array('q', accumulate(map(len, strings), initial=0))
+        return {"text": self.write(text), "offsets": self.write(offsets)}
+
+def _encode_column(name, values):
+    """
+    选择列的存储方式：字符串做字典编码；整数和浮点数混合的列、列表和字典等按JSON文本做字典编码，保证读回的值与原值相同
+    """
+    column = Column.from_values(name, values)
+    if column.kind == FLOAT and any(value.__class__ is int for value in values):
+        column = Column(name, OBJECT, values)
+    if column.kind == OBJECT:
+        dumps = json.dumps
+        texts = [None if value is None else dumps(value, ensure_ascii=False, separators=(",", ":"))
+                 for value in values]
+        column = Column.from_values(name, texts)
+        if column.kind != STR:
+            # 全部为 None
+            column = Column(name, STR, array('i', repeat(-1, len(values))), dictionary=[])
+        column.kind = OBJECT
+    return column
+
+def _write_set(writer, name, path, records, digests=True):
+    for record in records:
+        if record.__class__ is not dict:
+            raise ValueError(f"{name} 中的记录必须是字典")
+    key_field = KEY_FIELDS.get(name)
+    columns = []
+    for column_name in dict.fromkeys(key for record in records for key in record):
+        missing = bytes(map(operator.not_, map(operator.contains, records, repeat(column_name))))
+        column = _encode_column(column_name, list(map(dict.get, records, repeat(column_name))))
+        spec = {"name": column_name, "kind": column.kind, "values": writer.write(column.values)}
+        if column.valid is not None:
+            spec["valid"] = writer.write(column.valid)
+        if 1 in missing:
+            spec["missing"] = writer.write(missing)
+        if column.dictionary is not None:
+            spec["strings"] = writer.write_strings(column.dictionary)
+        columns.append(spec)
+    tree = describe_json_tree({"Response": {name: records}}, merge_lists=True)
+    result = {
+        "name": name,
+        "path": list(path),
+        "key_field": key_field,
+        "length": len(records),
+        "columns": columns,
+        "tree": writer.write(json.dumps(tree.to_dict(), ensure_ascii=False).encode('utf-8')),
+    }
+    if digests and key_field is not None:
+        result["digests"] = writer.write(b"".join(map(record_digest, records)))
+    return result
+
+def _find_sets(data, path=(), depth=0):
+    """
+    找出快照中的记录列表：单个响应中的 Response.VpcSet，或 inventory 快照中的 DescribeVpcs.Response.VpcSet 等
+    """
+    for key, value in data.items():
+        if key in KEY_FIELDS and value.__class__ is list:
+            yield path + (key,), value
+        elif value.__class__ is dict and depth < 3:
+            yield from _find_sets(value, path + (key,), depth + 1)
+
+def _strip_sets(data, paths):
+    """
+    复制快照中记录列表以外的部分，记录列表替换为 None
+    """
+    meta = dict(data)
+    for path in paths:
+        node = meta
+        for key in path[:-1]:
+            node[key] = dict(node[key])
+            node = node[key]
+        node[path[-1]] = None
+    return meta
+
+class _LazyColumns(Mapping):
+    """
+    表的列：第一次访问某列时才从内存映射中构建
+    """
+    def __init__(self, snapshot, specs):
+        self._snapshot = snapshot
+        self._specs = {spec["name"]: spec for spec in specs}
+        self._built = {}
+
+    def __getitem__(self, name):
+        column = self._built.get(name)
+        if column is None:
+            column = self._built[name] = self._snapshot._column(self._specs[name])
+        return column
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __len__(self):
+        return len(self._specs)
+
+class Snapshot:
+    """
+    快照文件中的一个快照；表、记录和结构树都在访问时才读取
+    """
+    def __init__(self, store, footer):
+        self._store = store
+        self.label = footer.get("label")
+        self.timestamp = footer.get("timestamp")
+        self._footer = footer
+        self._sets = {spec["name"]: spec for spec in footer["sets"]}
+
+    def __repr__(self):
+        return f"Snapshot({self.label!r}, {self.timestamp!r}, sets={self.set_names})"
+
+    @property
+    def set_names(self):
+        return list(self._sets)
+
+    def __len__(self):
+        return len(self._sets)
+
+    def length(self, set_name):
+        return self._sets[set_name]["length"]
+
+    def _column(self, spec):
+        view = self._store._view
+        kind = spec["kind"]
+        values = view(spec["values"], _TYPECODES[kind])
+        if kind == STR or kind == OBJECT:
+            dictionary = self._strings(spec["strings"])
+            if kind == OBJECT:
+                # 标准库 json 对超出64位的整数也能精确还原
+                loads = json.loads
+                return Column(spec["name"], OBJECT, [None if code < 0 else loads(dictionary[code]) for code in values])
+            return Column(spec["name"], STR, values, dictionary=dictionary)
+        valid = bytes(view(spec["valid"])) if "valid" in spec else None
+        return Column(spec["name"], kind, values, valid)
+
+    def _strings(self, spec):
+        text = str(self._store._view(spec["text"]), 'utf-8')
+        offsets = self._store._view(spec["offsets"], 'q')
+        return list(map(text.__getitem__, map(slice, offsets[:-1], offsets[1:])))
+
+    def table(self, set_name):
+        """
+        记录列表的列式表（columnar.Table），数值列和编码直接指向内存映射
+        """
+        spec = self._sets[set_name]
+        return Table(_LazyColumns(self, spec["columns"]), spec["length"])
+
+    def records(self, set_name):
+        """
+        还原为字典列表，与保存前的记录相同（键的顺序按列的顺序）
+        """
+        spec = self._sets[set_name]
+        table = self.table(set_name)
+        names = list(table.columns)
+        rows = [dict(zip(names, values)) for values in zip(*map(table.columns.__getitem__, names))]
+        if not names:
+            rows = [{} for _ in range(spec["length"])]
+        for column in spec["columns"]:
+            if "missing" in column:
+                name = column["name"]
+                for row in compress(rows, bytes(self._store._view(column["missing"]))):
+                    del row[name]
+        return rows
+
+    def tree(self, set_name):
+        """
+        保存时计算的结构树（与 RecordIndex.tree 相同）
+        """
+        return StructureNode.from_dict(json.loads(self._store._view(self._sets[set_name]["tree"]).tobytes()))
+
+    def record_index(self, set_name):
+        """
+        由保存的摘要重建 snapshotdiff.RecordIndex，不需要还原记录；保存时未计算摘要的返回 None
+        """
+        spec = self._sets[set_name]
+        if "digests" not in spec:
+            return None
+        digests = self._store._view(spec["digests"]).tobytes()
+        ids = self.table(set_name)[spec["key_field"]]
+        pairs = ((record_id, digests[16 * row:16 * row + 16]) for row, record_id in enumerate(ids)
+                 if record_id is not None)
+        return RecordIndex.from_digests(set_name, spec["key_field"], pairs, self.tree(set_name))
+
+    def indexes(self):
+        """
+        {列表名: RecordIndex}，可直接传给 snapshotdiff.diff_snapshots
+        """
+        result = {}
+        for set_name in self._sets:
+            index = self.record_index(set_name)
+            if index is not None:
+                result[set_name] = index
+        return result
+
+    def meta(self):
+        """
+        快照中记录列表以外的部分，记录列表处为 None
+        """
+        return json.loads(self._store._view(self._footer["meta"]).tobytes())
+
+    def to_dict(self):
+        """
+        还原整个快照
+        """
+        data = self.meta()
+        for set_name, spec in self._sets.items():
+            node = data
+            for key in spec["path"][:-1]:
+                node = node[key]
+            node[spec["path"][-1]] = self.records(set_name)
+        return data
+
+class SnapshotFile:
+    """
+    追加写入的列式快照文件：每个快照的 VpcSet/SubnetSet 按列保存，字符串做字典编码，同时保存结构树和记录摘要
+    打开时只读取每个快照的段描述；列数据通过内存映射按需读取，数值列不复制
+    末尾如有中断的追加留下的不完整段，读取时忽略，下次追加前截掉
+    关闭文件前，从中取出的列都不能再使用
+    """
+    def __init__(self, path):
+        self.path = path
+        self.snapshots = []
+        # 文件增长后读取新写入的数据时才建立新的映射，旧映射在关闭时一并释放
+        self._maps = []
+        self._bases = []
+        self._base = None
+        # (偏移, 字节数, 元素类型) -> memoryview，每个数据块只建一个视图
+        self._views = {}
+        # 最后一个完整段的结束位置
+        self._end = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def __getitem__(self, index):
+        return self.snapshots[index]
+
+    def __iter__(self):
+        return iter(self.snapshots)
+
+    def _map(self):
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        self._base = memoryview(mapped)
+        self._bases.append(self._base)
+        return mapped
+
+    def _footer_at(self, mapped, end):
+        """
+        读出结束于 end 的段的段描述，返回 (段描述, 上一段的结束位置)；end 处不是完整的段时返回 None
+        """
+        if end < len(MAGIC) + _TRAILER.size:
+            return None
+        offset, size, previous, marker = _TRAILER.unpack_from(mapped, end - _TRAILER.size)
+        if (marker != _TRAILER_MAGIC or previous < len(MAGIC) or offset < previous
+                or offset + size > end - _TRAILER.size):
+            return None
+        try:
+            footer = json.loads(mapped[offset:offset + size])
+        except ValueError:
+            return None
+        if footer.__class__ is not dict or "sets" not in footer:
+            return None
+        return footer, previous
+
+    def _read_footers(self, mapped, end):
+        """
+        从 end 沿尾部链读出所有段描述（按写入顺序）；end 处不是完整的段时返回 None，链在中间断开时报错
+        """
+        footers = []
+        while end > len(MAGIC):
+            found = self._footer_at(mapped, end)
+            if found is None:
+                if not footers:
+                    return None
+                raise ValueError(f"快照文件损坏: {self.path}，偏移 {end} 处的段不完整")
+            footer, end = found
+            if footer.get("byteorder") != sys.byteorder:
+                raise ValueError(f"快照文件的字节序与本机不同: {footer.get('byteorder')}")
+            footers.append(footer)
+        footers.reverse()
+        return footers
+
+    def _load(self):
+        mapped = self._map()
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"不是快照文件: {self.path}")
+        end = len(mapped)
+        while True:
+            footers = self._read_footers(mapped, end)
+            if footers is not None:
+                break
+            # 末尾是中断的追加留下的不完整段，退回到它之前最后一个完整的段
+            pos = mapped.rfind(_TRAILER_MAGIC, len(MAGIC), end - 1)
+            end = pos + len(_TRAILER_MAGIC) if pos >= 0 else len(MAGIC)
+        self._end = end
+        self.snapshots = [Snapshot(self, footer) for footer in footers]
+
+    def _view(self, span, typecode='B'):
+        offset, size = span
+        key = (offset, size, typecode)
+        view = self._views.get(key)
+        if view is None:
+            if typecode != 'B':
+                view = self._view(span).cast(typecode)
+            else:
+                if self._base is None or offset + size > len(self._base):
+                    # 本次打开后追加的数据不在已有的映射中
+                    self._map()
+                view = self._base[offset:offset + size]
+            self._views[key] = view
+        return view
+
+    def append(self, snapshot, label=None, timestamp=None, digests=True):
+        """
+        追加一个快照（单个 DescribeVpcs/DescribeSubnets 响应或 inventory 快照），返回对应的 Snapshot
+        digests 为真时同时保存每条记录的摘要，之后无需还原记录即可比较快照
+        """
+        sets = list(_find_sets(snapshot))
+        with open(self.path, 'ab') as f:
+            if f.tell() != self._end:
+                # 其他进程追加了快照，或末尾有中断的追加留下的不完整段
+                self._load()
+                f.truncate(self._end)
+            if self._end == 0:
+                f.write(MAGIC)
+                self._end = f.tell()
+            previous = self._end
+            writer = _SegmentWriter(f, previous)
+            footer = {
+                "byteorder": sys.byteorder,
+                "label": label,
+                "timestamp": time.time() if timestamp is None else timestamp,
+                "sets": [_write_set(writer, path[-1], path, records, digests) for path, records in sets],
+                "meta": writer.write(json.dumps(_strip_sets(snapshot, [path for path, _ in sets]),
+                                                ensure_ascii=False).encode('utf-8')),
+            }
+            encoded = json.dumps(footer, ensure_ascii=False).encode('utf-8')
+            offset = writer.offset
+            f.write(encoded)
+            f.write(_TRAILER.pack(offset, len(encoded), previous, _TRAILER_MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+            self._end = offset + len(encoded) + _TRAILER.size
+        self.snapshots.append(Snapshot(self, json.loads(encoded)))
+        return self.snapshots[-1]
+
+    def close(self):
+        for view in reversed(list(self._views.values())):
+            view.release()
+        self._views = {}
+        for view in self._bases:
+            view.release()
+        self._bases = []
+        self._base = None
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+def _load_json(path):
+    with open(path, 'rb') as f:
+        return jsonbackend.loads(f.read())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="列式快照文件：追加、列出和导出快照")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    append = subparsers.add_parser('append', help="把JSON响应或 inventory 快照追加到快照文件")
+    append.add_argument('store')
+    append.add_argument('sources', nargs='+', help="JSON文件，每个追加为一个快照")
+    append.add_argument('--label', help="快照标签，默认为文件名")
+
+    listing = subparsers.add_parser('list', help="列出快照文件中的快照")
+    listing.add_argument('store')
+
+    export = subparsers.add_parser('export', help="把一个快照还原为JSON")
+    export.add_argument('store')
+    export.add_argument('index', type=int, nargs='?', default=-1, help="快照序号，默认为最后一个")
+    export.add_argument('-o', '--output', help="输出路径，默认输出到标准输出")
+
+    args = parser.parse_args(argv)
+    with SnapshotFile(args.store) as store:
+        if args.command == 'append':
+            for source in args.sources:
+                store.append(_load_json(source), label=args.label or os.path.basename(source))
+            print(f"{args.store}: 共 {len(store)} 个快照")
+        elif args.command == 'list':
+            for index, snapshot in enumerate(store):
+                created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot.timestamp))
+                counts = ", ".join(f"{name} {snapshot.length(name)}" for name in snapshot.set_names)
+                print(f"{index:>4}  {created}  {snapshot.label or '-'}  {counts}")
+        else:
+            data = store[args.index].to_dict()
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+            else:
+                json.dump(data, sys.stdout, ensure_ascii=False)
+                print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
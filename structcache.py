@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import jsonbackend
+from anyjson import describe_json_tree
+from structure import StructureNode
+
+class StructureCache:
+    """
+    以输入内容的哈希为键缓存结构树，内存层按LRU和总大小淘汰，可选磁盘层
+    返回的结构树在多次命中之间共享，调用方不应修改它（合并时以它为 merge 的参数即可）
+    """
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, directory=None,
+                 merge_lists=False, share_identical=False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.merge_lists = merge_lists
+        # 为真时用带计数的结构指纹去重，结构完全相同的响应共用同一棵树
+        self.share_identical = share_identical
+        # 摘要 -> (结构树, 估算大小)
+        self._entries = OrderedDict()
+        self._shared = {}
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, data):
+        """
+        计算输入内容的摘要，分析选项也参与计算
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        h = hashlib.blake2b(data, digest_size=20)
+        h.update(b"merge" if self.merge_lists else b"first")
+        return h.hexdigest()
+
+    def describe(self, data):
+        """
+        返回输入对应的结构树，命中缓存时不再解析
+        """
+        key = self.key(data)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        tree, size = self._load_disk(key)
+        if tree is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            tree = describe_json_tree(jsonbackend.loads(data), merge_lists=self.merge_lists)
+            # 序列化后的长度作为缓存项大小的估算
+            encoded = json.dumps(tree.to_dict(), ensure_ascii=False).encode('utf-8')
+            size = len(encoded)
+            self._save_disk(key, encoded)
+        if self.share_identical:
+            tree = self._shared.setdefault(tree.fingerprint(counts=True), tree)
+        self._insert(key, tree, size)
+        return tree
+
+    def invalidate(self, data=None):
+        """
+        删除一个输入对应的缓存；data 为 None 时清空内存层
+        """
+        if data is None:
+            self._entries.clear()
+            self._shared.clear()
+            self._bytes = 0
+            return
+        key = self.key(data)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+        if self.directory:
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """
+        返回命中、未命中和淘汰计数
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def _insert(self, key, tree, size):
+        self._entries[key] = (tree, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+        if self.share_identical and len(self._shared) > len(self._entries):
+            # 去掉已经没有缓存项引用的共享树
+            live = {id(tree) for tree, _ in self._entries.values()}
+            self._shared = {fp: tree for fp, tree in self._shared.items() if id(tree) in live}
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_disk(self, key):
+        if not self.directory:
+            return None, 0
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                encoded = f.read()
+            return StructureNode.from_dict(json.loads(encoded)), len(encoded)
+        except (OSError, ValueError):
+            return None, 0
+
+    def _save_disk(self, key, encoded):
+        if not self.directory:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encoded)
+        # 先写临时文件再替换，避免其他进程读到写了一半的文件
+        os.replace(tmp_path, path)
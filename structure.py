@@ -0,0 +1,307 @@
+import hashlib
+import re
+from collections import defaultdict
+
+_LIST_LENGTH_RE = re.compile(r"\(list\[\d+\]\)$")
+
+class StructureNode:
+    """
+    结构树节点：同一路径上同一类型的值共用一个节点
+    key 为字典键，列表元素和文档顶层的值使用 None；文档根节点的 type 为 None
+    分析因 limits.Limits 的上限提前结束时，根节点的 truncated 为触发的上限（逗号分隔），结构只描述了部分输入
+    """
+    __slots__ = ('key', 'type', 'count', 'children', 'lengths', 'truncated')
+
+    def __init__(self, key=None, type_name=None):
+        self.key = key
+        self.type = type_name
+        self.count = 0
+        # 子节点：{(键, 类型): 节点}，按首次出现的顺序排列
+        self.children = None
+        # 列表节点记录每种长度出现的次数：{长度: 次数}
+        self.lengths = {} if type_name == "list" else None
+        self.truncated = None
+
+    def __repr__(self):
+        return f"StructureNode({self.key!r}, {self.type!r}, count={self.count})"
+
+    def child(self, key, type_name):
+        """
+        返回指定键和类型的子节点，不存在时创建
+        """
+        children = self.children
+        if children is None:
+            children = self.children = {}
+        node = children.get((key, type_name))
+        if node is None:
+            node = children[(key, type_name)] = StructureNode(key, type_name)
+        return node
+
+    @property
+    def label(self):
+        """
+        类型说明，列表带上长度，例如 list[20]
+        """
+        if self.type != "list":
+            return self.type
+        lengths = sorted(self.lengths)
+        if not lengths:
+            # 超过深度上限未读完的列表，长度未知
+            return "list[?]"
+        if len(lengths) == 1:
+            return f"list[{lengths[0]}]"
+        return f"list[{lengths[0]}~{lengths[-1]}]"
+
+    def walk(self, path=""):
+        """
+        先序遍历所有后代节点，产生 (节点, 路径, 深度)
+        """
+        stack = [(iter(self.children.values()) if self.children else iter(()), self, path, 0)]
+        while stack:
+            children, parent, parent_path, depth = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                continue
+            if node.key is None:
+                path = f"{parent_path}[]" if parent.type == "list" else parent_path
+            else:
+                path = f"{parent_path}.{node.key}" if parent_path else node.key
+            yield node, path, depth
+            if node.children:
+                stack.append((iter(node.children.values()), node, path, depth + 1))
+
+    def merge(self, other):
+        """
+        把另一棵结构树的计数累加到本树上，满足结合律，可用于合并多个工作进程的结果
+        """
+        stack = [(self, other)]
+        while stack:
+            target, source = stack.pop()
+            target.count += source.count
+            if source.truncated:
+                target.truncated = merge_truncated(target.truncated, source.truncated)
+            if source.lengths:
+                for length, count in source.lengths.items():
+                    target.lengths[length] = target.lengths.get(length, 0) + count
+            if source.children:
+                for (key, type_name), child in source.children.items():
+                    stack.append((target.child(key, type_name), child))
+        return self
+
+    def subtract(self, other):
+        """
+        从本树减去另一棵树的计数，other 描述的必须是本树所描述数据的一部分
+        计数归零的节点被删除，用于从结构树中去掉一批被删除或被修改的记录
+        """
+        visited = []
+        stack = [(self, other)]
+        while stack:
+            target, source = stack.pop()
+            visited.append(target)
+            target.count -= source.count
+            if source.lengths:
+                for length, count in source.lengths.items():
+                    remaining = target.lengths[length] - count
+                    if remaining > 0:
+                        target.lengths[length] = remaining
+                    else:
+                        del target.lengths[length]
+            if source.children:
+                for key, child in source.children.items():
+                    stack.append((target.children[key], child))
+        for node in visited:
+            if node.children:
+                node.children = {key: child for key, child in node.children.items() if child.count > 0} or None
+        return self
+
+    def copy(self):
+        """
+        复制整棵树
+        """
+        return StructureNode(self.key, self.type).merge(self)
+
+    def _digests(self, counts=False):
+        """
+        自底向上计算每个节点的指纹：{id(节点): 摘要}
+        """
+        digests = {}
+        stack = [(self, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not visited and node.children:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+                continue
+            h = hashlib.blake2b(repr((node.key, node.type)).encode('utf-8'), digest_size=16)
+            if counts:
+                h.update(repr((node.count, sorted(node.lengths.items()) if node.lengths else None)).encode())
+            if node.children:
+                for digest in sorted(digests[id(child)] for child in node.children.values()):
+                    h.update(digest)
+            digests[id(node)] = h.digest()
+        return digests
+
+    def fingerprint(self, counts=False):
+        """
+        计算结构指纹：自底向上对每个节点的键、类型和子节点指纹做哈希，与键的出现顺序无关
+        counts 为真时计数和列表长度也参与计算，指纹相同即结构树完全相同
+        """
+        return self._digests(counts)[id(self)].hex()
+
+    def to_structure(self, structure=None, path=""):
+        """
+        转换为旧的扁平结构：{"路径 (类型)": 次数}
+        """
+        if structure is None:
+            structure = defaultdict(int)
+        # 与 walk 相同的先序遍历，就地展开以免逐个节点经过生成器
+        stack = [(self, path)]
+        while stack:
+            parent, parent_path = stack.pop()
+            if parent is not self:
+                if parent.type == "list":
+                    for length, count in parent.lengths.items():
+                        structure[f"{parent_path} (list[{length}])"] += count
+                    if not parent.lengths:
+                        structure[f"{parent_path} (list[?])"] += parent.count
+                else:
+                    structure[f"{parent_path} ({parent.type})"] += parent.count
+            if not parent.children:
+                continue
+            item_path = f"{parent_path}[]" if parent.type == "list" else parent_path
+            for node in reversed(parent.children.values()):
+                if node.key is None:
+                    stack.append((node, item_path))
+                else:
+                    stack.append((node, f"{parent_path}.{node.key}" if parent_path else node.key))
+        return structure
+
+    def to_dict(self):
+        """
+        导出为可JSON序列化的嵌套字典
+        """
+        result = {"key": self.key, "type": self.type, "count": self.count}
+        if self.truncated:
+            result["truncated"] = self.truncated
+        if self.lengths:
+            result["lengths"] = [[length, count] for length, count in self.lengths.items()]
+        if self.children:
+            result["children"] = [child.to_dict() for child in self.children.values()]
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        从 to_dict 的输出重建结构树
+        """
+        node = cls(data["key"], data["type"])
+        node.count = data["count"]
+        node.truncated = data.get("truncated")
+        for length, count in data.get("lengths", ()):
+            node.lengths[length] = count
+        if data.get("children"):
+            node.children = {}
+            for child in data["children"]:
+                child_node = cls.from_dict(child)
+                node.children[(child_node.key, child_node.type)] = child_node
+        return node
+
+def merge_truncated(first, second):
+    """
+    合并两个 truncated 标记（逗号分隔的上限名称）
+    """
+    if not first or not second:
+        return first or second
+    reasons = first.split(",")
+    reasons.extend(reason for reason in second.split(",") if reason not in reasons)
+    return ",".join(reasons)
+
+def _child_path(parent, parent_path, node):
+    if node.key is None:
+        return f"{parent_path}[]" if parent.type == "list" else parent_path
+    return f"{parent_path}.{node.key}" if parent_path else node.key
+
+def diff_trees(old, new):
+    """
+    比较两棵结构树的模式（不比较计数），返回 {"added": [...], "removed": [...]}，元素为 "路径 (类型)"
+    指纹相同的子树直接跳过，只展开有变化的分支
+    """
+    old_digests = old._digests()
+    new_digests = new._digests()
+    added = []
+    removed = []
+    if old_digests[id(old)] == new_digests[id(new)]:
+        return {"added": added, "removed": removed}
+    stack = [(old, new, "")]
+    while stack:
+        old_node, new_node, path = stack.pop()
+        old_children = old_node.children or {}
+        new_children = new_node.children or {}
+        for key, child in new_children.items():
+            child_path = _child_path(new_node, path, child)
+            other = old_children.get(key)
+            if other is None:
+                added.append(f"{child_path} ({child.type})")
+                added.extend(f"{p} ({n.type})" for n, p, _ in child.walk(child_path))
+            elif new_digests[id(child)] != old_digests[id(other)]:
+                stack.append((other, child, child_path))
+        for key, child in old_children.items():
+            if key not in new_children:
+                child_path = _child_path(old_node, path, child)
+                removed.append(f"{child_path} ({child.type})")
+                removed.extend(f"{p} ({n.type})" for n, p, _ in child.walk(child_path))
+    return {"added": added, "removed": removed}
+
+def structure_fingerprint(structure, counts=False):
+    """
+    describe_json_structure 输出的扁平结构 {"路径 (类型)": 次数} 的指纹，与键的顺序无关
+    counts 为假时忽略次数和列表长度，只比较路径和类型
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if counts:
+        for entry in sorted(structure):
+            h.update(f"{entry}\0{structure[entry]}\n".encode('utf-8'))
+    else:
+        for entry in sorted({_LIST_LENGTH_RE.sub("(list)", entry) for entry in structure}):
+            h.update(f"{entry}\n".encode('utf-8'))
+    return h.hexdigest()
+
+def summarize_schema(tree):
+    """
+    汇总结构树，返回 {路径元组: {"path": 路径, "count": 次数, "types": {类型: 次数}, "optional": 是否可选}}
+    路径元组由字典键组成，列表元素记为 None，键中含 "." 时也不会与嵌套路径混淆；path 只用于显示
+    可选键：出现次数少于其所在字典的出现次数
+    """
+    schema = {}
+    optional = set()
+    stack = [(tree, (), "")]
+    while stack:
+        node, key, path = stack.pop()
+        if node is not tree:
+            entry = schema.get(key)
+            if entry is None:
+                entry = schema[key] = {"path": path, "count": 0, "types": {}, "optional": False}
+            entry["count"] += node.count
+            entry["types"][node.type] = entry["types"].get(node.type, 0) + node.count
+        if not node.children:
+            continue
+        if node.type == "dict":
+            # 统计字典每个键在各种类型下出现的总次数
+            key_counts = {}
+            for (child_key, _), child in node.children.items():
+                key_counts[child_key] = key_counts.get(child_key, 0) + child.count
+            for child_key, count in key_counts.items():
+                if count < node.count:
+                    optional.add(key + (child_key,))
+        # 逆序入栈，按先序（首次出现的顺序）汇总
+        for child in reversed(node.children.values()):
+            if child.key is not None:
+                stack.append((child, key + (child.key,), f"{path}.{child.key}" if path else child.key))
+            elif node.type == "list":
+                stack.append((child, key + (None,), f"{path}[]"))
+            else:
+                stack.append((child, key, path))
+    for key in optional:
+        schema[key]["optional"] = True
+    return schema
@@ -0,0 +1,82 @@
+import hashlib
+import hmac
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+ALGORITHM = "TC3-HMAC-SHA256"
+CONTENT_TYPE = "application/json; charset=utf-8"
+SIGNED_HEADERS = "content-type;host;x-tc-action"
+
+# 各接口所属的服务、域名和版本，与 *.sh 脚本中的配置一致
+ACTIONS = {
+    "DescribeVpcs": ("vpc", "vpc.tencentcloudapi.com", "2017-03-12"),
+    "DescribeSubnets": ("vpc", "vpc.tencentcloudapi.com", "2017-03-12"),
+    "CreateLoadBalancer": ("clb", "clb.tencentcloudapi.com", "2018-03-17"),
+}
+
+def _sha256_hex(data):
+    return hashlib.sha256(data).hexdigest()
+
+@lru_cache(maxsize=256)
+def signing_key(secret_key, date, service):
+    """
+    派生签名密钥，只随日期和服务变化，按 (secret_key, date, service) 缓存
+    """
+    secret_date = hmac.new(("TC3" + secret_key).encode('utf-8'), date.encode('utf-8'), hashlib.sha256).digest()
+    secret_service = hmac.new(secret_date, service.encode('utf-8'), hashlib.sha256).digest()
+    return hmac.new(secret_service, b"tc3_request", hashlib.sha256).digest()
+
+def canonical_request(host, action, payload):
+    """
+    拼接规范请求串（步骤 1）
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return (
+        "POST\n/\n\n"
+        f"content-type:{CONTENT_TYPE}\nhost:{host}\nx-tc-action:{action.lower()}\n\n"
+        f"{SIGNED_HEADERS}\n{_sha256_hex(payload)}"
+    )
+
+def string_to_sign(timestamp, date, service, canonical):
+    """
+    拼接待签名字符串（步骤 2）
+    """
+    return f"{ALGORITHM}\n{timestamp}\n{date}/{service}/tc3_request\n{_sha256_hex(canonical.encode('utf-8'))}"
+
+def authorization(secret_id, secret_key, service, host, action, payload, timestamp):
+    """
+    计算签名并拼接 Authorization（步骤 3、4）
+    """
+    date = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+    to_sign = string_to_sign(timestamp, date, service, canonical_request(host, action, payload))
+    signature = hmac.new(signing_key(secret_key, date, service), to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+    return (f"{ALGORITHM} Credential={secret_id}/{date}/{service}/tc3_request, "
+            f"SignedHeaders={SIGNED_HEADERS}, Signature={signature}")
+
+def sign_request(secret_id, secret_key, action, payload, region, timestamp=None, token="",
+                 service=None, host=None, version=None):
+    """
+    为一次 API 调用生成全部请求头，与 *.sh 脚本发送的请求头相同
+    service/host/version 默认取自 ACTIONS
+    """
+    if action in ACTIONS:
+        default_service, default_host, default_version = ACTIONS[action]
+        service = service or default_service
+        host = host or default_host
+        version = version or default_version
+    if not (service and host and version):
+        raise ValueError(f"未知的接口 {action}，需要指定 service、host 和 version")
+    if timestamp is None:
+        timestamp = int(time.time())
+    return {
+        "Authorization": authorization(secret_id, secret_key, service, host, action, payload, timestamp),
+        "Content-Type": CONTENT_TYPE,
+        "Host": host,
+        "X-TC-Action": action,
+        "X-TC-Timestamp": str(timestamp),
+        "X-TC-Version": version,
+        "X-TC-Region": region,
+        "X-TC-Token": token,
+    }
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import urlsplit
+
+import jsonbackend
+import tc3sign
+from anyjson import describe_json_tree
+from respcache import INVALIDATING_ACTIONS, is_cacheable
+from structure import StructureNode
+
+# 这些接口的 Offset/Limit 参数是字符串类型
+STRING_PAGINATION = {"DescribeVpcs", "DescribeSubnets"}
+# 各接口返回的记录列表字段
+RECORD_SETS = {"DescribeVpcs": "VpcSet", "DescribeSubnets": "SubnetSet"}
+
+class TencentCloudError(Exception):
+    """
+    接口返回 Response.Error 时抛出
+    """
+    def __init__(self, code, message, request_id=None):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+        self.request_id = request_id
+
+class HttpError(Exception):
+    """
+    HTTP 状态码不是 200 或响应格式错误
+    """
+
+class RateLimiter:
+    """
+    令牌桶限速：平均每秒 rate 个请求，最多连续突发 burst 个
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._updated is not None:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._updated = time.monotonic()
+                self._tokens = 0
+            else:
+                self._tokens -= 1
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+class ConnectionPool:
+    """
+    到同一主机的 HTTP/1.1 长连接池，请求完成后连接放回池中复用，省去重复的 TCP/TLS 握手
+    """
+    def __init__(self, host, port, use_ssl=True, max_connections=8, timeout=30):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_connections)
+        # 统计新建连接数，便于确认连接确实被复用
+        self.connections_opened = 0
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl,
+                                                       server_hostname=self.host if self.ssl else None)
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    def _pop_idle(self):
+        """
+        取出一个空闲连接，丢弃已被服务端关闭的；没有时返回 None
+        """
+        while self._idle:
+            connection = self._idle.pop()
+            if not connection.reader.at_eof():
+                return connection
+            connection.close()
+        return None
+
+    async def request(self, method, path, headers, body, idempotent=False):
+        """
+        发送请求，返回 (状态码, 响应头, 响应体)
+        复用的空闲连接可能已被服务端关闭：idempotent 为真时换一个新连接重试一次；
+        否则请求可能已被服务端处理，不能重发，抛出 HttpError
+        """
+        async with self._slots:
+            while True:
+                connection = self._pop_idle()
+                reused = connection is not None
+                if not reused:
+                    connection = await self._connect()
+                try:
+                    status, response_headers, data = await asyncio.wait_for(
+                        self._send(connection, method, path, headers, body), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    connection.close()
+                    if reused and idempotent:
+                        continue
+                    raise HttpError(f"连接 {self.host}:{self.port} 失败: {e}") from e
+                except BaseException:
+                    connection.close()
+                    raise
+                if response_headers.get("connection", "").lower() == "close":
+                    connection.close()
+                else:
+                    self._idle.append(connection)
+                return status, response_headers, data
+
+    async def _send(self, connection, method, path, headers, body):
+        lines = [f"{method} {path} HTTP/1.1", f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        connection.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('utf-8') + body)
+        await connection.writer.drain()
+
+        reader = connection.reader
+        status_line = await reader.readuntil(b"\r\n")
+        parts = status_line.decode('latin-1').split(" ", 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise HttpError(f"无效的状态行: {status_line!r}")
+        response_headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    # 跳过可能存在的尾部字段
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            data = b"".join(chunks)
+        elif "content-length" in response_headers:
+            data = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            data = await reader.read()
+            response_headers["connection"] = "close"
+        return int(parts[1]), response_headers, data
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+class TencentCloudClient:
+    """
+    腾讯云 API 异步客户端：进程内签名，按主机复用长连接，支持按 Offset/Limit 并发翻页
+    endpoint 可指向本地替身服务，例如 http://127.0.0.1:8080
+    rate_limiter 不为 None 时每次调用前先取得令牌；每次调用的耗时记录在 latencies 中
+    cache 为 respcache.ResponseCache 时缓存 Describe* 的响应，CreateLoadBalancer 成功后使其失效
+    """
+    def __init__(self, secret_id, secret_key, region, endpoint=None, token="",
+                 max_connections=8, timeout=30, rate_limiter=None, cache=None):
+        self.secret_id = secret_id
+        self.secret_key = secret_key
+        self.region = region
+        self.endpoint = endpoint
+        self.token = token
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        # (接口, 秒)，不含等待限速的时间
+        self.latencies = []
+        self._pools = {}
+
+    def _pool(self, host):
+        if self.endpoint:
+            url = urlsplit(self.endpoint)
+            use_ssl = url.scheme == "https"
+            key = (url.hostname, url.port or (443 if use_ssl else 80), use_ssl)
+        else:
+            key = (host, 443, True)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = ConnectionPool(*key, max_connections=self.max_connections,
+                                                     timeout=self.timeout)
+        return pool
+
+    async def call_raw(self, action, params=None):
+        """
+        调用接口，返回未解析的响应体
+        """
+        body = json.dumps(params or {}, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        headers = tc3sign.sign_request(self.secret_id, self.secret_key, action, body, self.region,
+                                       token=self.token)
+        start = time.perf_counter()
+        # 只有 Describe* 这类只读接口在连接断开时自动重发，CreateLoadBalancer 等不能重复执行
+        status, _, data = await self._pool(headers["Host"]).request("POST", "/", headers, body,
+                                                                    idempotent=is_cacheable(action))
+        self.latencies.append((action, time.perf_counter() - start))
+        if status != 200:
+            raise HttpError(f"{action} 返回 HTTP {status}: {data[:200]!r}")
+        return data
+
+    async def _call(self, action, params):
+        """
+        经过缓存调用接口，返回 (响应体, Response)；命中缓存时 Response 为 None，由调用方按需解析
+        只缓存没有 Error 的响应
+        """
+        cache = self.cache
+        cacheable = cache is not None and is_cacheable(action)
+        if cacheable:
+            scope, key = cache.key(self.secret_id, self.secret_key, self.region, action, params)
+            data = cache.get(scope, key)
+            if data is not None:
+                return data, None
+        data = await self.call_raw(action, params)
+        response = jsonbackend.loads(data).get("Response", {})
+        if cache is not None and not response.get("Error"):
+            if cacheable:
+                cache.put(scope, key, data)
+            elif action in INVALIDATING_ACTIONS:
+                cache.invalidate(cache.scope(self.secret_id, self.secret_key, self.region))
+        return data, response
+
+    async def call_cached(self, action, params=None):
+        """
+        调用接口，返回原始响应体，Describe* 命中缓存时不发出请求
+        """
+        data, _ = await self._call(action, params)
+        return data
+
+    async def call(self, action, params=None):
+        """
+        调用接口，返回解析后的 Response 部分
+        """
+        data, response = await self._call(action, params)
+        if response is None:
+            response = jsonbackend.loads(data).get("Response", {})
+        error = response.get("Error")
+        if error:
+            raise TencentCloudError(error.get("Code"), error.get("Message"), response.get("RequestId"))
+        return response
+
+    async def paginate(self, action, params=None, limit=100, concurrency=4):
+        """
+        逐页产生 (offset, Response)：先取第一页得到 TotalCount，再并发获取其余各页
+        其余各页按完成顺序产生，同时进行的请求数不超过 concurrency
+        """
+        def page_params(offset):
+            page = dict(params or {})
+            if action in STRING_PAGINATION:
+                page.update(Offset=str(offset), Limit=str(limit))
+            else:
+                page.update(Offset=offset, Limit=limit)
+            return page
+
+        first = await self.call(action, page_params(0))
+        yield 0, first
+        total = int(first.get("TotalCount") or 0)
+        offsets = list(range(limit, total, limit))
+        if not offsets:
+            return
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(offset):
+            async with semaphore:
+                return offset, await self.call(action, page_params(offset))
+
+        tasks = [asyncio.ensure_future(fetch(offset)) for offset in offsets]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def describe_all(self, action, params=None, limit=100, concurrency=4):
+        """
+        获取全部记录，按 Offset 顺序拼接为一个 Response
+        """
+        set_name = RECORD_SETS.get(action)
+        pages = {}
+        async for offset, page in self.paginate(action, params, limit, concurrency):
+            pages[offset] = page
+        merged = dict(pages[0])
+        if set_name:
+            merged[set_name] = [record for offset in sorted(pages) for record in pages[offset].get(set_name) or ()]
+        return merged
+
+    async def close(self):
+        for pool in self._pools.values():
+            pool.close()
+        self._pools.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+async def describe_pages(client, action, params=None, limit=100, concurrency=4, merge_lists=False, tree=None):
+    """
+    边翻页边分析：每页到达后立即合并进结构树，不需要先拼出完整的响应
+    """
+    if tree is None:
+        tree = StructureNode()
+    async for _, page in client.paginate(action, params, limit, concurrency):
+        describe_json_tree({"Response": page}, merge_lists=merge_lists, tree=tree)
+    return tree